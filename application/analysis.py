@@ -1,7 +1,13 @@
-import sqlite3
+import numpy as np
 import pandas as pd
 import re
+import time
+from collections import OrderedDict
 import config
+from core.db_connection import write_connection
+from core.rule_set import get_rule_set, RULE, TRANSFER_RULE
+from core.rule_sql import compile_rule_match_query, register_rule_functions
+from core.rule_stats import SHARED
 
 # -------------------------------------------------------------------
 # 1. 개별 조건 평가 함수들 (작고, 독립적이며, 테스트하기 쉬움)
@@ -16,6 +22,9 @@ def _evaluate_exact(series, value):
 
 
 def _evaluate_regex(series, value):
+    # 규칙 캐시에서는 IGNORECASE로 미리 컴파일된 패턴이 넘어옴
+    if isinstance(value, re.Pattern):
+        return series.astype(str).str.contains(value, na=False, regex=True)
     return series.astype(str).str.contains(value, na=False, regex=True, flags=re.IGNORECASE)
 
 
@@ -45,139 +54,462 @@ CONDITION_EVALUATORS = {
 }
 
 
-# -------------------------------------------------------------------
-# 3. 간소화된 메인 규칙 엔진 함수
-# -------------------------------------------------------------------
-def run_rule_engine(df, default_category_id, db_path=config.DB_PATH):
-    if df.empty:
-        return df
+def _evaluate_contains_conditions(df, rule_set, masks):
+    """
+    모든 CONTAINS 조건을 컬럼별 Aho-Corasick 오토마톤으로 한 번에 평가해 masks에 {(컬럼, 'CONTAINS', 값): 마스크}로 추가합니다.
+    같은 문자열은 한 번만 검색하고(factorize), 결과를 행으로 펼칩니다.
+    """
+    for column, matcher in rule_set.contains_matchers.items():
+        if column not in df.columns:
+            continue
+        codes, uniques = pd.factorize(df[column].astype(str))
+        hits = np.zeros((len(matcher.patterns), len(uniques)), dtype=bool)
+        for position, text in enumerate(uniques):
+            for pattern_index in matcher.search(text):
+                hits[pattern_index, position] = True
+        for pattern_index, pattern in enumerate(matcher.patterns):
+            masks[(column, 'CONTAINS', pattern)] = pd.Series(hits[pattern_index][codes], index=df.index)
+
+
+def _numeric_buckets(series, boundaries):
+    """
+    숫자로 한 번 변환한 값을 정렬된 비교 값(boundaries) 기준 구간 번호로 바꿉니다.
+    boundaries[k]와 같으면 2k+1, boundaries[k-1]과 boundaries[k] 사이면 2k, 숫자가 아니면 -1입니다.
+    """
+    numbers = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float)
+    buckets = np.searchsorted(boundaries, numbers, side='left') + np.searchsorted(boundaries, numbers, side='right')
+    return np.where(np.isnan(numbers), -1, buckets)
+
 
-    conn = sqlite3.connect(db_path)
-    rules = pd.read_sql_query("SELECT * FROM rule ORDER BY priority ", conn)
+# 구간 번호 배열과 비교 값의 위치 k로 조건 결과를 계산 (숫자가 아닌 값(-1)은 항상 False)
+NUMERIC_BUCKET_TESTS = {
+    'EQUALS': lambda buckets, k: buckets == 2 * k + 1,
+    'GREATER_THAN': lambda buckets, k: buckets > 2 * k + 1,
+    'LESS_THAN': lambda buckets, k: (buckets >= 0) & (buckets < 2 * k + 1),
+}
 
-    conditions_map = {}
-    for rule_id in rules['id']:
-        conditions_map[rule_id] = pd.read_sql_query(f"SELECT * FROM rule_condition WHERE rule_id = {rule_id}", conn)
-    conn.close()
 
-    if 'category_id' not in df.columns:
-        df['category_id'] = default_category_id
-    df['category_id'].fillna(default_category_id, inplace=True)
+def _evaluate_numeric_conditions(df, rule_set, masks):
+    """
+    숫자 비교 조건(GREATER_THAN/LESS_THAN/EQUALS)을 컬럼별 숫자 변환 한 번과 searchsorted로 평가해
+    masks에 {(컬럼, match_type, 값): 마스크}로 추가합니다. 비교 값이 늘어도 행마다 드는 비용은 정수 비교뿐입니다.
+    """
+    for column, boundaries in rule_set.numeric_boundaries.items():
+        if column not in df.columns:
+            continue
+        buckets = _numeric_buckets(df[column], boundaries)
+        for match_type, value in rule_set.numeric_conditions[column]:
+            k = np.searchsorted(boundaries, value)
+            masks[(column, match_type, value)] = pd.Series(NUMERIC_BUCKET_TESTS[match_type](buckets, k),
+                                                           index=df.index)
+
+
+def _evaluate_condition_masks(df, rule_set):
+    """CONTAINS와 숫자 비교 조건을 미리 한 번에 평가해 {(컬럼, match_type, 값): 마스크}를 반환합니다."""
+    masks = {}
+    _evaluate_contains_conditions(df, rule_set, masks)
+    _evaluate_numeric_conditions(df, rule_set, masks)
+    return masks
+
 
-    unclassified_mask = (df['category_id'] == default_category_id)
+def _exact_key(series):
+    # _evaluate_exact와 같은 기준으로 정규화한 조회 키
+    return series.astype(str).str.strip()
 
-    for _, rule in rules.iterrows():
-        if not unclassified_mask.any():
+
+def _equals_key(series):
+    # _evaluate_equals와 같은 기준: 숫자로 변환해 정수 값인 경우만 키로 사용
+    numbers = pd.to_numeric(series, errors='coerce')
+    is_integer = numbers.notna() & (numbers % 1 == 0) & (numbers.abs() < 2 ** 63)
+    return numbers.where(is_integer).astype('Int64')
+
+
+INDEX_KEY_BUILDERS = {
+    'EXACT': _exact_key,
+    'EQUALS': _equals_key,
+}
+
+
+def _evaluate_indexed_rules(df, rule_set):
+    """
+    EXACT/EQUALS 조건만으로 된 규칙들을 signature별 merge 한 번으로 평가해 {rule_id: 마스크}를 반환합니다.
+    (예: content EXACT + transaction_amount EQUALS 규칙 전체를 (content, 금액) 키 조회 한 번으로 처리)
+    """
+    masks = {}
+    for signature, keys in rule_set.exact_indexes.items():
+        columns = [column for column, _ in signature]
+        if any(column not in df.columns for column in columns):
+            continue
+
+        row_keys = pd.DataFrame({column: INDEX_KEY_BUILDERS[match_type](df[column]).to_numpy()
+                                 for column, match_type in signature})
+        row_keys['_row'] = np.arange(len(df))
+        hits = row_keys.merge(keys, on=columns, how='inner')
+
+        for rule_id in keys['rule_id']:
+            masks[rule_id] = np.zeros(len(df), dtype=bool)
+        for rule_id, rows in hits.groupby('rule_id')['_row']:
+            masks[rule_id][rows.to_numpy()] = True
+    return {rule_id: pd.Series(mask, index=df.index) for rule_id, mask in masks.items()}
+
+
+def _evaluate_rule(df, rule, condition_masks, indexed_masks):
+    """컴파일된 규칙의 모든 조건(AND)을 만족하는 행의 마스크를 반환합니다."""
+    if rule.id in indexed_masks:
+        return indexed_masks[rule.id]
+
+    rule_applies_mask = pd.Series(rule.valid, index=df.index)
+    for cond in rule.conditions:
+        key = (cond.column, cond.match_type, cond.value)
+        if key in condition_masks:
+            rule_applies_mask &= condition_masks[key]
+            continue
+        eval_func = CONDITION_EVALUATORS.get(cond.match_type)
+        if eval_func is None:
+            return pd.Series(False, index=df.index)
+        rule_applies_mask &= eval_func(df[cond.column], cond.value)
+    return rule_applies_mask
+
+
+def _rule_targets(rule_set):
+    # 규칙 위치 -> 대상 ID (NULL이 있으면 float으로, 기존 엔진과 같은 dtype)
+    return pd.to_numeric(pd.Series([rule.target for rule in rule_set.rules], dtype=object)).to_numpy()
+
+
+# -------------------------------------------------------------------
+# 3. 첫 번째로 일치하는 규칙을 찾는 엔진 모드들
+#    (df, rule_set, candidates) -> 행마다 일치한 규칙의 위치(rule_set.rules 기준), 없으면 -1
+# -------------------------------------------------------------------
+def _first_match_rowwise(df, rule_set, candidates):
+    """우선순위 순서로 규칙마다 전체 행을 평가하고, 아직 분류되지 않은 행에만 적용합니다."""
+    positions = np.full(len(df), -1)
+    if not candidates.any():
+        return positions
+
+    subset = df[candidates]
+    remaining = np.ones(len(subset), dtype=bool)
+    matched = np.full(len(subset), -1)
+    condition_masks = _evaluate_condition_masks(subset, rule_set)
+    indexed_masks = _evaluate_indexed_rules(subset, rule_set)
+
+    for position, rule in enumerate(rule_set.rules):
+        if not remaining.any():
             break
+        final_mask = remaining & _evaluate_rule(subset, rule, condition_masks, indexed_masks).to_numpy()
+        matched[final_mask] = position
+        remaining &= ~final_mask
 
-        target_category_id = rule['category_id']
-        conditions = conditions_map[rule['id']]
+    positions[candidates] = matched
+    return positions
 
-        rule_applies_mask = pd.Series(True, index=df.index)
 
-        for _, cond in conditions.iterrows():
-            column = cond['column_to_check']
-            value = cond['value']
-            # --- 여기가 수정되었습니다! ---
-            match_type = cond['match_type'].strip()  # 양 끝 공백을 제거하여 비교 안정성 확보
+def _first_match_with_stats(df, rule_set, candidates, stats):
+    """
+    ROWWISE와 같은 결과를 내되, 규칙마다 모든 후보 행을 평가해 규칙별 일치/가려짐 건수와 평가 시간을 stats에 기록합니다.
+    여러 규칙이 함께 쓰는 사전 평가(CONTAINS/숫자 조건/키 조회) 시간은 rule_id 없이 따로 기록합니다.
+    """
+    positions = np.full(len(df), -1)
+    if not candidates.any():
+        return positions
+
+    subset = df[candidates]
+    remaining = np.ones(len(subset), dtype=bool)
+    matched = np.full(len(subset), -1)
+    started = time.perf_counter()
+    condition_masks = _evaluate_condition_masks(subset, rule_set)
+    indexed_masks = _evaluate_indexed_rules(subset, rule_set)
+    stats.add(rule_set.kind, rule_set.version, SHARED, len(subset), 0, 0, time.perf_counter() - started)
+
+    for position, rule in enumerate(rule_set.rules):
+        started = time.perf_counter()
+        rule_mask = _evaluate_rule(subset, rule, condition_masks, indexed_masks).to_numpy()
+        seconds = time.perf_counter() - started
+        final_mask = remaining & rule_mask
+        matched[final_mask] = position
+        remaining &= ~final_mask
+        stats.add(rule_set.kind, rule_set.version, rule.id, len(subset), final_mask.sum(),
+                  (rule_mask & ~final_mask).sum(), seconds)
+
+    positions[candidates] = matched
+    return positions
+
+
+# (db_path, 규칙 종류) -> (규칙 버전, OrderedDict{조건 컬럼 값 조합: 일치한 규칙 위치})
+_factorized_memo = {}
+# 규칙 종류마다 기억해 두는 값 조합 수 (넘치면 가장 오래 쓰지 않은 조합부터 버림)
+FACTORIZED_MEMO_LIMIT = 200_000
+
+
+def _factorize_key_columns(df, rule_set):
+    """
+    조건 컬럼별로 규칙 평가 결과가 같아지는 값끼리 묶은 키를 만듭니다.
+    숫자 비교 조건만 걸린 컬럼(금액 등)은 비교 값 사이 구간 번호로, 나머지는 문자열 값 그대로 사용합니다.
+    """
+    keys = {}
+    for column in rule_set.condition_columns:
+        thresholds = rule_set.numeric_thresholds.get(column)
+        if thresholds is None:
+            keys[column] = df[column].astype(str).to_numpy()
+            continue
+        keys[column] = _numeric_buckets(df[column], thresholds)
+    return keys
 
-            eval_func = CONDITION_EVALUATORS.get(match_type)
 
-            if eval_func:
-                current_mask = eval_func(df[column], value)
-            else:
-                current_mask = pd.Series(False, index=df.index)
+def _first_match_factorized(df, rule_set, candidates, db_path):
+    """
+    조건 컬럼 값 조합이 같은 행은 결과도 같으므로, 서로 다른 조합마다 대표 행 하나만 평가하고 결과를 펼칩니다.
+    조합별 결과는 같은 규칙 버전 동안 프로세스 안에 최대 FACTORIZED_MEMO_LIMIT개까지 기억해 두고(LRU)
+    다음 호출에서 재사용합니다.
+    """
+    positions = np.full(len(df), -1)
+    if not candidates.any():
+        return positions
+
+    subset = df[candidates]
+    keys = _factorize_key_columns(subset, rule_set)
+    codes = np.zeros(len(subset), dtype=np.int64)
+    for column in rule_set.condition_columns:
+        column_codes, uniques = pd.factorize(keys[column])
+        codes = codes * len(uniques) + column_codes
+    group_codes, _ = pd.factorize(codes)
+    _, representatives = np.unique(group_codes, return_index=True)
+    group_keys = list(zip(*(keys[column][representatives] for column in rule_set.condition_columns)))
+
+    memo_version, memo = _factorized_memo.get((db_path, rule_set.kind), (None, None))
+    if memo is None or memo_version != rule_set.version:
+        memo = OrderedDict()
+        _factorized_memo[(db_path, rule_set.kind)] = (rule_set.version, memo)
+
+    group_positions = np.full(len(group_keys), -1)
+    missing = []
+    for i, key in enumerate(group_keys):
+        position = memo.get(key)
+        if position is None:
+            missing.append(i)
+            continue
+        memo.move_to_end(key)
+        group_positions[i] = position
+    if missing:
+        sample = subset.iloc[representatives[missing]]
+        sample_positions = _first_match_rowwise(sample, rule_set, np.ones(len(sample), dtype=bool))
+        group_positions[missing] = sample_positions
+        for i, position in zip(missing, sample_positions):
+            memo[group_keys[i]] = position
+        while len(memo) > FACTORIZED_MEMO_LIMIT:
+            memo.popitem(last=False)
+
+    positions[candidates] = group_positions[group_codes]
+    return positions
+
+
+class _ExactCache:
+    """
+    행렬 모드에서 EXACT 조건을 컬럼별 strip + factorize 한 번과 코드 비교로 평가합니다.
+    (결과는 _evaluate_exact와 같음)
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._stripped = {}
 
-            rule_applies_mask &= current_mask
+    def exact(self, column, value):
+        if column not in self._stripped:
+            codes, uniques = pd.factorize(self.df[column].astype(str).str.strip())
+            self._stripped[column] = (codes, {text: code for code, text in enumerate(uniques)})
+        codes, lookup = self._stripped[column]
+        return codes == lookup.get(value, -2)
 
-        final_mask = unclassified_mask & rule_applies_mask
-        df.loc[final_mask, 'category_id'] = target_category_id
-        unclassified_mask &= ~final_mask
 
-    return df
+def _evaluate_condition_once(subset, cond, cache, condition_masks):
+    key = (cond.column, cond.match_type, cond.value)
+    if key in condition_masks:
+        return condition_masks[key].to_numpy()
+    if cond.match_type == 'EXACT':
+        return cache.exact(cond.column, cond.value)
+    eval_func = CONDITION_EVALUATORS.get(cond.match_type)
+    if eval_func is None:
+        return np.zeros(len(subset), dtype=bool)
+    return eval_func(subset[cond.column], cond.value).to_numpy(dtype=bool)
 
 
-def run_engine_and_update_db(db_path=config.DB_PATH):
+def _first_match_matrix(df, rule_set, candidates):
     """
-    DB의 모든 거래내역을 불러와 규칙 엔진을 실행하고, 결과를 다시 DB에 업데이트합니다.
+    서로 다른 조건을 한 번씩만 평가해 규칙×행 불리언 행렬(규칙별 AND)을 만들고,
+    우선순위 순으로 정렬된 행렬에서 행마다 argmax로 첫 번째 일치 규칙을 고릅니다.
     """
-    print("DB 전체 재분류를 시작합니다...")
-    conn = sqlite3.connect(db_path)
+    positions = np.full(len(df), -1)
+    if not candidates.any() or not rule_set.rules:
+        return positions
+
+    subset = df[candidates]
+    cache = _ExactCache(subset)
+    condition_masks = _evaluate_condition_masks(subset, rule_set)
+    condition_results = {}
+    matrix = np.empty((len(rule_set.rules), len(subset)), dtype=bool)
+
+    for position, rule in enumerate(rule_set.rules):
+        row = np.full(len(subset), rule.valid)
+        for cond in rule.conditions:
+            key = (cond.column, cond.match_type, cond.value)
+            if key not in condition_results:
+                condition_results[key] = _evaluate_condition_once(subset, cond, cache, condition_masks)
+            row &= condition_results[key]
+        matrix[position] = row
+
+    first = matrix.argmax(axis=0)
+    positions[candidates] = np.where(matrix.any(axis=0), first, -1)
+    return positions
+
+
+ROWWISE = 'rowwise'
+FACTORIZED = 'factorized'
+MATRIX = 'matrix'
+# DB 전체 재분류(run_engine_and_update_db) 전용: 규칙을 SQL UPDATE 하나로 컴파일해 DB 안에서 실행
+SQL = 'sql'
+
+ENGINE_MODES = {
+    ROWWISE: lambda df, rule_set, candidates, db_path: _first_match_rowwise(df, rule_set, candidates),
+    FACTORIZED: _first_match_factorized,
+    MATRIX: lambda df, rule_set, candidates, db_path: _first_match_matrix(df, rule_set, candidates),
+}
+# 업로드/재분류에서 쓰는 기본 모드: 결과는 ROWWISE와 같고(test_rule_engine_equivalence) 호출 간 상태가 없음
+DEFAULT_ENGINE_MODE = MATRIX
+
+
+# -------------------------------------------------------------------
+# 4. 간소화된 메인 규칙 엔진 함수
+# -------------------------------------------------------------------
+def _first_match(df, rule_set, candidates, db_path, mode, stats):
+    if stats is not None:
+        return _first_match_with_stats(df, rule_set, candidates, stats)
+    return ENGINE_MODES[mode](df, rule_set, candidates, db_path)
 
-    # 업데이트할 대상은 '미분류'이거나, 사용자가 수동으로 바꾸지 않은 거래들
-    # 여기서는 모든 거래를 대상으로 하겠습니다.
-    df = pd.read_sql_query("SELECT * FROM \"transaction\"", conn)
 
+def run_rule_engine(df, default_category_id, db_path=config.DB_PATH, mode=DEFAULT_ENGINE_MODE, stats=None,
+                    conn=None):
+    """
+    미분류(default_category_id) 행에 우선순위가 가장 높은 일치 규칙의 카테고리를 지정합니다.
+    mode: ROWWISE(규칙마다 전체 행 평가), FACTORIZED(서로 다른 값 조합마다 한 번 평가, 결과 캐시),
+          MATRIX(조건×행 결과를 규칙×행 행렬로 묶어 argmax로 첫 일치 규칙 선택)
+    stats(RuleStats)가 주어지면 mode와 관계없이 규칙별 통계를 기록하며 평가합니다.
+    conn을 넘기면 규칙을 그 연결에서 읽습니다.
+    """
     if df.empty:
-        print("재분류할 데이터가 없습니다.")
-        conn.close()
-        return 0
+        return df
+
+    # 규칙은 프로세스 안에 캐시되며, 규칙 테이블이 바뀌면 다시 읽음
+    rule_set = get_rule_set(RULE, db_path, conn)
+
+    if 'category_id' not in df.columns:
+        df['category_id'] = default_category_id
+    df['category_id'].fillna(default_category_id, inplace=True)
+
+    unclassified_mask = (df['category_id'] == default_category_id).to_numpy()
+    positions = _first_match(df, rule_set, unclassified_mask, db_path, mode, stats)
 
-    # 규칙 엔진 실행 (기존 함수 재사용)
-    categorized_df = run_rule_engine(df, default_category_id=4, db_path=db_path)
+    matched = positions >= 0
+    if matched.any():
+        df.loc[matched, 'category_id'] = np.take(_rule_targets(rule_set), positions[matched])
 
-    # 업데이트할 내용만 추림 (id, category_id)
-    update_data = categorized_df[['id', 'category_id']]
+    # 분류 근거 기록: 이번에 평가한 행에 일치한 규칙 ID(없으면 NULL)와 규칙 버전을 남김
+    for column in ('rule_id', 'rule_version'):
+        df[column] = df[column].astype('Int64') if column in df.columns else pd.Series(pd.NA, index=df.index,
+                                                                                       dtype='Int64')
+    # 위치 -1(일치 없음)은 맨 끝의 NA를 가리킴
+    rule_ids = pd.array([rule.id for rule in rule_set.rules] + [pd.NA], dtype='Int64')
+    df.loc[unclassified_mask, 'rule_id'] = rule_ids.take(positions[unclassified_mask])
+    df.loc[unclassified_mask, 'rule_version'] = rule_set.version
+
+    return df
 
-    print(update_data)
 
-    # DB 업데이트
-    cursor = conn.cursor()
+def _run_engine_in_db(conn, default_category_id, db_path):
+    """
+    규칙 집합을 CASE 식 하나로 컴파일해 UPDATE 한 번으로 미분류 거래를 분류합니다. (거래를 파이썬으로 읽지 않음)
+    결과는 run_rule_engine과 같고, 평가한 행에는 일치한 규칙 ID(없으면 NULL)와 규칙 버전을 남깁니다.
+    """
+    rule_set = get_rule_set(RULE, db_path, conn)
+    register_rule_functions(conn)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(\"transaction\")")}
+    match_sql, params = compile_rule_match_query(rule_set, columns, 't.category_id = ?', [default_category_id])
+
+    cursor = conn.execute(f"""
+        UPDATE "transaction"
+        SET rule_id = m.rule_id,
+            category_id = COALESCE(r.category_id, "transaction".category_id),
+            rule_version = ?
+        FROM ({match_sql}) AS m
+                 LEFT JOIN "rule" r ON r.id = m.rule_id
+        WHERE "transaction".id = m.id
+    """, [rule_set.version, *params])
+    return cursor.rowcount
+
+
+def run_engine_and_update_db(db_path=config.DB_PATH, mode=SQL, conn=None):
+    """
+    DB의 모든 거래내역을 불러와 규칙 엔진을 실행하고, 결과를 다시 DB에 업데이트합니다.
+    mode가 SQL(기본값)이면 거래를 불러오지 않고 DB 안에서 UPDATE 한 번으로 처리하고,
+    다른 모드면 거래를 모두 불러와 run_rule_engine을 그 모드로 실행합니다.
+    conn을 넘기면 그 연결의 트랜잭션 안에서 실행하고 커밋하지 않습니다.
+    """
+    print("DB 전체 재분류를 시작합니다...")
     try:
-        # executemany를 사용하여 여러 업데이트를 효율적으로 실행
-        cursor.executemany("""
-                           UPDATE "transaction"
-                           SET category_id = ?
-                           WHERE id = ?
-                           """, [(row['category_id'], row['id']) for _, row in update_data.iterrows()])
-
-        conn.commit()
+        with write_connection(db_path, conn) as conn:
+            if mode == SQL:
+                updated_rows = _run_engine_in_db(conn, default_category_id=4, db_path=db_path)
+                print(f"총 {updated_rows}건의 거래에 규칙을 적용했습니다.")
+                return updated_rows
+
+            # 업데이트할 대상은 '미분류'이거나, 사용자가 수동으로 바꾸지 않은 거래들
+            # 여기서는 모든 거래를 대상으로 하겠습니다.
+            df = pd.read_sql_query("SELECT * FROM \"transaction\"", conn)
+
+            if df.empty:
+                print("재분류할 데이터가 없습니다.")
+                return 0
+
+            # 규칙 엔진 실행 (기존 함수 재사용)
+            categorized_df = run_rule_engine(df, default_category_id=4, db_path=db_path, mode=mode, conn=conn)
+
+            # 업데이트할 내용만 추림 (category_id와 분류 근거, id)
+            update_data = categorized_df[['category_id', 'rule_id', 'rule_version', 'id']].astype(object)
+            update_data = update_data.where(update_data.notna(), None)
+
+            print(update_data)
+
+            # DB 업데이트
+            cursor = conn.cursor()
+            # executemany를 사용하여 여러 업데이트를 효율적으로 실행
+            cursor.executemany("""
+                               UPDATE "transaction"
+                               SET category_id = ?, rule_id = ?, rule_version = ?
+                               WHERE id = ?
+                               """, list(update_data.itertuples(index=False, name=None)))
+
         updated_rows = cursor.rowcount
         print(f"총 {updated_rows}건의 카테고리가 업데이트되었습니다.")
         return updated_rows
     except Exception as e:
         print(f"DB 업데이트 중 오류 발생: {e}")
-        conn.rollback()
         return 0
-    finally:
-        conn.close()
 
 
-def identify_transfers(df, db_path=config.DB_PATH):
-
-    conn = sqlite3.connect(db_path)
-    rules = pd.read_sql_query("SELECT * FROM transfer_rule ORDER BY priority", conn)
+def identify_transfers(df, db_path=config.DB_PATH, mode=DEFAULT_ENGINE_MODE, stats=None, conn=None):
+    """
+    이체 규칙에 일치하는 행의 연결 계좌 ID를 Series로 반환합니다. (일치하지 않으면 0)
+    stats(RuleStats)가 주어지면 규칙별 통계를 기록하며 평가합니다.
+    conn을 넘기면 규칙을 그 연결에서 읽습니다.
+    """
+    rule_set = get_rule_set(TRANSFER_RULE, db_path, conn)
 
     final_linked_ids = pd.Series(0, index=df.index)
+    if df.empty:
+        return final_linked_ids
 
-    unidentified_mask = pd.Series(True, index=df.index)
-
-    for _, rule in rules.iterrows():
-        if not unidentified_mask.any():
-            break
+    # 우선순위가 가장 높은 일치 규칙의 연결 계좌 ID를 할당
+    positions = _first_match(df, rule_set, np.ones(len(df), dtype=bool), db_path, mode, stats)
+    matched = positions >= 0
+    if matched.any():
+        final_linked_ids.loc[matched] = np.take(_rule_targets(rule_set), positions[matched])
 
-        linked_account_id = rule['linked_account_id']
-        conditions = pd.read_sql_query(f"SELECT * FROM transfer_rule_condition WHERE rule_id = {rule['id']}", conn)
-
-        rule_applies_mask = pd.Series(True, index=df.index)
-        for _, cond in conditions.iterrows():
-            column, match_type, value = cond['column_to_check'], cond['match_type'], cond['value']
-
-            eval_func = CONDITION_EVALUATORS.get(match_type)
-            if eval_func:
-                current_mask = eval_func(df[column], value)
-                rule_applies_mask &= current_mask
-            else:
-                rule_applies_mask = pd.Series(False, index=df.index)
-                break
-
-        # "아직 판별되지 않았으면서" "이번 규칙 조건을 모두 만족하는" 행만 선택
-        mask_to_apply = rule_applies_mask & unidentified_mask
-        # 해당하는 행이 있다면, 최종 결과에 연결 계좌 ID를 할당
-        if mask_to_apply.any():
-            final_linked_ids.loc[mask_to_apply] = linked_account_id
-            # 방금 판별된 행들을 다음 규칙의 대상에서 제외
-            unidentified_mask &= ~mask_to_apply
-
-    conn.close()
-    return final_linked_ids
\ No newline at end of file
+    return final_linked_ids
@@ -0,0 +1,212 @@
+"""
+업로드(ingest) 벤치마크
+
+가상 거래내역 파일(statement_generator)을 행 수별로 만들어 insert_card_transactions_from_excel /
+insert_bank_transactions_from_excel 의 처리 시간을 빈 DB와 기존 거래가 쌓인 DB에서 각각 측정하고,
+저장된 기준값(baseline.json)과 비교해 느려진 항목을 보고합니다.
+
+기준값은 측정한 컴퓨터에서만 의미가 있으므로 저장소에 넣지 않고 데이터 폴더(--data-dir)에 저장합니다.
+기준값이 없으면 첫 측정 결과를 기준값으로 저장하고, 다른 컴퓨터에서 만든 기준값이면 비교만 표시하고
+회귀로 판단하지 않습니다.
+
+application 폴더에서 실행합니다.
+    python -m benchmarks.ingest_benchmark                      # 1k/10k/100k 전체 측정 후 기준값과 비교
+    python -m benchmarks.ingest_benchmark --rows 1000 10000    # 일부 크기만 측정
+    python -m benchmarks.ingest_benchmark --update-baseline    # 측정 결과를 새 기준값으로 저장
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import config
+from benchmarks.statement_generator import GENERATORS
+from core import seeder
+from core.data_processor import insert_card_transactions_from_excel, insert_bank_transactions_from_excel
+from core.db_connection import close_all_connections
+from core.db_manager import run_migrations
+from core.ingest_metrics import IngestReport
+
+ROW_COUNTS = [1_000, 10_000, 100_000]
+# 기존 거래가 쌓인 DB: 명세서 종류마다 이 행 수만큼 측정 대상보다 이전 기간의 거래를 미리 넣어 둠
+PREPOPULATED_ROWS = 20_000
+# 기준값보다 이 비율 이상 느려지면 회귀로 판단
+DEFAULT_TOLERANCE = 0.25
+
+BASELINE_FILE_NAME = 'baseline.json'
+MIGRATIONS_PATH = os.path.join(config.APP_DIR, 'migrations')
+
+INGEST_FUNCTIONS = {
+    'shinhan_card': insert_card_transactions_from_excel,
+    'kookmin_card': insert_card_transactions_from_excel,
+    'shinhan_bank': insert_bank_transactions_from_excel,
+}
+
+# 측정 대상 파일은 기존 거래(2020년~) 이후 기간으로 생성
+MEASURED_START = datetime(2024, 1, 1)
+HISTORY_SEED = 90
+
+
+def _statement_path(data_dir, kind, rows, seed):
+    # 카드사 판별이 파일명 기준이므로 kind를 파일명 앞에 둠
+    return os.path.join(data_dir, f"{kind}_{rows}_s{seed}.xlsx")
+
+
+def ensure_statement(data_dir, kind, rows, seed=0, start=MEASURED_START):
+    """같은 조건의 파일이 이미 있으면 재사용하고, 없으면 생성합니다."""
+    path = _statement_path(data_dir, kind, rows, seed)
+    if not os.path.exists(path):
+        GENERATORS[kind](path, rows, seed=seed, start=start)
+    return path
+
+
+def create_database(db_path):
+    """마이그레이션과 초기 데이터만 들어 있는 DB를 만듭니다."""
+    close_all_connections()
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    run_migrations(db_path, migrations_path=MIGRATIONS_PATH)
+    seeder.seed_initial_accounts(db_path)
+    seeder.seed_initial_parties(db_path)
+    seeder.seed_initial_categories(db_path)
+    seeder.seed_initial_rules(db_path)
+    seeder.seed_initial_transfer_rules(db_path)
+    # 풀의 연결을 닫아 WAL 내용을 DB 파일에 반영해 둠 (템플릿으로 복사하므로)
+    close_all_connections()
+    return db_path
+
+
+def create_populated_database(db_path, data_dir):
+    """명세서 종류마다 PREPOPULATED_ROWS건의 과거 거래를 넣은 DB를 만듭니다."""
+    create_database(db_path)
+    for kind in GENERATORS:
+        history = ensure_statement(data_dir, kind, PREPOPULATED_ROWS, seed=HISTORY_SEED, start=datetime(2020, 1, 1))
+        INGEST_FUNCTIONS[kind](history, db_path=db_path)
+    close_all_connections()
+    return db_path
+
+
+def measure(kind, statement_path, template_db, work_dir):
+    """템플릿 DB를 복사한 뒤 파일 하나를 업로드하고 소요 시간과 단계별 결과를 반환합니다."""
+    db_path = os.path.join(work_dir, 'measure.db')
+    shutil.copy(template_db, db_path)
+
+    report = IngestReport()
+    started = time.perf_counter()
+    inserted, skipped = INGEST_FUNCTIONS[kind](statement_path, db_path=db_path, report=report)
+    seconds = time.perf_counter() - started
+    close_all_connections()
+    os.remove(db_path)
+
+    return {
+        'seconds': round(seconds, 4),
+        'inserted': inserted,
+        'skipped': skipped,
+        'rows_per_sec': round((inserted + skipped) / seconds) if seconds > 0 else None,
+        'stages': {stage: round(timing.seconds, 4) for stage, timing in report.timings()},
+    }
+
+
+def run_benchmarks(row_counts, data_dir, work_dir, repeat=1):
+    """(명세서 종류, 행 수, DB 상태)별 측정 결과를 {'kind/rows/state': 결과} 형태로 반환합니다. 반복 시 최솟값 사용"""
+    templates = {
+        'empty': create_database(os.path.join(work_dir, 'template_empty.db')),
+        'populated': create_populated_database(os.path.join(work_dir, 'template_populated.db'), data_dir),
+    }
+
+    results = {}
+    for rows in row_counts:
+        for kind in GENERATORS:
+            statement = ensure_statement(data_dir, kind, rows)
+            for state, template_db in templates.items():
+                runs = [measure(kind, statement, template_db, work_dir) for _ in range(repeat)]
+                results[f"{kind}/{rows}/{state}"] = min(runs, key=lambda r: r['seconds'])
+    return results
+
+
+def machine_info():
+    """기준값을 측정한 컴퓨터를 구분하는 정보 (같은 컴퓨터의 기준값끼리만 회귀를 판단)"""
+    return {
+        'node': platform.node(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+    }
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """기준값 대비 변화율을 계산해 (키, 기준 시간, 측정 시간, 변화율, 회귀 여부) 목록을 반환합니다."""
+    rows = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            rows.append((key, None, result['seconds'], None, False))
+            continue
+        change = result['seconds'] / base['seconds'] - 1 if base['seconds'] > 0 else 0.0
+        rows.append((key, base['seconds'], result['seconds'], change, change > tolerance))
+    return rows
+
+
+def print_report(comparison):
+    print(f"{'항목':<32}{'기준(초)':>10}{'측정(초)':>10}{'변화':>9}")
+    for key, base_seconds, seconds, change, regressed in comparison:
+        base_text = f"{base_seconds:.3f}" if base_seconds is not None else '-'
+        change_text = f"{change:+.0%}" if change is not None else '신규'
+        mark = '  << 회귀' if regressed else ''
+        print(f"{key:<32}{base_text:>10}{seconds:>10.3f}{change_text:>9}{mark}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="업로드 처리 시간 벤치마크")
+    parser.add_argument('--rows', type=int, nargs='+', default=ROW_COUNTS, help="측정할 파일 행 수")
+    parser.add_argument('--repeat', type=int, default=1, help="항목별 반복 횟수 (가장 빠른 결과 사용)")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="회귀로 판단할 지연 비율")
+    parser.add_argument('--baseline', default=None, help="기준값 JSON 경로 (기본값: 데이터 폴더의 baseline.json)")
+    parser.add_argument('--update-baseline', action='store_true', help="측정 결과를 기준값으로 저장")
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'asset_manager_bench'),
+                        help="생성한 엑셀 파일을 보관할 폴더 (재실행 시 재사용)")
+    args = parser.parse_args(argv)
+    baseline_path = args.baseline or os.path.join(args.data_dir, BASELINE_FILE_NAME)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = run_benchmarks(args.rows, args.data_dir, work_dir, args.repeat)
+
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    same_machine = baseline.get('machine') == machine_info()
+
+    comparison = compare_with_baseline(results, baseline.get('results', {}), args.tolerance)
+    print_report(comparison)
+
+    if args.update_baseline or not baseline:
+        # 다른 컴퓨터의 기준값에는 이 컴퓨터의 측정 결과를 섞지 않음
+        baseline_results = baseline.get('results', {}) if same_machine else {}
+        baseline_results.update(results)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'machine': machine_info(),
+                       'results': baseline_results}, f, ensure_ascii=False, indent=2)
+        print(f"기준값을 저장했습니다: {baseline_path}")
+        return 0
+
+    if not same_machine:
+        print("다른 컴퓨터에서 측정한 기준값이므로 회귀로 판단하지 않습니다. (--update-baseline으로 다시 저장)")
+        return 0
+
+    regressions = [row for row in comparison if row[4]]
+    if regressions:
+        print(f"{len(regressions)}개 항목이 기준값보다 {args.tolerance:.0%} 이상 느려졌습니다.")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+벤치마크용 가상 거래내역 엑셀 생성기
+
+각 파서(_parse_shinhan, _parse_kookmin, _parse_shinhan_bank)가 기대하는 시트 구성으로 파일을 만들고,
+가맹점명/금액은 static/initial_rules.json과 initial_transfer_rules.json의 조건에서 뽑아
+규칙 엔진과 이체 판별이 실제와 비슷한 비율로 매칭되도록 합니다. 같은 seed면 항상 같은 파일이 만들어집니다.
+"""
+import json
+import random
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+
+import config
+
+# 규칙에 걸리지 않는 가맹점 (미분류로 남는 거래)
+UNMATCHED_MERCHANTS = ['스타벅스 하남미사점', '배달의민족', '올리브영 스타필드', '다이소', '교보문고', '네이버페이',
+                       '카카오T', '무신사', '메가커피', '롯데시네마']
+UNMATCHED_BANK_SUMMARIES = ['모바일', '타행', '체크', 'CMS', '인터넷']
+DEFAULT_AMOUNTS = [1250, 4500, 7890, 12000, 17980, 23500, 36500, 55000, 104430]
+
+# 생성 행 중 규칙에 걸리도록 만드는 비율
+RULE_MATCH_RATIO = 0.7
+# 은행 거래 중 이체 규칙에 걸리도록 만드는 비율
+TRANSFER_RATIO = 0.15
+
+
+def _load_rule_samples(rules_path=config.RULES_PATH):
+    """규칙마다 조건을 만족하는 (가맹점명, 금액) 한 쌍을 만듭니다. 금액 조건이 없으면 금액은 None입니다."""
+    with open(rules_path, 'r', encoding='utf-8') as f:
+        rules = json.load(f)
+
+    samples = []
+    for rule in rules:
+        content, amount = None, None
+        for cond in rule['conditions']:
+            if cond['column'] == 'content':
+                # CONTAINS는 앞뒤에 지점명 등을 붙여 실제 가맹점명처럼 만듦
+                content = cond['value'] if cond['match_type'] == 'EXACT' else f"{cond['value']} 하남점"
+            elif cond['column'] == 'transaction_amount' and cond['match_type'] == 'EQUALS':
+                amount = int(cond['value'])
+        if content is not None:
+            samples.append((content, amount))
+    return samples
+
+
+def _load_transfer_samples(rules_path=config.TRANSFER_RULES_PATH):
+    """이체 규칙마다 (적요, 내용) 한 쌍을 만듭니다."""
+    with open(rules_path, 'r', encoding='utf-8') as f:
+        rules = json.load(f)
+    return [(next(c['value'] for c in rule['conditions'] if c['column'] == '적요'),
+             next(c['value'] for c in rule['conditions'] if c['column'] == '내용')) for rule in rules]
+
+
+def _merchant_rows(rows, seed):
+    """(가맹점명, 금액)을 rows개 만듭니다."""
+    rng = random.Random(seed)
+    samples = _load_rule_samples()
+    for _ in range(rows):
+        content, amount = rng.choice(samples) if rng.random() < RULE_MATCH_RATIO else (
+            rng.choice(UNMATCHED_MERCHANTS), None)
+        yield content, amount if amount is not None else rng.choice(DEFAULT_AMOUNTS)
+
+
+def _timestamps(rows, start, seed):
+    """start부터 시간 순서대로 증가하는 거래 시각을 rows개 만듭니다. (분 단위 간격은 무작위)"""
+    rng = random.Random(seed + 1)
+    current = start
+    for _ in range(rows):
+        current += timedelta(minutes=rng.randint(1, 90), seconds=rng.randint(0, 59))
+        yield current
+
+
+def _save(workbook, path):
+    workbook.save(path)
+    return path
+
+
+def generate_shinhan_card(path, rows, seed=0, start=datetime(2020, 1, 1)):
+    """신한카드 이용내역: 첫 행이 헤더, 거래일은 'YYYY.MM.DD HH:MM', 금액은 천 단위 쉼표 문자열"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(['카드구분', '거래일', '가맹점명', '금액', '이용카드', '승인번호', '이용구분'])
+    for i, ((content, amount), ts) in enumerate(zip(_merchant_rows(rows, seed), _timestamps(rows, start, seed))):
+        sheet.append(['신용', ts.strftime('%Y.%m.%d %H:%M'), content, f"{amount:,}", '본인123', f"{seed:02d}{i:08d}",
+                      '일시불'])
+    return _save(workbook, path)
+
+
+def generate_kookmin_card(path, rows, seed=0, start=datetime(2020, 1, 1)):
+    """국민카드 이용내역: 안내 문구 6행 뒤 헤더, 0/3/4/5/13번째 컬럼이 거래일/카드명/가맹점명/금액/승인번호"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for title in ['KB국민카드 이용내역', '회원명: 본인', '조회기간: 전체', '카드: 전체', '이용구분: 전체', '단위: 원']:
+        sheet.append([title])
+    sheet.append(['이용일', '이용시간', '이용고객명', '이용카드명', '이용하신 가맹점', '이용금액', '이용구분', '할부개월',
+                  '포인트', '적립률', '결제방법', '상태', '결제예정일', '승인번호'])
+    for i, ((content, amount), ts) in enumerate(zip(_merchant_rows(rows, seed), _timestamps(rows, start, seed))):
+        sheet.append([ts.strftime('%Y-%m-%d'), ts.strftime('%H:%M'), '본인', 'KB국민카드', content, amount, '일시불',
+                      '', 0, '', '신용', '정상', '', f"K{seed:02d}{i:08d}"])
+    return _save(workbook, path)
+
+
+def generate_shinhan_bank(path, rows, seed=0, start=datetime(2020, 1, 1)):
+    """신한은행 입출금내역: 안내 문구 6행 뒤 헤더, 금액 컬럼명에 '(원)'이 붙고 잔액이 이어짐"""
+    rng = random.Random(seed)
+    transfers = _load_transfer_samples()
+    merchants = _merchant_rows(rows, seed)
+    balance = 10_000_000
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for title in ['신한은행 거래내역조회', '예금주: 본인', '계좌번호: 110-000-000000', '조회기간: 전체', '조회구분: 전체',
+                  '단위: 원']:
+        sheet.append([title])
+    sheet.append(['거래일자', '거래시간', '적요', '출금(원)', '입금(원)', '내용', '잔액(원)', '거래점'])
+    for (content, amount), ts in zip(merchants, _timestamps(rows, start, seed)):
+        income = False
+        if rng.random() < TRANSFER_RATIO:
+            summary, content = rng.choice(transfers)
+        else:
+            summary = rng.choice(UNMATCHED_BANK_SUMMARIES)
+            # 급여 등 수입 규칙에 해당하는 내용은 입금으로
+            income = content in ('급여현대오토에버', '오토에버경비')
+        balance += amount if income else -amount
+        sheet.append([ts.strftime('%Y-%m-%d'), ts.strftime('%H:%M:%S'), summary, 0 if income else amount,
+                      amount if income else 0, content, balance, '디지털금융'])
+    return _save(workbook, path)
+
+
+GENERATORS = {
+    'shinhan_card': generate_shinhan_card,
+    'kookmin_card': generate_kookmin_card,
+    'shinhan_bank': generate_shinhan_bank,
+}
@@ -13,4 +13,7 @@ DB_PATH = os.path.join(STATIC_DIR, 'asset_data.db')
 RULES_PATH = os.path.join(STATIC_DIR, 'initial_rules.json')
 TRANSFER_RULES_PATH = os.path.join(STATIC_DIR, 'initial_transfer_rules.json')
 
-SCHEMA_PATH = os.path.join(BASE_DIR, 'migrations')
\ No newline at end of file
+SCHEMA_PATH = os.path.join(BASE_DIR, 'migrations')
+
+# 워커 프로세스 시작 방식: 배포 환경(Windows)은 spawn만 지원하므로 다른 OS에서도 같은 방식으로 실행
+MP_START_METHOD = 'spawn'
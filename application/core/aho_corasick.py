@@ -0,0 +1,57 @@
+from collections import deque
+
+
+class AhoCorasick:
+    """
+    여러 부분 문자열 패턴을 한 번에 찾는 Aho-Corasick 오토마톤입니다.
+    search()는 문자열을 한 번 훑어 포함된 패턴의 번호(patterns 리스트의 위치)를 모두 반환합니다.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [set()]
+        # 빈 문자열은 모든 문자열에 포함됨
+        self._always = {i for i, pattern in enumerate(self.patterns) if pattern == ''}
+
+        for index, pattern in enumerate(self.patterns):
+            if pattern == '':
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(set())
+                state = next_state
+            self._output[state].add(index)
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def search(self, text):
+        found = set(self._always)
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
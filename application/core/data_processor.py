@@ -1,58 +1,98 @@
-import hashlib
+import json
 import os
-import sqlite3
+import time
 
 import numpy as np
 import pandas as pd
-import sys
-import os
 
 import config
 from analysis import run_rule_engine, identify_transfers
-from core.db_manager import update_balance_and_log
+from core.db_connection import get_connection, read_connection
+from core.db_manager import update_balance_and_log, post_balance_changes
 from core.db_queries import get_account_id_by_name
+from core.fingerprint import bank_fingerprints
+from core.excel_reader import read_excel_chunks, CHUNK_SIZE
+from core.ingest_metrics import IngestReport, PARSE, NORMALIZE, DEDUP, IDENTIFY_TRANSFERS, RULE_ENGINE, WRITE
+from core.ingest_manifest import IngestFileStats, file_content_hash, find_manifest_entry, record_manifest
 
 
-def _parse_shinhan(filepath):
-    df = pd.read_excel(filepath)
-    columns_map = {'카드구분': 'card_type', '거래일': 'transaction_date', '가맹점명': 'content', '금액': 'transaction_amount', '이용카드': 'card_name', '승인번호': 'card_approval_number'}
-    df.rename(columns=columns_map, inplace=True)
-    df['transaction_provider'] = 'SHINHAN_CARD'
-    df['cotent2'] = ''
-    return df
+# 청크마다 타입을 추론하지 않고 원래 값 그대로 두는 컬럼 (승인번호는 중복 판별 키, 나머지는 문자열로 저장)
+CARD_TEXT_COLUMNS = ['card_approval_number', 'content', 'card_name', 'card_type']
 
-def _parse_kookmin(filepath):
+
+def _parse_shinhan(filepath, chunk_size=CHUNK_SIZE):
+    columns_map = {'카드구분': 'card_type', '거래일': 'transaction_date', '가맹점명': 'content', '금액': 'transaction_amount', '이용카드': 'card_name', '승인번호': 'card_approval_number'}
+    text_dtype = {name: object for name, column in columns_map.items() if column in CARD_TEXT_COLUMNS}
+    chunks = read_excel_chunks(filepath, usecols=lambda name: name.strip() in columns_map, chunk_size=chunk_size,
+                               dtype=text_dtype)
+    for df in chunks:
+        df.rename(columns=columns_map, inplace=True)
+        df['transaction_provider'] = 'SHINHAN_CARD'
+        df['content2'] = ''
+        yield df
+
+def _parse_kookmin(filepath, chunk_size=CHUNK_SIZE):
     use_cols = [0, 3, 4, 5, 13]
     standard_names = ['transaction_date', 'card_name', 'content', 'transaction_amount', 'card_approval_number']
-    df = pd.read_excel(filepath, skiprows=6, usecols=use_cols, names=standard_names)
-    df['card_type'] = '신용'
-    df['transaction_provider'] = 'KUKMIN_CARD'
-    df['cotent2'] = ''
-    return df
+    chunks = read_excel_chunks(filepath, skiprows=6, usecols=use_cols, names=standard_names, chunk_size=chunk_size,
+                               dtype={name: object for name in standard_names if name in CARD_TEXT_COLUMNS})
+    for df in chunks:
+        df['card_type'] = '신용'
+        df['transaction_provider'] = 'KUKMIN_CARD'
+        df['content2'] = ''
+        yield df
 
 CARD_PARSERS = {
     'shinhan': _parse_shinhan,
     'kookmin': _parse_kookmin
 }
 
-def insert_card_transactions_from_excel(filepath, db_path=config.DB_PATH):
+CARD_PROVIDERS = {
+    'shinhan': 'SHINHAN_CARD',
+    'kookmin': 'KUKMIN_CARD'
+}
 
-    filename = os.path.basename(filepath.name if hasattr(filepath, 'name') else filepath)
-    card_company = next((key for key in CARD_PARSERS if key in filename.lower()), 'kookmin')
+BANK_PROVIDER = 'SHINHAN_BANK'
 
-    if not card_company:
-        print(f"지원하지 않는 카드사 파일입니다: {filename}")
-        return 0
 
-    try:
-        parser_func = CARD_PARSERS[card_company]
-        df = parser_func(filepath)
-    except Exception as e:
-        print(f"파일 파싱 중 오류 발생: {filename}, {e}")
-        return 0
+def _file_name(filepath):
+    return os.path.basename(filepath.name if hasattr(filepath, 'name') else filepath)
+
+
+def detect_card_company(filename):
+    return next((key for key in CARD_PARSERS if key in filename.lower()), 'kookmin')
+
 
-    df.dropna(subset=['transaction_date', 'content', 'transaction_amount'], inplace=True)
-    if df.empty: return 0
+def find_existing_card_approvals(conn, provider, approval_numbers):
+    """
+    주어진 카드사의 승인번호 중 이미 card_transaction에 저장된 것만 set으로 반환합니다.
+    (카드사, 승인번호) UNIQUE 인덱스로 조회하므로 비용은 테이블 크기가 아니라 파일 크기에 비례합니다.
+    """
+    approval_numbers = list(dict.fromkeys(approval_numbers))
+    if not approval_numbers:
+        return set()
+    rows = conn.execute("SELECT card_approval_number FROM card_transaction "
+                        "WHERE transaction_provider = ? AND card_approval_number IN (SELECT value FROM json_each(?))",
+                        (provider, json.dumps(approval_numbers, ensure_ascii=False)))
+    return {row[0] for row in rows}
+
+
+def mark_last(items):
+    """(항목, 마지막 항목 여부)를 차례로 반환합니다. 마지막 청크를 처리 이력과 같은 트랜잭션으로 커밋할 때 사용"""
+    iterator = iter(items)
+    try:
+        current = next(iterator)
+    except StopIteration:
+        return
+    for item in iterator:
+        yield current, False
+        current = item
+    yield current, True
+
+
+def _normalize_card_frame(df):
+    df = df.dropna(subset=['transaction_date', 'content', 'transaction_amount']).copy()
+    if df.empty: return df
     df['transaction_date'] = pd.to_datetime(df['transaction_date']).dt.strftime('%Y-%m-%d %H:%M:%S')
     df['transaction_amount'] = pd.to_numeric(df['transaction_amount'].astype(str).str.replace(',', ''), errors='coerce')
     df.dropna(subset=['transaction_amount'], inplace=True)
@@ -64,187 +104,579 @@ def insert_card_transactions_from_excel(filepath, db_path=config.DB_PATH):
     # 트랜잭션 타입 등 고정값 컬럼 추가
     df['type'] = 'EXPENSE'
     df['transaction_type'] = 'CARD'
+    return df
 
-    conn_temp = sqlite3.connect(db_path)
+
+def iter_categorized_card_chunks(filepath, db_path=config.DB_PATH, chunk_size=CHUNK_SIZE, stats=None, report=None):
+    """
+    카드사 엑셀 파일을 chunk_size 행 단위로 읽어 정규화, 규칙 엔진 적용, account_id 지정까지 마친
+    (DataFrame, 이미 저장된 승인번호라 제외한 건수)를 차례로 반환합니다. (DB 쓰기는 하지 않음)
+    stats(IngestFileStats)가 주어지면 유효 행 수/파싱 오류를 누적합니다.
+    report(IngestReport)가 주어지면 단계별 소요 시간을 누적합니다.
+    """
+    report = report if report is not None else IngestReport()
+    filename = _file_name(filepath)
+    card_company = detect_card_company(filename)
+
+    if not card_company:
+        print(f"지원하지 않는 카드사 파일입니다: {filename}")
+        return
+    provider = CARD_PROVIDERS[card_company]
+
+    conn_temp = get_connection(db_path, read_only=True)
     try:
         cursor = conn_temp.cursor()
         cursor.execute("SELECT id FROM category WHERE category_code = 'UNCATEGORIZED' AND category_type = 'EXPENSE'")
         result = cursor.fetchone()
         # 미분류 카테고리가 있으면 해당 ID를, 없으면 1(지출)을 기본값으로 사용
         default_cat_id = result[0] if result else 1
+
+        # 카드사 이름에 맞는 계좌 ID를 DB에서 조회
+        shinhan_card_account_id = get_account_id_by_name('신한카드', db_path, conn=conn_temp)
+        kukmin_card_account_id = get_account_id_by_name('국민카드', db_path, conn=conn_temp)
     finally:
         conn_temp.close()
 
-    df = run_rule_engine(df, default_category_id=default_cat_id, db_path=db_path)
+    chunks = CARD_PARSERS[card_company](filepath, chunk_size)
+    while True:
+        started = time.perf_counter()
+        try:
+            df = next(chunks)
+        except StopIteration:
+            return
+        except Exception as e:
+            print(f"파일 파싱 중 오류 발생: {filename}, {e}")
+            if stats is not None:
+                stats.error = str(e)
+            return
+
+        report.add(PARSE, started, len(df), len(df))
+
+        started, rows_in = time.perf_counter(), len(df)
+        df = _normalize_card_frame(df)
+        report.add(NORMALIZE, started, rows_in, len(df))
+        if df.empty: continue
+        if stats is not None:
+            stats.observe(df['transaction_date'])
+
+        # 이미 저장된 (카드사, 승인번호)는 규칙 엔진을 돌리지 않고 제외 (나머지 중복은 저장할 때 다시 거름)
+        started, rows_in = time.perf_counter(), len(df)
+        with read_connection(db_path) as conn:
+            existing_approvals = find_existing_card_approvals(conn, provider, df['card_approval_number'])
+        df = df[~df['card_approval_number'].isin(existing_approvals)].copy()
+        existing_rows = rows_in - len(df)
+        report.add(DEDUP, started, rows_in, len(df))
+        if df.empty:
+            yield df, existing_rows
+            continue
+
+        started = time.perf_counter()
+        df = run_rule_engine(df, default_category_id=default_cat_id, db_path=db_path, stats=report.rule_stats)
+        report.add(RULE_ENGINE, started, len(df), len(df))
+
+        # DataFrame에 account_id 컬럼 추가
+        df['account_id'] = np.where(
+            df['transaction_provider'] == 'SHINHAN_CARD',
+            shinhan_card_account_id,
+            kukmin_card_account_id
+        )
+        yield df, existing_rows
+
+
+def write_card_chunk(df, conn, bulk=True):
+    """
+    분류가 끝난 카드 거래 DataFrame을 중복 제거 후 저장하고 (삽입 건수, 중복 건수)를 반환합니다.
+    커밋은 호출하는 쪽에서 하며, 저장 중 오류는 그대로 발생합니다. (롤백도 호출하는 쪽에서 함)
+    """
+    if bulk:
+        return _bulk_insert_card_rows(df, conn)
+    return _insert_card_rows(df, conn)
+
+
+def insert_card_transactions_from_excel(filepath, db_path=config.DB_PATH, bulk=True, chunk_size=CHUNK_SIZE,
+                                        force=False, report=None):
+    """
+    카드사 엑셀 파일을 chunk_size 행 단위로 읽어 규칙 엔진 적용 후 DB에 저장합니다.
+    chunk_size=None이면 파일 전체를 한 번에 처리합니다.
+    이미 처리한 파일(내용 해시 기준)은 파싱 없이 건너뛰고, 나머지는 승인번호로 중복 검사합니다.
+    force=True면 처리 이력을 무시하고 모든 행을 중복 검사합니다.
+    청크마다 커밋하고, 처리 이력은 마지막 청크와 같은 트랜잭션에 기록합니다. 파싱이나 저장에 실패하면
+    처리 이력을 남기지 않으므로 같은 파일을 다시 올리면 저장되지 않은 행부터 다시 처리됩니다.
+    report(IngestReport)를 넘기면 단계별 소요 시간과 처리 행 수를 채워 줍니다.
+    """
+    filename = _file_name(filepath)
+    provider = CARD_PROVIDERS[detect_card_company(filename)]
+    file_hash = file_content_hash(filepath)
+    report = report if report is not None else IngestReport()
+    report.file_name, report.provider = filename, provider
 
-    # 1. 카드사 이름에 맞는 계좌 ID를 DB에서 조회
-    shinhan_card_account_id = get_account_id_by_name('신한카드')
-    kukmin_card_account_id = get_account_id_by_name('국민카드')
+    inserted_rows, skipped_rows = 0, 0
+    conn = get_connection(db_path)
+    try:
+        entry = None if force else find_manifest_entry(conn, file_hash)
+        if entry:
+            # 파일의 모든 행이 이번에는 저장되지 않으므로 스킵 건수는 파일의 유효 행 수
+            print(f"이미 처리된 파일입니다: {filename} ({entry['row_count']}건)")
+            report.finish(0, entry['row_count'])
+            return 0, entry['row_count']
+
+        stats = IngestFileStats()
+        chunks = iter_categorized_card_chunks(filepath, db_path, chunk_size, stats, report)
+        try:
+            for (df, existing_rows), is_last in mark_last(chunks):
+                skipped_rows += existing_rows
+                if not df.empty:
+                    started = time.perf_counter()
+                    chunk_inserted, chunk_skipped = write_card_chunk(df, conn, bulk)
+                    report.add(WRITE, started, len(df), chunk_inserted)
+                    inserted_rows += chunk_inserted
+                    skipped_rows += chunk_skipped
+                if not is_last:
+                    conn.commit()
+
+            if stats.error is None:
+                record_manifest(conn, file_hash, filename, provider, stats, inserted_rows, skipped_rows)
+            conn.commit()
+        except Exception as e:
+            print(f"데이터 삽입 중 오류 발생: {e}")
+            conn.rollback()
+            stats.error = str(e)
+    finally:
+        conn.close()
+        report.finish(inserted_rows, skipped_rows)
 
-    # 2. DataFrame에 account_id 컬럼 추가
-    df['account_id'] = np.where(
-        df['transaction_provider'] == 'SHINHAN_CARD',
-        shinhan_card_account_id,
-        kukmin_card_account_id
-    )
+    print(f"총 {inserted_rows}건 삽입, {skipped_rows}건은 중복으로 건너뜀.")
 
-    conn = sqlite3.connect(db_path)
+    return inserted_rows, skipped_rows
+
+
+def _insert_card_rows(df, conn):
+    """기존 방식: 한 행씩 승인번호를 조회한 뒤 개별 INSERT 합니다."""
     cursor = conn.cursor()
 
     inserted_rows, skipped_rows = 0, 0
 
     for _, row in df.iterrows():
-        try:
-            cursor.execute(
-                "SELECT t.id FROM \"transaction\" t JOIN \"card_transaction\" ct ON t.id = ct.id WHERE t.transaction_provider = ? AND ct.card_approval_number = ?",
-                (row['transaction_provider'], row['card_approval_number']))
-
-            if cursor.fetchone():
-                skipped_rows += 1
-                continue
-
-            cursor.execute(
-                """INSERT INTO "transaction"
-                   (type, transaction_type, transaction_provider, category_id, transaction_party_id, transaction_date,
-                    transaction_amount, content, account_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    row['type'], row['transaction_type'], row['transaction_provider'],  row['category_id'],
-                    row['transaction_party_id'], row['transaction_date'], row['transaction_amount'], row['content'],
-                    row['account_id']))
-            transaction_id = cursor.lastrowid
-
-            cursor.execute(
-                """
-                INSERT INTO "card_transaction" (id, card_approval_number, card_type, card_name) VALUES (?, ?, ?, ?)
-                """,
-                (transaction_id, row['card_approval_number'], row['card_type'], row['card_name']))
-            inserted_rows += 1
+        cursor.execute(
+            "SELECT t.id FROM \"transaction\" t JOIN \"card_transaction\" ct ON t.id = ct.id WHERE t.transaction_provider = ? AND ct.card_approval_number = ?",
+            (row['transaction_provider'], row['card_approval_number']))
+
+        if cursor.fetchone():
+            skipped_rows += 1
+            continue
+
+        cursor.execute(
+            """INSERT INTO "transaction"
+               (type, transaction_type, transaction_provider, category_id, transaction_party_id, transaction_date,
+                transaction_amount, content, account_id, rule_id, rule_version)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                row['type'], row['transaction_type'], row['transaction_provider'],  row['category_id'],
+                row['transaction_party_id'], row['transaction_date'], row['transaction_amount'], row['content'],
+                row['account_id'], _nullable_int(row['rule_id']), _nullable_int(row['rule_version'])))
+        transaction_id = cursor.lastrowid
+
+        cursor.execute(
+            """
+            INSERT INTO "card_transaction" (id, card_approval_number, card_type, card_name, transaction_provider)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (transaction_id, row['card_approval_number'], row['card_type'], row['card_name'],
+             row['transaction_provider']))
+        inserted_rows += 1
 
-        except Exception as e:
-            print(f"데이터 삽입 중 오류 발생: {e}")
-            conn.rollback()
+    return inserted_rows, skipped_rows
 
-    conn.commit()
-    conn.close()
 
-    print(f"총 {inserted_rows}건 삽입, {skipped_rows}건은 중복으로 건너뜀.")
+def _nullable_int(value):
+    return None if pd.isna(value) else int(value)
 
-    return inserted_rows, skipped_rows
+
+def _to_records(df, columns):
+    """executemany에 넘길 수 있도록 numpy 타입/NaN을 파이썬 기본 타입/None으로 변환합니다."""
+    subset = df[columns].astype(object)
+    subset = subset.where(pd.notna(subset), None)
+    return list(subset.itertuples(index=False, name=None))
+
+
+def _bulk_insert_card_rows(df, conn):
+    """
+    집합 단위 방식: 파일 내 중복 키와 이미 저장된 (카드사, 승인번호)를 UNIQUE 인덱스 조회 한 번으로 제외하고
+    남은 행만 삽입합니다. (그 사이 다른 파일로 들어온 승인번호도 이 쓰기 트랜잭션 안에서 다시 거름)
+    """
+    original_rows = len(df)
+    new_df = df.drop_duplicates(subset=['transaction_provider', 'card_approval_number'], keep='first')
+
+    is_existing = pd.Series(False, index=new_df.index)
+    for provider, approvals in new_df.groupby('transaction_provider')['card_approval_number']:
+        is_existing.loc[approvals.index] = approvals.isin(find_existing_card_approvals(conn, provider, approvals))
+    new_df = new_df[~is_existing]
+
+    if new_df.empty:
+        return 0, original_rows
+
+    # 거래 ID는 SQLite가 정하며, 카드 행은 그 ID로 한 번에 삽입
+    cursor = conn.cursor()
+    transaction_ids = []
+    for record in _to_records(new_df, ['type', 'transaction_type', 'transaction_provider', 'category_id',
+                                       'transaction_party_id', 'transaction_date', 'transaction_amount', 'content',
+                                       'account_id', 'rule_id', 'rule_version']):
+        cursor.execute(
+            """INSERT INTO "transaction"
+               (type, transaction_type, transaction_provider, category_id, transaction_party_id, transaction_date,
+                transaction_amount, content, account_id, rule_id, rule_version)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, record)
+        transaction_ids.append(cursor.lastrowid)
+
+    cursor.executemany(
+        """
+        INSERT INTO "card_transaction" (id, card_approval_number, card_type, card_name, transaction_provider)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        _to_records(new_df.assign(id=transaction_ids),
+                    ['id', 'card_approval_number', 'card_type', 'card_name', 'transaction_provider']))
+
+    return len(new_df), original_rows - len(new_df)
+
+
+BANK_COLUMNS = ['거래일자', '거래시간', '적요', '출금', '입금', '내용', '잔액', '거래점']
+# 청크마다 타입을 추론하지 않고 원래 값 그대로 두는 컬럼 (문자열로 저장되고 이체 규칙의 비교 대상)
+BANK_TEXT_COLUMNS = ['적요', '내용', '거래점']
+
+
+def _clean_bank_column(name):
+    return name.replace('(원)', '').strip()
+
+
+def _parse_shinhan_bank(filepath, chunk_size=CHUNK_SIZE):
+    chunks = read_excel_chunks(filepath, skiprows=6, usecols=lambda name: _clean_bank_column(name) in BANK_COLUMNS,
+                               chunk_size=chunk_size, dtype={name: object for name in BANK_TEXT_COLUMNS})
+    for df in chunks:
+        df.columns = [_clean_bank_column(c) for c in df.columns.astype(str)]
+        yield df
+
+
+def load_bank_context(db_path=config.DB_PATH):
+    """은행 거래 처리에 필요한 계좌/카테고리 ID를 조회합니다. 하나라도 없으면 None을 반환합니다."""
+    with read_connection(db_path) as conn:
+        cursor = conn.cursor()
+        bank_account_id = get_account_id_by_name('신한은행-110-227-963599', db_path)
+
+        # 안전하게 ID 조회
+        transfer_cat_id = \
+        (cursor.execute("SELECT id FROM category WHERE category_code = 'TRANSFER'").fetchone() or [None])[0]
+        default_expense_cat_id = (cursor.execute(
+            "SELECT id FROM category WHERE category_code = 'UNCATEGORIZED' AND category_type ='EXPENSE'").fetchone() or [
+                                      None])[0]
+        default_income_cat_id = (cursor.execute(
+            "SELECT id FROM category WHERE category_code = 'UNCATEGORIZED' AND category_type ='INCOME'").fetchone() or [
+                                     None])[0]
+
+    if not all([bank_account_id, transfer_cat_id, default_expense_cat_id, default_income_cat_id]):
+        print("오류: 필수 계좌 또는 카테고리 ID를 DB에서 찾을 수 없습니다.")
+        return None
+
+    return {
+        'bank_account_id': bank_account_id,
+        'transfer_cat_id': transfer_cat_id,
+        'default_expense_cat_id': default_expense_cat_id,
+        'default_income_cat_id': default_income_cat_id,
+    }
+
+
+def find_existing_bank_fingerprints(conn, fingerprints):
+    """
+    주어진 지문 중 이미 bank_transaction에 저장된 것만 set으로 반환합니다.
+    지문 목록을 JSON 배열 하나로 넘겨 fingerprint 인덱스로 조회하므로, 비용은 테이블 크기가 아니라 파일 크기에 비례합니다.
+    """
+    fingerprints = [int(f) for f in fingerprints]
+    if not fingerprints:
+        return set()
+    rows = conn.execute("SELECT fingerprint FROM bank_transaction WHERE fingerprint IN (SELECT value FROM json_each(?))",
+                        (json.dumps(fingerprints),))
+    return {row[0] for row in rows}
+
+
+def _fingerprint_bank_chunk(df):
+    df = df.dropna(subset=['거래일자', '거래시간'])
+    if df.empty: return df
+    date_str = pd.to_datetime(df['거래일자']).dt.strftime('%Y-%m-%d')
+    time_str = df['거래시간'].astype(str)
+    df['transaction_date'] = pd.to_datetime(date_str + ' ' + time_str).dt.strftime('%Y-%m-%d %H:%M:%S')
+    # 방향(입금 +, 출금 -)과 저장될 '적요 / 내용' 원문을 함께 넣어 잔액이 없어도 서로 다른 거래가 구분되도록 함
+    amount = (df['입금'].fillna(0) - df['출금'].fillna(0)).astype(int)
+    df['fingerprint'] = bank_fingerprints(df['transaction_date'], amount, df.get('잔액', pd.Series(0, index=df.index)),
+                                          _stored_bank_content(df))
+    return df
 
 
-def insert_bank_transactions_from_excel(filepath, db_path=config.DB_PATH):
+def _stored_bank_content(df):
+    """transaction.content에 저장하는 '적요 / 내용' 문자열"""
+    return df['적요'].astype(str) + ' / ' + df['내용'].astype(str)
+
+
+def _categorize_bank_chunk(df, context, db_path, report):
+    # 명확한 순서로 타입 및 카테고리 ID 할당
+    df['amount'] = df['입금'].fillna(0) - df['출금'].fillna(0)
+    df['transaction_amount'] = df['amount'].abs().astype(int)
+    df['content'] = df['내용'].astype(str)
+    df['content2'] = df['적요'].astype(str)
+
+    # 이체 판별 엔진 실행: linked_account_id의 Series를 반환
+    started = time.perf_counter()
+    linked_account_id_series = identify_transfers(df, db_path, stats=report.rule_stats)
+    is_transfer_mask = (linked_account_id_series != 0) & (linked_account_id_series.notna())
+    report.add(IDENTIFY_TRANSFERS, started, len(df), int(is_transfer_mask.sum()))
+
+    # 타입 및 카테고리 ID 설정
+    df['type'] = np.where(df['amount'] > 0, 'INCOME', 'EXPENSE')
+    df.loc[is_transfer_mask, 'type'] = 'TRANSFER'
+
+    df['category_id'] = np.where(df['type'] == 'INCOME', context['default_income_cat_id'],
+                                 context['default_expense_cat_id'])
+    df.loc[is_transfer_mask, 'category_id'] = context['transfer_cat_id']
+
+    df['linked_account_id'] = linked_account_id_series
+
+
+    # 카테고리 분류 규칙 엔진 실행 (TRANSFER가 아닌 행에 대해서만, 이체 행은 분류 근거를 남기지 않음)
+    df['rule_id'] = pd.Series(pd.NA, index=df.index, dtype='Int64')
+    df['rule_version'] = pd.Series(pd.NA, index=df.index, dtype='Int64')
+    expense_income_mask = (df['type'] != 'TRANSFER')
+    if expense_income_mask.any():
+        started = time.perf_counter()
+        df_to_categorize = df[expense_income_mask].copy()
+        categorized_subset = run_rule_engine(df_to_categorize, context['default_expense_cat_id'], db_path,
+                                             stats=report.rule_stats)
+        # 규칙 엔진은 category_id만 바꿈 (전체를 update하면 int64 지문이 float으로 바뀌어 정밀도를 잃음)
+        df.update(categorized_subset[['category_id']])
+        df.loc[expense_income_mask, ['rule_id', 'rule_version']] = categorized_subset[['rule_id', 'rule_version']]
+        report.add(RULE_ENGINE, started, len(df_to_categorize), len(df_to_categorize))
+    return df
+
+
+def iter_categorized_bank_chunks(filepath, context, db_path=config.DB_PATH, chunk_size=CHUNK_SIZE, stats=None,
+                                 report=None):
+    """
+    은행 엑셀 파일을 chunk_size 행 단위로 읽어 (분류가 끝난 DataFrame, 중복으로 제외한 건수)를 차례로 반환합니다.
+    DB에 이미 있는 거래(지문 기준)는 이체 판별/규칙 엔진을 돌리기 전에 제외합니다.
+    (DB 쓰기는 하지 않음)
+    """
+    report = report if report is not None else IngestReport()
+    chunks = _parse_shinhan_bank(filepath, chunk_size)
+    while True:
+        started = time.perf_counter()
+        try:
+            df = next(chunks)
+        except StopIteration:
+            return
+        except Exception as e:
+            print(f"엑셀 파일 읽기 오류: {e}")
+            if stats is not None:
+                stats.error = str(e)
+            return
+
+        report.add(PARSE, started, len(df), len(df))
+
+        started, rows_in = time.perf_counter(), len(df)
+        df = _fingerprint_bank_chunk(df)
+        report.add(NORMALIZE, started, rows_in, len(df))
+        if df.empty: continue
+        if stats is not None:
+            stats.observe(df['transaction_date'])
+
+        # 중복 제거
+        started, rows_in = time.perf_counter(), len(df)
+        with read_connection(db_path) as conn:
+            existing_fingerprints = find_existing_bank_fingerprints(conn, df['fingerprint'])
+        df = df[~df['fingerprint'].isin(existing_fingerprints)].copy()
+        skipped_rows = rows_in - len(df)
+        report.add(DEDUP, started, rows_in, len(df))
+        if df.empty:
+            yield df, skipped_rows
+            continue
+
+        yield _categorize_bank_chunk(df, context, db_path, report), skipped_rows
+
+
+def write_bank_chunk(df, conn, bank_account_id, bulk=True):
+    """
+    분류가 끝난 은행 거래 DataFrame을 저장합니다. 그 사이 다른 파일로 들어온 거래가 있을 수 있으므로
+    저장 직전에 DB에서 한 번 더 중복을 거릅니다.
+    (삽입 건수, 중복 건수)를 반환합니다. 커밋/롤백은 호출하는 쪽에서 하며, 저장 중 오류는 그대로 발생합니다.
+    """
+    original_rows = len(df)
+    df = df[~df['fingerprint'].isin(find_existing_bank_fingerprints(conn, df['fingerprint']))]
+    if df.empty:
+        return 0, original_rows
+
+    if bulk:
+        inserted_rows = _bulk_insert_bank_rows(df, conn, bank_account_id)
+    else:
+        inserted_rows = _insert_bank_rows(df, conn, bank_account_id)
+    return inserted_rows, original_rows - len(df)
+
+
+def insert_bank_transactions_from_excel(filepath, db_path=config.DB_PATH, bulk=True, chunk_size=CHUNK_SIZE,
+                                        force=False, report=None):
+    """
+    은행 엑셀 파일을 chunk_size 행 단위로 읽어 이체 판별/규칙 엔진 적용 후 DB에 저장합니다.
+    chunk_size=None이면 파일 전체를 한 번에 처리합니다.
+    이미 처리한 파일(내용 해시 기준)은 파싱 없이 건너뛰고, 나머지는 거래 지문으로 중복 검사합니다.
+    force=True면 처리 이력을 무시하고 모든 행을 중복 검사합니다.
+    청크마다 커밋하고, 처리 이력은 마지막 청크와 같은 트랜잭션에 기록합니다. 파싱이나 저장에 실패하면
+    처리 이력을 남기지 않으므로 같은 파일을 다시 올리면 저장되지 않은 행부터 다시 처리됩니다.
+    report(IngestReport)를 넘기면 단계별 소요 시간과 처리 행 수를 채워 줍니다.
+    """
+    filename = _file_name(filepath)
+    file_hash = file_content_hash(filepath)
+    report = report if report is not None else IngestReport()
+    report.file_name, report.provider = filename, BANK_PROVIDER
+
+    with read_connection(db_path) as conn:
+        entry = None if force else find_manifest_entry(conn, file_hash)
+    if entry:
+        # 파일의 모든 행이 이번에는 저장되지 않으므로 스킵 건수는 파일의 유효 행 수
+        print(f"이미 처리된 파일입니다: {filename} ({entry['row_count']}건)")
+        report.finish(0, entry['row_count'])
+        return 0, entry['row_count']
+
+    context = load_bank_context(db_path)
+    if context is None:
+        report.finish(0, 0)
+        return 0, 0
+
+    inserted_count, skipped_count = 0, 0
+    stats = IngestFileStats()
+    conn = get_connection(db_path)
     try:
-        df = pd.read_excel(filepath, skiprows=6,sheet_name=0)
-        df.columns = df.columns.str.replace(r'\(원\)', '', regex=True).str.strip()
+        chunks = iter_categorized_bank_chunks(filepath, context, db_path, chunk_size, stats, report)
+        for (df, skipped_rows), is_last in mark_last(chunks):
+            skipped_count += skipped_rows
+            if not df.empty:
+                started = time.perf_counter()
+                chunk_inserted, chunk_skipped = write_bank_chunk(df, conn, context['bank_account_id'], bulk)
+                report.add(WRITE, started, len(df), chunk_inserted)
+                inserted_count += chunk_inserted
+                skipped_count += chunk_skipped
+            if not is_last:
+                conn.commit()
+
+        if stats.error is None:
+            record_manifest(conn, file_hash, filename, BANK_PROVIDER, stats, inserted_count, skipped_count)
+        conn.commit()
+
+        if inserted_count == 0:
+            print(f"새로운 데이터가 없습니다. {skipped_count}건은 중복으로 건너뜁니다.")
     except Exception as e:
-        print(f"엑셀 파일 읽기 오류: {e}")
-        return 0, 0
+        # 이전 청크까지는 이미 커밋되어 있음
+        print(f"데이터 처리 중 오류 발생: {e}")
+        conn.rollback()
+        stats.error = str(e)
+    finally:
+        conn.close()
+        report.finish(inserted_count, skipped_count)
+    return inserted_count, skipped_count
 
-        # 1. DB 연결을 한번만 하고, with 구문으로 자동 관리
-    with sqlite3.connect(db_path) as conn:
-        try:
-            cursor = conn.cursor()
-            # --- 필요한 ID와 기존 해시값 미리 로드 ---
-            existing_hashes = {row[0] for row in cursor.execute("SELECT unique_hash FROM bank_transaction")}
-            bank_account_id = get_account_id_by_name('신한은행-110-227-963599')
-
-            # 2. 안전하게 ID 조회
-            transfer_cat_id = \
-            (cursor.execute("SELECT id FROM category WHERE category_code = 'TRANSFER'").fetchone() or [None])[0]
-            default_expense_cat_id = (cursor.execute(
-                "SELECT id FROM category WHERE category_code = 'UNCATEGORIZED' AND category_type ='EXPENSE'").fetchone() or [
-                                          None])[0]
-            default_income_cat_id = (cursor.execute(
-                "SELECT id FROM category WHERE category_code = 'UNCATEGORIZED' AND category_type ='INCOME'").fetchone() or [
-                                         None])[0]
-
-            if not all([bank_account_id, transfer_cat_id, default_expense_cat_id, default_income_cat_id]):
-                print("오류: 필수 계좌 또는 카테고리 ID를 DB에서 찾을 수 없습니다.")
-                return 0, 0
-
-            df.dropna(subset=['거래일자', '거래시간'], inplace=True)
-            date_str = pd.to_datetime(df['거래일자']).dt.strftime('%Y-%m-%d')
-            time_str = df['거래시간'].astype(str)
-            out_amount_str = df['출금'].fillna(0).astype(int).astype(str)
-            in_amount_str = df['입금'].fillna(0).astype(int).astype(str)
-            df['unique_hash'] = (date_str + '-' + time_str + '-' + out_amount_str + '-' + in_amount_str).apply(
-                lambda x: hashlib.sha256(x.encode()).hexdigest())
-
-            # 중복 제거
-            original_rows = len(df)
-            df = df[~df['unique_hash'].isin(existing_hashes)]
-            skipped_count = original_rows - len(df)
-            if df.empty:
-                print(f"새로운 데이터가 없습니다. {skipped_count}건은 중복으로 건너뜁니다.")
-                return 0, skipped_count
-
-            # 3. 명확한 순서로 타입 및 카테고리 ID 할당
-            df['amount'] = df['입금'].fillna(0) - df['출금'].fillna(0)
-            df['transaction_amount'] = df['amount'].abs().astype(int)
-            df['content'] = df['내용'].astype(str)
-            df['content2']= df['적요'].astype(str)
-
-            # 이체 판별 엔진 실행: linked_account_id의 Series를 반환
-            linked_account_id_series = identify_transfers(df, db_path)
-            is_transfer_mask = (linked_account_id_series != 0) & (linked_account_id_series.notna())
-
-            # 타입 및 카테고리 ID 설정
-            df['type'] = np.where(df['amount'] > 0, 'INCOME', 'EXPENSE')
-            df.loc[is_transfer_mask, 'type'] = 'TRANSFER'
-
-            df['category_id'] = np.where(df['type'] == 'INCOME', default_income_cat_id, default_expense_cat_id)
-            df.loc[is_transfer_mask, 'category_id'] = transfer_cat_id
-
-            df['linked_account_id'] = linked_account_id_series
-
-
-            # 카테고리 분류 규칙 엔진 실행 (TRANSFER가 아닌 행에 대해서만)
-            expense_income_mask = (df['type'] != 'TRANSFER')
-            if expense_income_mask.any():
-                df_to_categorize = df[expense_income_mask].copy()
-                categorized_subset = run_rule_engine(df_to_categorize, default_expense_cat_id, db_path)
-                df.update(categorized_subset)
-
-            inserted_count = 0
-
-            for _, row in df.iterrows():
-                    cursor.execute("""
-                                   INSERT INTO "transaction" (type, transaction_type, transaction_provider, category_id,
-                                                              transaction_party_id, transaction_date, transaction_amount,
-                                                              content, account_id, linked_account_id)
-                                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?,?)
-                                   """, (
-                                       row['type'], 'BANK', 'SHINHAN_BANK', row['category_id'], 1,
-                                       pd.to_datetime(f"{row['거래일자']} {row['거래시간']}").strftime('%Y-%m-%d %H:%M:%S'),
-                                       row['transaction_amount'], str(row.get('적요', '')) + ' / ' + str(row.get('내용', '')),
-                                       bank_account_id,
-                                       None if pd.isna(row['linked_account_id']) or row[
-                                           'linked_account_id'] == 0 else int(row['linked_account_id'])
-                                   ))
-                    transaction_id = cursor.lastrowid
-                    cursor.execute(
-                        "INSERT INTO \"bank_transaction\" (id, unique_hash, branch, balance_amount) VALUES (?, ?, ?, ?)",
-                        (transaction_id, row['unique_hash'], row.get('거래점'), row.get('잔액')))
-
-                    # 잔액 업데이트
-                    amount = row['transaction_amount']
-                    reason = f"거래 ID {transaction_id}: {row['content']}"
-                    if row['type'] == 'INCOME':
-                        update_balance_and_log(bank_account_id, amount, reason, conn)
-                    elif row['type'] == 'EXPENSE':
-                        update_balance_and_log(bank_account_id, -amount, reason, conn)
-                    elif row['type'] == 'TRANSFER':
-                        update_balance_and_log(bank_account_id, -amount, f"이체 출금: {reason}", conn)
-                        update_balance_and_log(int(row['linked_account_id']), amount, f"이체 입금: {reason}", conn)
-
-                    inserted_count += 1
 
-            conn.commit()
-            return inserted_count, skipped_count
+def _insert_bank_rows(df, conn, bank_account_id):
+    """기존 방식: 한 행씩 INSERT 하고 거래마다 잔액을 갱신합니다."""
+    cursor = conn.cursor()
+    inserted_count = 0
 
-        except Exception as e:
-            print(f"데이터 처리 중 오류 발생: {e}")
-            conn.rollback()
-            return 0, 0
\ No newline at end of file
+    for _, row in df.iterrows():
+        cursor.execute("""
+                       INSERT INTO "transaction" (type, transaction_type, transaction_provider, category_id,
+                                                  transaction_party_id, transaction_date, transaction_amount,
+                                                  content, account_id, linked_account_id, rule_id, rule_version)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       """, (
+                           row['type'], 'BANK', 'SHINHAN_BANK', row['category_id'], 1,
+                           pd.to_datetime(f"{row['거래일자']} {row['거래시간']}").strftime('%Y-%m-%d %H:%M:%S'),
+                           row['transaction_amount'], str(row.get('적요', '')) + ' / ' + str(row.get('내용', '')),
+                           bank_account_id,
+                           None if pd.isna(row['linked_account_id']) or row[
+                               'linked_account_id'] == 0 else int(row['linked_account_id']),
+                           _nullable_int(row['rule_id']), _nullable_int(row['rule_version'])
+                       ))
+        transaction_id = cursor.lastrowid
+        cursor.execute(
+            "INSERT INTO \"bank_transaction\" (id, fingerprint, branch, balance_amount, raw_summary, raw_content) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (transaction_id, int(row['fingerprint']), row.get('거래점'), row.get('잔액'), str(row.get('적요', '')),
+             str(row.get('내용', ''))))
+
+        # 잔액 업데이트
+        amount = row['transaction_amount']
+        reason = f"거래 ID {transaction_id}: {row['content']}"
+        if row['type'] == 'INCOME':
+            update_balance_and_log(bank_account_id, amount, reason, conn)
+        elif row['type'] == 'EXPENSE':
+            update_balance_and_log(bank_account_id, -amount, reason, conn)
+        elif row['type'] == 'TRANSFER':
+            update_balance_and_log(bank_account_id, -amount, f"이체 출금: {reason}", conn)
+            update_balance_and_log(int(row['linked_account_id']), amount, f"이체 입금: {reason}", conn)
+
+        inserted_count += 1
+    return inserted_count
+
+
+def _bulk_insert_bank_rows(df, conn, bank_account_id):
+    """
+    일괄 방식: 거래 행을 삽입해 받은 ID로 은행 거래 행을 executemany로 한 번에 삽입하고,
+    잔액은 계좌별 합계 한 번과 이력 일괄 INSERT로 반영합니다.
+    """
+    linked_ids = df['linked_account_id'].where(df['linked_account_id'].notna() & (df['linked_account_id'] != 0))
+
+    rows = df.assign(
+        category_id=df['category_id'].astype(int),
+        linked_account_id=linked_ids.astype('Int64'),
+        raw_summary=df['적요'].astype(str),
+        raw_content=df['내용'].astype(str),
+        stored_content=_stored_bank_content(df),
+        branch=df.get('거래점'),
+        balance_amount=df.get('잔액'),
+    )
+
+    # 거래 ID는 SQLite가 정하며, 은행 거래 행과 잔액 이력은 그 ID를 사용
+    cursor = conn.cursor()
+    transaction_ids = []
+    for record in _to_records(rows.assign(account_id=bank_account_id),
+                              ['type', 'category_id', 'transaction_date', 'transaction_amount', 'stored_content',
+                               'account_id', 'linked_account_id', 'rule_id', 'rule_version']):
+        cursor.execute("""
+                       INSERT INTO "transaction" (type, transaction_type, transaction_provider, category_id,
+                                                  transaction_party_id, transaction_date, transaction_amount,
+                                                  content, account_id, linked_account_id, rule_id, rule_version)
+                       VALUES (?, 'BANK', 'SHINHAN_BANK', ?, 1, ?, ?, ?, ?, ?, ?, ?)
+                       """, record)
+        transaction_ids.append(cursor.lastrowid)
+    rows = rows.assign(id=transaction_ids)
+
+    cursor.executemany(
+        "INSERT INTO \"bank_transaction\" (id, fingerprint, branch, balance_amount, raw_summary, raw_content) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        _to_records(rows, ['id', 'fingerprint', 'branch', 'balance_amount', 'raw_summary', 'raw_content']))
+
+    # 잔액 변동 목록: 은행 계좌 입출금 + 이체 시 연결 계좌 입금 (기존 방식과 같은 순서)
+    reasons = "거래 ID " + rows['id'].astype(str) + ": " + rows['content']
+    is_transfer = rows['type'] == 'TRANSFER'
+    order = np.arange(len(rows)) * 2
+    bank_changes = pd.DataFrame({
+        'account_id': bank_account_id,
+        'change_amount': np.where(rows['type'] == 'INCOME', rows['transaction_amount'], -rows['transaction_amount']),
+        'reason': np.where(is_transfer, "이체 출금: " + reasons, reasons),
+        'order': order,
+    })
+    linked_changes = pd.DataFrame({
+        'account_id': rows['linked_account_id'],
+        'change_amount': rows['transaction_amount'],
+        'reason': "이체 입금: " + reasons,
+        'order': order + 1,
+    })[is_transfer.to_numpy()]
+    changes = pd.concat([bank_changes, linked_changes]).sort_values('order', kind='stable')
+    post_balance_changes(changes[['account_id', 'change_amount', 'reason']], conn)
+
+    return len(rows)
@@ -0,0 +1,165 @@
+import atexit
+import os
+import pathlib
+import sqlite3
+import threading
+from contextlib import contextmanager, nullcontext
+
+import config
+
+# 모든 연결에 적용하는 PRAGMA (DB 설정은 여기서만 바꿈)
+# foreign_keys는 켜지 않음: 기존과 같이 SQLite 기본값(OFF)으로 두며, 켜려면 기존 데이터 검사와 삭제 순서 점검이 먼저 필요
+CONNECTION_PRAGMAS = {
+    'busy_timeout': 5000,  # 다른 연결이 쓰는 중이면 5초까지 기다림
+    'synchronous': 'NORMAL',  # WAL에서는 NORMAL로도 커밋된 데이터가 손상되지 않음
+    'cache_size': -65536,  # 연결마다 64MB 페이지 캐시 (음수는 KB 단위)
+    'mmap_size': 268435456,  # 256MB까지 메모리 매핑으로 읽음
+    'temp_store': 'MEMORY',
+}
+# 쓰기 연결에서 한 번 설정하면 DB 파일에 남는 PRAGMA
+WRITER_PRAGMAS = {
+    'journal_mode': 'WAL',  # 쓰는 동안에도 읽기 연결이 막히지 않음
+}
+
+# 종류별로 보관하는 유휴 연결 수 (넘치면 닫음)
+MAX_IDLE_CONNECTIONS = 4
+
+# 스레드별이 아닌 프로세스 공용 풀: Streamlit은 재실행마다 새 스레드에서 스크립트를 돌리므로
+# 스레드별로 두면 재실행 사이에 연결(페이지 캐시)을 재사용하지 못함. 대신 빌려 간 연결은 돌려줄 때까지 한 스레드만 사용
+_lock = threading.Lock()
+_pool = {}  # (db_path, read_only) -> 유휴 연결 목록
+_pool_pid = os.getpid()
+# fork로 부모 프로세스에서 물려받은 연결 (자식에서 닫으면 부모의 잠금에 영향을 줄 수 있어 닫지 않고 보관만 함)
+_inherited = []
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    풀에서 빌려준 연결. close()는 실제로 닫지 않고, 끝나지 않은 트랜잭션을 롤백한 뒤 풀에 돌려줍니다.
+    한 번에 한 스레드만 사용하며, 돌려준 뒤에는 다른 스레드가 다시 빌려 갈 수 있습니다.
+    """
+
+    def close(self):
+        _release(self)
+
+    def discard(self):
+        super().close()
+
+
+def _configure(conn, read_only):
+    pragmas = CONNECTION_PRAGMAS if read_only else {**CONNECTION_PRAGMAS, **WRITER_PRAGMAS}
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def _open(db_path, read_only):
+    if read_only:
+        uri = pathlib.Path(os.path.abspath(db_path)).as_uri() + '?mode=ro'
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=PooledConnection)
+    else:
+        conn = sqlite3.connect(db_path, check_same_thread=False, factory=PooledConnection)
+    conn.pool_key = (db_path, read_only)
+    _configure(conn, read_only)
+    return conn
+
+
+def _check_pid():
+    # 프로세스 풀 워커 등 fork된 자식 프로세스는 자기 연결을 새로 만듦
+    global _pool_pid
+    if _pool_pid != os.getpid():
+        _inherited.extend(conn for idle in _pool.values() for conn in idle)
+        _pool.clear()
+        _pool_pid = os.getpid()
+
+
+def get_connection(db_path=config.DB_PATH, read_only=False):
+    """
+    풀에서 연결을 빌려 반환합니다. (유휴 연결이 없으면 새로 만듦)
+    read_only=True면 읽기 전용으로 연 연결을, 아니면 쓰기 연결을 반환합니다.
+    사용이 끝나면 conn.close()로 돌려줘야 페이지 캐시가 유지된 채 다음 호출에서 재사용됩니다.
+    """
+    with _lock:
+        _check_pid()
+        idle = _pool.get((db_path, read_only))
+        if idle:
+            return idle.pop()
+    return _open(db_path, read_only)
+
+
+def _release(conn):
+    if conn.in_transaction:
+        conn.rollback()
+    with _lock:
+        _check_pid()
+        idle = _pool.setdefault(conn.pool_key, [])
+        if conn in idle:
+            return  # 이미 돌려준 연결
+        if len(idle) < MAX_IDLE_CONNECTIONS:
+            idle.append(conn)
+            return
+    conn.discard()
+
+
+@contextmanager
+def connect(db_path=config.DB_PATH, read_only=False):
+    """
+    with 블록 동안 풀의 연결을 빌려 줍니다. sqlite3.connect를 with로 쓸 때와 같이
+    블록이 정상 종료되면 커밋, 예외가 나면 롤백하며, 끝나면 연결을 풀에 돌려줍니다.
+    """
+    conn = get_connection(db_path, read_only)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def read_connection(db_path=config.DB_PATH, conn=None):
+    """
+    조회 전용 연결 (쓰기를 시도하면 sqlite3.OperationalError)
+    conn을 넘기면 새로 빌리지 않고 그 연결을 그대로 사용합니다. (커밋/롤백/반납은 연결을 넘긴 쪽에서 함)
+    여러 조회를 한 연결, 한 트랜잭션에서 실행하거나 쓰기 트랜잭션 도중 아직 커밋하지 않은 내용을 조회할 때 사용
+    """
+    if conn is not None:
+        return nullcontext(conn)
+    return connect(db_path, read_only=True)
+
+
+@contextmanager
+def _savepoint(conn):
+    # 넘겨받은 연결의 트랜잭션 안에서 실행: 예외가 나면 이 블록의 변경만 되돌리고 커밋은 연결을 넘긴 쪽에서 함
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    conn.execute("SAVEPOINT write_connection")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK TO write_connection")
+        conn.execute("RELEASE write_connection")
+        raise
+    conn.execute("RELEASE write_connection")
+
+
+def write_connection(db_path=config.DB_PATH, conn=None):
+    """
+    쓰기 연결. with 블록이 정상 종료되면 커밋, 예외가 나면 롤백합니다.
+    conn을 넘기면 그 연결의 트랜잭션(없으면 새로 시작)에 이어서 쓰고 커밋하지 않습니다.
+    예외가 나면 이 블록에서 쓴 내용만 되돌리므로, 여러 쓰기 함수를 한 트랜잭션으로 묶을 때 사용
+    """
+    if conn is not None:
+        return _savepoint(conn)
+    return connect(db_path)
+
+
+def close_all_connections():
+    """풀의 유휴 연결을 모두 닫습니다. (DB 파일을 교체하거나 삭제하기 전에 호출)"""
+    with _lock:
+        _check_pid()
+        for idle in _pool.values():
+            for conn in idle:
+                conn.discard()
+        _pool.clear()
+
+
+# 정상 종료 시 연결을 닫아 WAL 내용을 DB 파일에 반영
+atexit.register(close_all_connections)
@@ -1,3 +1,4 @@
+import json
 import os
 import sqlite3
 from datetime import datetime
@@ -8,13 +9,20 @@ import pandas as pd
 
 import config
 from analysis import run_rule_engine, identify_transfers
+from core.db_connection import get_connection, read_connection, write_connection
+from core.fingerprint import bank_fingerprint
+from core.rule_set import RULE, TRANSFER_RULE, get_rule_set
+from core.rule_sql import compile_rule_match_query, register_rule_functions
+from core.rule_stats import RuleStats, save_rule_stats
 
-LATEST_DB_VERSION = 4
+LATEST_DB_VERSION = 19
 SUCCESS_MSG = "성공적으로 추가되었습니다."
 
 
 def run_migrations(db_path=config.DB_PATH, migrations_path='migrations'):
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path)
+    # 마이그레이션 스크립트에서 사용하는 사용자 함수
+    conn.create_function('bank_fingerprint', -1, bank_fingerprint, deterministic=True)
     cursor = conn.cursor()
 
     current_version = cursor.execute("PRAGMA user_version").fetchone()[0]
@@ -36,122 +44,182 @@ def run_migrations(db_path=config.DB_PATH, migrations_path='migrations'):
             except Exception as e:
                 print(f"버전 {v} 마이그레이션 실패: {e}")
                 conn.rollback()
-                conn.close()
+                conn.discard()
                 return
     else:
         print("데이터베이스가 이미 최신 버전입니다.")
 
-    conn.close()
+    # 마이그레이션 스크립트가 바꾼 연결 설정(v1의 PRAGMA foreign_keys 등)이 다른 작업에 남지 않도록 풀에 돌려주지 않음
+    conn.discard()
 
 
-def update_transaction_category(transaction_id, new_category_id, db_path=config.DB_PATH):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE \"transaction\" SET category_id = ?, is_manual_category = 1 WHERE id = ?", (new_category_id, transaction_id))
-    conn.commit()
-    conn.close()
+def update_transaction_category(transaction_id, new_category_id, db_path=config.DB_PATH, conn=None):
+    with write_connection(db_path, conn) as conn:
+        conn.execute("UPDATE \"transaction\" SET category_id = ?, is_manual_category = 1 WHERE id = ?",
+                     (new_category_id, transaction_id))
 
 
-def update_transaction_description(transaction_id, new_description, db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
+def update_transaction_description(transaction_id, new_description, db_path=config.DB_PATH, conn=None):
+    with write_connection(db_path, conn) as conn:
         conn.execute(
             "UPDATE \"transaction\" SET description = ? WHERE id = ?",
             (new_description, transaction_id)
         )
 
 
-def update_transaction_party(transaction_id, new_party_id, db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
+def update_transaction_party(transaction_id, new_party_id, db_path=config.DB_PATH, conn=None):
+    with write_connection(db_path, conn) as conn:
         conn.execute(
             "UPDATE \"transaction\" SET transaction_party_id = ? WHERE id = ?",
             (new_party_id, transaction_id)
         )
 
 
-def add_new_party(party_code, description, db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
-        try:
+def add_new_party(party_code, description, db_path=config.DB_PATH, conn=None):
+    try:
+        with write_connection(db_path, conn) as conn:
             conn.execute(
                 "INSERT INTO \"transaction_party\" (party_code, description) VALUES (?, ?)",
                 (party_code, description)
             )
-            return True, SUCCESS_MSG
-        except sqlite3.IntegrityError:
-            return False, f"오류: 거래처 코드 '{party_code}'가 이미 존재합니다."
-        except Exception as e:
-            return False, f"오류 발생: {e}"
+        return True, SUCCESS_MSG
+    except sqlite3.IntegrityError:
+        return False, f"오류: 거래처 코드 '{party_code}'가 이미 존재합니다."
+    except Exception as e:
+        return False, f"오류 발생: {e}"
 
 
-def add_new_category(parent_id, new_code, new_desc, new_type, db_path=config.DB_PATH):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+CATEGORY_LEVELS = 4  # category 테이블에 이름을 펼쳐 두는 단계 수 (L1..L4)
+# 카테고리의 최상위부터 (offset + 1)번째 단계 이름
+_CATEGORY_LEVEL_NAME = """(SELECT a.description FROM category_closure cc JOIN category a ON a.id = cc.ancestor_id
+         WHERE cc.descendant_id = category.id
+           AND cc.depth = (SELECT MAX(depth) FROM category_closure WHERE descendant_id = category.id) - {offset})"""
+
+
+def _update_category_levels(conn, category_id=None):
+    """클로저 테이블로 category의 L1..L4 이름 컬럼을 채웁니다. (category_id가 없으면 전체)"""
+    assignments = ", ".join(f"L{i + 1} = {_CATEGORY_LEVEL_NAME.format(offset=i)}" for i in range(CATEGORY_LEVELS))
+    where, params = ("WHERE id = ?", (category_id,)) if category_id is not None else ("", ())
+    conn.execute(f"UPDATE category SET {assignments} {where}", params)
+
+
+def _add_category_closure(conn, category_id, parent_id):
+    """새 카테고리를 부모의 모든 조상과 자기 자신에 연결합니다."""
+    conn.execute("""
+        INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, ?, depth + 1 FROM category_closure WHERE descendant_id = ?
+        UNION ALL
+        SELECT ?, ?, 0
+    """, (category_id, parent_id, category_id, category_id))
+    _update_category_levels(conn, category_id)
+
+
+def _rebuild_category_closure(conn):
+    """parent_id를 따라 클로저 테이블과 L1..L4 컬럼을 처음부터 다시 만듭니다."""
+    conn.execute("DELETE FROM category_closure")
+    conn.execute("""
+        INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE walk(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM category
+            UNION ALL
+            SELECT p.id, w.descendant_id, w.depth + 1
+            FROM walk w
+                     JOIN category c ON c.id = w.ancestor_id
+                     JOIN category p ON p.id = c.parent_id
+        )
+        SELECT ancestor_id, descendant_id, depth FROM walk
+    """)
+    _update_category_levels(conn)
+
+
+def add_new_category(parent_id, new_code, new_desc, new_type, db_path=config.DB_PATH, conn=None):
     try:
-        cursor.execute("SELECT depth, materialized_path_desc FROM category WHERE id = ?", (parent_id,))
-        parent = cursor.fetchone()
-        if not parent:
-            return False, "선택된 부모 카테고리가 존재하지 않습니다."
+        with write_connection(db_path, conn) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT depth, materialized_path_desc FROM category WHERE id = ?", (parent_id,))
+            parent = cursor.fetchone()
+            if not parent:
+                return False, "선택된 부모 카테고리가 존재하지 않습니다."
 
-        parent_depth, parent_path = parent
-        new_depth = parent_depth + 1
+            parent_depth, parent_path = parent
+            new_depth = parent_depth + 1
 
-        cursor.execute("""
-                       INSERT INTO category (category_code, category_type, description, depth, parent_id,
-                                             materialized_path_desc)
-                       VALUES (?, ?, ?, ?, ?, ?)
-                       """, (new_code, new_type, new_desc, new_depth, parent_id, 'TEMP'))
+            cursor.execute("""
+                           INSERT INTO category (category_code, category_type, description, depth, parent_id,
+                                                 materialized_path_desc)
+                           VALUES (?, ?, ?, ?, ?, ?)
+                           """, (new_code, new_type, new_desc, new_depth, parent_id, 'TEMP'))
 
-        new_id = cursor.lastrowid
+            new_id = cursor.lastrowid
 
-        new_path = f"{parent_path}-{new_id}"
-        cursor.execute("UPDATE category SET materialized_path_desc = ? WHERE id = ?", (new_path, new_id))
+            new_path = f"{parent_path}-{new_id}"
+            cursor.execute("UPDATE category SET materialized_path_desc = ? WHERE id = ?", (new_path, new_id))
+            _add_category_closure(cursor, new_id, parent_id)
 
-        conn.commit()
         return True, SUCCESS_MSG
     except sqlite3.IntegrityError:
-        conn.rollback()
         return False, f"오류: 카테고리 코드 '{new_code}'가 이미 존재할 수 있습니다."
     except Exception as e:
-        conn.rollback()
         return False, f"오류 발생: {e}"
-    finally:
-        conn.close()
 
 
-def rebuild_category_paths(db_path=config.DB_PATH):
-    conn = sqlite3.connect(db_path)
+def rebuild_category_paths(db_path=config.DB_PATH, conn=None):
     try:
-        df = pd.read_sql_query("SELECT id, parent_id FROM category", conn)
-        if df.empty:
-            return 0, "처리할 카테고리가 없습니다."
+        with write_connection(db_path, conn) as conn:
+            df = pd.read_sql_query("SELECT id, parent_id FROM category", conn)
+            if df.empty:
+                return 0, "처리할 카테고리가 없습니다."
 
-        parent_map = pd.Series(df.parent_id.values, index=df.id).to_dict()
+            parent_map = pd.Series(df.parent_id.values, index=df.id).to_dict()
 
-        new_paths = {}
-        for cat_id in df['id']:
-            path_segments = []
-            current_id = cat_id
+            new_paths = {}
+            for cat_id in df['id']:
+                path_segments = []
+                current_id = cat_id
 
-            # 최상위 부모에 도달할 때까지 위로 올라감
-            while pd.notna(current_id) and current_id in parent_map:
-                path_segments.insert(0, str(int(current_id)))
-                current_id = parent_map.get(current_id)
+                # 최상위 부모에 도달할 때까지 위로 올라감
+                while pd.notna(current_id) and current_id in parent_map:
+                    path_segments.insert(0, str(int(current_id)))
+                    current_id = parent_map.get(current_id)
 
-            new_paths[cat_id] = "-".join(path_segments)
+                new_paths[cat_id] = "-".join(path_segments)
 
-        # 4. executemany를 사용해 모든 경로를 한번에 DB에 업데이트
-        update_data = [(path, cat_id) for cat_id, path in new_paths.items()]
+            # 4. executemany를 사용해 모든 경로를 한번에 DB에 업데이트
+            update_data = [(path, cat_id) for cat_id, path in new_paths.items()]
 
-        cursor = conn.cursor()
-        cursor.executemany("UPDATE category SET materialized_path_desc = ? WHERE id = ?", update_data)
-        conn.commit()
+            cursor = conn.cursor()
+            cursor.executemany("UPDATE category SET materialized_path_desc = ? WHERE id = ?", update_data)
+            _rebuild_category_closure(conn)
 
         return cursor.rowcount, "모든 카테고리 경로를 성공적으로 재계산했습니다."
 
     except Exception as e:
-        conn.rollback()
         return 0, f"오류 발생: {e}"
-    finally:
-        conn.close()
+
+
+def rebuild_monthly_rollup(db_path=config.DB_PATH, conn=None):
+    """
+    월별 집계 테이블(monthly_rollup)을 거래 원본에서 처음부터 다시 만듭니다.
+    평소에는 거래 테이블의 트리거가 증분으로 맞춰 주므로, 트리거를 거치지 않고 DB를 고쳤을 때만 필요합니다.
+    거래일시를 날짜로 해석할 수 없는 거래(year_month가 NULL)는 트리거와 마찬가지로 집계에서 제외합니다.
+    """
+    try:
+        with write_connection(db_path, conn) as conn:
+            conn.execute('DELETE FROM "monthly_rollup"')
+            cursor = conn.execute("""
+                INSERT INTO "monthly_rollup"
+                    (year_month, type, category_id, account_id, transaction_type, total_amount, tx_count)
+                SELECT year_month, type, category_id, account_id, transaction_type,
+                       COALESCE(SUM(transaction_amount), 0), COUNT(*)
+                FROM "transaction"
+                WHERE year_month IS NOT NULL
+                GROUP BY year_month, type, category_id, account_id, transaction_type
+            """)
+            conn.execute('ANALYZE "monthly_rollup"')
+            return cursor.rowcount, "월별 집계를 성공적으로 다시 만들었습니다."
+    except Exception as e:
+        return 0, f"오류 발생: {e}"
+
 
 def update_init_balance_and_log(account_id, change_amount, conn):
     cursor = conn.cursor()
@@ -189,10 +257,49 @@ def update_balance_and_log(account_id, change_amount, reason, conn):
                    """, (account_id, now_str, previous_balance, change_amount, new_balance, reason))
 
 
-def reclassify_expense(transaction_id, linked_account_id, db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        try:
+def post_balance_changes(changes, conn):
+    """
+    update_balance_and_log의 일괄 버전입니다.
+    changes(account_id, change_amount, reason)를 순서대로 적용한 것과 같은 이력을 남기되,
+    accounts는 계좌별 합계로 한 번씩만 UPDATE 합니다.
+    """
+    if changes.empty:
+        return
+
+    cursor = conn.cursor()
+    changes = changes.astype({'account_id': int, 'change_amount': int})
+    account_ids = [int(a) for a in changes['account_id'].unique()]
+
+    # 1. 관련 계좌의 현재 잔액을 한 번에 가져옴
+    placeholders = ', '.join(['?'] * len(account_ids))
+    balances = dict(cursor.execute(f"SELECT id, balance FROM accounts WHERE id IN ({placeholders})",
+                                   account_ids).fetchall())
+    missing = set(account_ids) - set(balances)
+    if missing:
+        raise ValueError(f"Account with ID {sorted(missing)} not found.")
+
+    # 2. 계좌별 누적합으로 각 변동 시점의 이전/이후 잔액 계산
+    new_balance = changes['account_id'].map(balances) + changes.groupby('account_id')['change_amount'].cumsum()
+    history = changes.assign(new_balance=new_balance, previous_balance=new_balance - changes['change_amount'])
+
+    # 3. 계좌별 합계로 잔액 갱신 + 이력 일괄 기록
+    totals = changes.groupby('account_id')['change_amount'].sum()
+    cursor.executemany("UPDATE accounts SET balance = balance + ? WHERE id = ?",
+                       [(int(total), int(account_id)) for account_id, total in totals.items()])
+
+    now_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    cursor.executemany("""
+                       INSERT INTO account_balance_history (account_id, change_date, previous_balance, change_amount,
+                                                            new_balance, reason)
+                       VALUES (?, ?, ?, ?, ?, ?)
+                       """, [(int(r.account_id), now_str, int(r.previous_balance), int(r.change_amount),
+                              int(r.new_balance), r.reason) for r in history.itertuples(index=False)])
+
+
+def reclassify_expense(transaction_id, linked_account_id, db_path=config.DB_PATH, conn=None):
+    try:
+        with write_connection(db_path, conn) as conn:
+            cursor = conn.cursor()
             # 1. 변경할 거래의 금액과 현재 타입을 확인
             cursor.execute("SELECT transaction_amount, type FROM \"transaction\" WHERE id = ?", (int(transaction_id),))
             trans_result = cursor.fetchone()
@@ -222,9 +329,10 @@ def reclassify_expense(transaction_id, linked_account_id, db_path=config.DB_PATH
 
 
 
-            # 3. 거래 내역 업데이트
+            # 3. 거래 내역 업데이트 (더 이상 분류 규칙으로 정한 카테고리가 아니므로 분류 근거를 지움)
             cursor.execute(
-                "UPDATE \"transaction\" SET type = ?, category_id = ?, linked_account_id = ? WHERE id = ?",
+                "UPDATE \"transaction\" SET type = ?, category_id = ?, linked_account_id = ?, "
+                "rule_id = NULL, rule_version = NULL WHERE id = ?",
                 (new_type, new_category_id, int(linked_account_id), int(transaction_id))
             )
 
@@ -233,17 +341,15 @@ def reclassify_expense(transaction_id, linked_account_id, db_path=config.DB_PATH
 
             # 4. 은행 계좌의 잔액은 변경할 필요 없음 (이미 출금 시 반영됨)
 
-            conn.commit()
-            return True, f"ID {transaction_id}가 '{new_type}'(으)로 성공적으로 재분류되었습니다."
-        except Exception as e:
-            conn.rollback()
-            return False, f"작업 중 오류 발생: {e}"
+        return True, f"ID {transaction_id}가 '{new_type}'(으)로 성공적으로 재분류되었습니다."
+    except Exception as e:
+        return False, f"작업 중 오류 발생: {e}"
 
 
-def add_new_account(name, account_type, is_asset, initial_balance, db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        try:
+def add_new_account(name, account_type, is_asset, initial_balance, db_path=config.DB_PATH, conn=None):
+    try:
+        with write_connection(db_path, conn) as conn:
+            cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO accounts (name, account_type, is_asset, initial_balance) VALUES (?, ?, ?, ?)",
                 (name, account_type, is_asset, initial_balance)
@@ -259,57 +365,57 @@ def add_new_account(name, account_type, is_asset, initial_balance, db_path=confi
             #                    """,
             #                    (new_account_id, now_str, 0, initial_balance, initial_balance, "신규 계좌 생성 및 초기 잔액 설정"))
 
-            conn.commit()
-            return True, SUCCESS_MSG
-        except sqlite3.IntegrityError:
-            return False, f"오류: 계좌 이름 '{name}'이(가) 이미 존재합니다."
-        except Exception as e:
-            conn.rollback()
-            return False, f"오류 발생: {e}"
-
-
-def reclassify_all_transfers(db_path=config.DB_PATH):
-    """은행 지출 내역 전체를 대상으로 이체 규칙을 다시 적용합니다."""
-    with sqlite3.connect(db_path) as conn:
-        df = pd.read_sql_query("SELECT * FROM \"transaction\" WHERE transaction_type = 'BANK' AND type = 'EXPENSE'",
-                               conn)
-        if df.empty: return "재분류할 은행 지출 내역이 없습니다."
-
-        # 1. 규칙 엔진이 필요로 하는 '적요', '내용' 컬럼을 'content'에서 다시 분리
-        #    ' / '가 없는 경우를 대비해 예외 처리
-        if 'content' in df.columns:
-            split_content = df['content'].str.split(' / ', n=1, expand=True)
-            df['적요'] = split_content[0]
-            # 내용 컬럼이 없는 경우(split 결과가 1개 컬럼일 때)를 대비
-            if split_content.shape[1] > 1:
-                df['내용'] = split_content[1]
-            else:
-                df['내용'] = ''
-        # ------------------------------------
-
-        # 엔진 실행
-        linked_account_id_series = identify_transfers(df, db_path)
-        is_transfer_mask = (linked_account_id_series != 0) & (linked_account_id_series.notna())
-
-        # 변경 대상 ID와 연결 계좌 ID 추출
-        df_to_update = df[is_transfer_mask].copy()
-        df_to_update['linked_account_id'] = linked_account_id_series[is_transfer_mask]
+        return True, SUCCESS_MSG
+    except sqlite3.IntegrityError:
+        return False, f"오류: 계좌 이름 '{name}'이(가) 이미 존재합니다."
+    except Exception as e:
+        return False, f"오류 발생: {e}"
+
+
+# 은행 거래의 원문 컬럼 (업로드 엑셀 컬럼 이름 -> bank_transaction 컬럼), 이체 규칙 조건은 엑셀 컬럼 이름을 씀
+BANK_RAW_COLUMNS = {'적요': 'raw_summary', '내용': 'raw_content'}
+
+# 은행 거래를 업로드할 때 규칙 엔진이 본 컬럼 이름으로 읽는 FROM 절 (별칭 t)
+BANK_RULE_SOURCE = f"""
+    (SELECT t.*, {', '.join(f'b.{raw} AS "{name}"' for name, raw in BANK_RAW_COLUMNS.items())}
+     FROM "transaction" t
+              JOIN "bank_transaction" b ON b.id = t.id) t
+"""
 
+
+def _bank_rule_columns(conn):
+    return {row[1] for row in conn.execute("PRAGMA table_info(\"transaction\")")} | set(BANK_RAW_COLUMNS)
+
+
+def reclassify_all_transfers(db_path=config.DB_PATH, conn=None):
+    """
+    은행 지출 내역 전체를 대상으로 이체 규칙을 다시 적용합니다.
+    저장된 적요/내용 컬럼으로 이체 규칙을 SQL 하나로 평가해 거래를 파이썬으로 읽지 않고 UPDATE 합니다.
+    """
+    with write_connection(db_path, conn) as conn:
+        rule_set = get_rule_set(TRANSFER_RULE, db_path, conn)
+        register_rule_functions(conn)
+        match_sql, params = compile_rule_match_query(rule_set, _bank_rule_columns(conn),
+                                                     "t.transaction_type = 'BANK' AND t.type = 'EXPENSE'",
+                                                     source=BANK_RULE_SOURCE)
         card_payment_cat_id = conn.execute("SELECT id FROM category WHERE category_code = 'CARD_PAYMENT'").fetchone()[0]
 
-        # DB 업데이트
-        update_data = [(card_payment_cat_id, int(row['linked_account_id']), int(row['id'])) for _, row in
-                       df_to_update.iterrows()]
-        conn.executemany(
-            "UPDATE \"transaction\" SET type = 'TRANSFER', category_id = ?, linked_account_id = ? WHERE id = ?",
-            update_data)
+        # 연결 계좌가 지정된 규칙에 일치한 거래만 이체로 변경
+        cursor = conn.execute(f"""
+            UPDATE "transaction"
+            SET type = 'TRANSFER', category_id = ?, linked_account_id = tr.linked_account_id
+            FROM ({match_sql}) AS m
+                     JOIN transfer_rule tr ON tr.id = m.rule_id
+            WHERE "transaction".id = m.id
+              AND COALESCE(tr.linked_account_id, 0) != 0
+        """, [card_payment_cat_id, *params])
 
-        return f"총 {len(df_to_update)}건의 거래를 '이체'로 재분류했습니다."
+        return f"총 {cursor.rowcount}건의 거래를 '이체'로 재분류했습니다."
 
 
-def recategorize_uncategorized(db_path=config.DB_PATH):
+def recategorize_uncategorized(db_path=config.DB_PATH, conn=None):
     """'미분류'로 되어 있는 모든 거래에 대해 카테고리 규칙을 다시 적용합니다."""
-    with sqlite3.connect(db_path) as conn:
+    with write_connection(db_path, conn) as conn:
         # 수동으로 카테고리가 지정되지 않은, 미분류 거래만 가져옴
         uncategorized_df = pd.read_sql_query("""
                                              SELECT *
@@ -323,10 +429,149 @@ def recategorize_uncategorized(db_path=config.DB_PATH):
 
         # 규칙 엔진 실행
         default_cat_id = uncategorized_df['category_id'].iloc[0]  # 임의의 미분류 ID
-        categorized_df = run_rule_engine(uncategorized_df, default_cat_id, db_path)
+        categorized_df = run_rule_engine(uncategorized_df, default_cat_id, db_path, conn=conn)
 
         # 변경된 부분만 업데이트
-        update_data = [(int(row['category_id']), int(row['id'])) for _, row in categorized_df.iterrows()]
-        conn.executemany("UPDATE \"transaction\" SET category_id = ? WHERE id = ?", update_data)
-
-        return f"총 {len(categorized_df)}건의 거래에 카테고리 규칙을 재적용했습니다."
\ No newline at end of file
+        update_data = [(int(row['category_id']), _nullable_int(row['rule_id']), _nullable_int(row['rule_version']),
+                        int(row['id'])) for _, row in categorized_df.iterrows()]
+        conn.executemany("UPDATE \"transaction\" SET category_id = ?, rule_id = ?, rule_version = ? WHERE id = ?",
+                         update_data)
+
+        return f"총 {len(categorized_df)}건의 거래에 카테고리 규칙을 재적용했습니다."
+
+
+def _nullable_int(value):
+    return None if pd.isna(value) else int(value)
+
+
+def _select_affected_transactions(scope, changes, rule_set):
+    """
+    scope(id, rule_id, rule_version) 중 분류 이후 바뀐 규칙의 영향을 받을 수 있는 거래 ID를 반환합니다.
+    규칙은 우선순위 순으로 처음 일치한 것이 적용되므로, 거래의 규칙보다 뒤에 있는 규칙의 변경은 결과를 바꾸지 못합니다.
+    - rule_version이 없는 거래(분류 근거 기록 이전)
+    - 자기 규칙이 수정/삭제된 거래
+    - 일치 규칙이 없거나, 자기 규칙보다 앞선 위치에 바뀐 규칙이 있는 거래
+    """
+    ranks = {rule.id: position for position, rule in enumerate(rule_set.rules)}
+    # 일치 규칙이 없는 거래는 모든 규칙보다 뒤에 있는 것으로 봄
+    scope = scope.assign(rank=scope['rule_id'].map(ranks).fillna(len(rule_set.rules)))
+
+    affected = [scope.loc[scope['rule_version'].isna(), 'id']]
+    for version, group in scope[scope['rule_version'].notna()].groupby('rule_version'):
+        changed_ids = set(changes.loc[changes['version'] > version, 'rule_id'])
+        if not changed_ids:
+            continue
+        first_changed_rank = min((ranks[rule_id] for rule_id in changed_ids if rule_id in ranks),
+                                 default=len(rule_set.rules))
+        mask = group['rule_id'].isin(changed_ids) | (group['rank'] > first_changed_rank)
+        affected.append(group.loc[mask, 'id'])
+    return pd.concat(affected).astype(int).tolist()
+
+
+# 규칙 엔진이 카테고리를 정하는 거래: 수동 분류가 아닌 지출/수입 중 규칙으로 분류되었거나 (지출) 미분류인 거래
+# (이체/투자로 재분류된 거래는 분류 규칙 대상이 아니므로 제외)
+ENGINE_OWNED_FILTER = """
+    COALESCE(is_manual_category, 0) = 0 -- 수동 수정 제외
+    AND type IN ('EXPENSE', 'INCOME')
+    AND (rule_id IS NOT NULL OR category_id = ?)
+"""
+
+
+def get_default_expense_category_id(conn):
+    return (conn.execute(
+        "SELECT id FROM category WHERE category_code = 'UNCATEGORIZED' AND category_type = 'EXPENSE'").fetchone()
+            or [1])[0]
+
+
+# 규칙 엔진에 다시 넣을 거래를 읽는 컬럼 목록 (은행 거래는 '내용' 원문을 raw_content로 함께 읽음)
+ENGINE_COLUMNS = '*, (SELECT b.raw_content FROM "bank_transaction" b WHERE b.id = "transaction".id) AS raw_content'
+
+
+def _engine_content(df):
+    # 은행 거래는 '적요 / 내용'으로 저장되지만 업로드 시 규칙은 '내용'에만 적용했으므로 원문으로 되돌림
+    return df['raw_content'].fillna(df['content'])
+
+
+def recategorize_frame(df, default_cat_id, db_path=config.DB_PATH, conn=None):
+    """
+    DB에서 읽은 거래 DataFrame을 업로드 직후와 같은 상태로 되돌려 규칙 엔진을 다시 실행합니다.
+    (분류된 DataFrame, 카테고리나 분류 규칙이 바뀐 행의 마스크, 카테고리가 바뀐 건수)를 반환합니다.
+    """
+    before = df[['category_id', 'rule_id']].astype('Int64')
+
+    df['content'] = _engine_content(df)
+
+    # 규칙 적용 전 상태(지출 미분류)로 되돌린 뒤 규칙 엔진 실행
+    df['category_id'] = default_cat_id
+    df['rule_id'] = pd.NA
+    categorized_df = run_rule_engine(df, default_cat_id, db_path, conn=conn)
+
+    after = categorized_df[['category_id', 'rule_id']].astype('Int64')
+    changed = (before.fillna(-1) != after.fillna(-1)).any(axis=1).to_numpy()
+    category_changed = int((before['category_id'] != after['category_id']).sum())
+    return categorized_df, changed, category_changed
+
+
+def apply_recategorized_rows(conn, categorized_df):
+    """recategorize_frame에서 바뀐 행만 골라 넘긴 DataFrame을 UPDATE 합니다."""
+    update_data = categorized_df[['category_id', 'rule_id', 'rule_version', 'id']].astype(
+        {'category_id': 'int64', 'rule_id': 'Int64', 'rule_version': 'Int64', 'id': 'int64'}).astype(object)
+    update_data = update_data.where(update_data.notna(), None)
+    conn.executemany("UPDATE \"transaction\" SET category_id = ?, rule_id = ?, rule_version = ? WHERE id = ?",
+                     list(update_data.itertuples(index=False, name=None)))
+
+
+def recategorize_changed_rules(db_path=config.DB_PATH, conn=None):
+    """
+    마지막 분류 이후 추가/수정/삭제된 규칙의 영향을 받을 수 있는 거래만 다시 분류합니다.
+    대상은 규칙 엔진이 카테고리를 정하는 거래(ENGINE_OWNED_FILTER)이며,
+    카테고리나 분류 규칙이 실제로 바뀐 거래만 UPDATE 하고 나머지는 규칙 버전만 한 번에 갱신합니다.
+    """
+    with write_connection(db_path, conn) as conn:
+        default_cat_id = get_default_expense_category_id(conn)
+        rule_set = get_rule_set(RULE, db_path, conn)
+
+        scope = pd.read_sql_query(f"SELECT id, rule_id, rule_version FROM \"transaction\" WHERE {ENGINE_OWNED_FILTER}",
+                                  conn, params=(default_cat_id,))
+        min_version = scope['rule_version'].min()
+        changes = pd.read_sql_query("SELECT rule_id, version FROM rule_change WHERE version > ?", conn,
+                                    params=(int(min_version) if pd.notna(min_version) else -1,))
+
+        target_ids = _select_affected_transactions(scope, changes, rule_set)
+        if not target_ids:
+            return "바뀐 규칙의 영향을 받는 거래가 없습니다."
+
+        df = pd.read_sql_query(f"SELECT {ENGINE_COLUMNS} FROM \"transaction\" WHERE id IN (SELECT value FROM json_each(?))",
+                               conn, params=(json.dumps(target_ids),))
+        categorized_df, changed, category_changed = recategorize_frame(df, default_cat_id, db_path, conn)
+
+        apply_recategorized_rows(conn, categorized_df[changed])
+        # 결과가 같은 거래는 다음에 다시 평가하지 않도록 규칙 버전만 한 번에 갱신
+        conn.execute("UPDATE \"transaction\" SET rule_version = ? WHERE id IN (SELECT value FROM json_each(?))",
+                     (rule_set.version, json.dumps(categorized_df.loc[~changed, 'id'].astype(int).tolist())))
+
+        return f"{len(target_ids)}건의 거래를 다시 평가해 {category_changed}건의 카테고리를 변경했습니다."
+
+
+def collect_rule_stats(db_path=config.DB_PATH, conn=None):
+    """
+    저장된 거래에 분류/이체 규칙을 통계 기록 모드로 평가해 rule_stats에 'history'로 추가합니다. (거래는 바꾸지 않음)
+    분류 규칙은 규칙 엔진이 카테고리를 정하는 거래(ENGINE_OWNED_FILTER), 이체 규칙은 은행 거래 전체가 대상입니다.
+    """
+    stats = RuleStats('history')
+    with read_connection(db_path, conn) as read_conn:
+        default_cat_id = get_default_expense_category_id(read_conn)
+        owned_df = pd.read_sql_query(f"SELECT {ENGINE_COLUMNS} FROM \"transaction\" WHERE {ENGINE_OWNED_FILTER}",
+                                     read_conn, params=(default_cat_id,))
+        bank_df = pd.read_sql_query(f"SELECT * FROM {BANK_RULE_SOURCE} WHERE t.transaction_type = 'BANK'", read_conn)
+
+    if not owned_df.empty:
+        owned_df['content'] = _engine_content(owned_df)
+        owned_df['category_id'] = default_cat_id
+        run_rule_engine(owned_df, default_cat_id, db_path, stats=stats, conn=conn)
+    if not bank_df.empty:
+        identify_transfers(bank_df, db_path, stats=stats, conn=conn)
+
+    with write_connection(db_path, conn) as conn:
+        save_rule_stats(conn, stats)
+    return f"분류 대상 {len(owned_df)}건, 은행 거래 {len(bank_df)}건으로 규칙 통계를 기록했습니다."
\ No newline at end of file
@@ -1,13 +1,81 @@
-import sqlite3
-
 import numpy as np
 import pandas as pd
 
 import config
+from core.db_connection import read_connection
+
+# category 테이블에 저장된 경로 이름 컬럼 (db_manager.CATEGORY_LEVELS 단계)
+CATEGORY_LEVEL_COLUMNS = ['L1', 'L2', 'L3', 'L4']
+
+
+def _date_range(start_date, end_date):
+    """
+    DATE(transaction_date) BETWEEN start_date AND end_date와 같은 범위를 반열린 구간 [시작일, 종료일 다음 날)로 바꿉니다.
+    transaction_date를 함수로 감싸지 않고 문자열 그대로 비교하므로 (…, transaction_date) 인덱스 범위 검색이 됩니다.
+    """
+    start = pd.Timestamp(start_date).strftime('%Y-%m-%d')
+    end = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    return start, end
+
 
+def _month_key_range(start_date, end_date):
+    """
+    DATE(transaction_date) BETWEEN start_date AND end_date를 생성 컬럼 조건
+    'year_month BETWEEN ? AND ? AND date_key BETWEEN ? AND ?'의 파라미터로 바꿉니다.
+    year_month 범위로 (…, year_month, date_key, …) 인덱스를 연월 순서대로 읽고, date_key로 시작/종료일을 자릅니다.
+    """
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    return start.strftime('%Y-%m'), end.strftime('%Y-%m'), int(start.strftime('%Y%m%d')), int(end.strftime('%Y%m%d'))
+
+
+def _monthly_rollup_source(start_date, end_date, types):
+    """
+    [start_date, end_date] 기간의 월별 집계 행 (year_month, type, category_id, account_id, transaction_type,
+    total_amount, tx_count)을 돌려주는 서브쿼리와 파라미터를 만듭니다.
+    기간에 온전히 포함된 달은 monthly_rollup에서 읽고, 시작/종료일이 달 중간이면 그 달만 거래에서 직접 집계합니다.
+    """
+    start, end = pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize()
+    head_month = start.strftime('%Y-%m') if start.day != 1 else None
+    tail_month = end.strftime('%Y-%m') if not end.is_month_end else None
+    full_from = (start + pd.offsets.MonthBegin(0 if head_month is None else 1)).strftime('%Y-%m')
+    full_to = (end - pd.offsets.MonthEnd(0 if tail_month is None else 1)).strftime('%Y-%m')
+
+    placeholders = ', '.join('?' * len(types))
+    query = f"""
+        SELECT year_month, type, category_id, account_id, transaction_type, total_amount, tx_count
+        FROM "monthly_rollup"
+        WHERE type IN ({placeholders}) AND year_month BETWEEN ? AND ?
+        UNION ALL
+        SELECT year_month, type, category_id, account_id, transaction_type,
+               COALESCE(SUM(transaction_amount), 0), COUNT(*)
+        FROM "transaction"
+        WHERE type IN ({placeholders}) AND year_month IN (?, ?) AND date_key BETWEEN ? AND ?
+        GROUP BY year_month, type, category_id, account_id, transaction_type
+    """
+    params = (*types, full_from, full_to,
+              *types, head_month, tail_month, int(start.strftime('%Y%m%d')), int(end.strftime('%Y%m%d')))
+    return query, params
 
-def load_data_from_db(start_date, end_date, transaction_types: list = None, cat_types: list = None, db_path=config.DB_PATH):
-    conn = sqlite3.connect(db_path)
+
+def _category_level_names(conn, first_level, last_level):
+    """클로저 테이블로 카테고리별 first_level..last_level 단계의 이름 컬럼(L5, L6, ...)을 만듭니다."""
+    query = """
+        SELECT cc.descendant_id as id, lvl.level, a.description
+        FROM category_closure cc
+                 JOIN category a ON a.id = cc.ancestor_id
+                 JOIN (SELECT descendant_id, MAX(depth) + 1 as level
+                       FROM category_closure
+                       GROUP BY descendant_id) lvl ON lvl.descendant_id = cc.ancestor_id
+        WHERE lvl.level BETWEEN ? AND ?
+    """
+    names = pd.read_sql_query(query, conn, params=(first_level, last_level))
+    wide = names.pivot(index='id', columns='level', values='description')
+    wide = wide.reindex(columns=range(first_level, last_level + 1))
+    wide.columns = [f'L{level}' for level in wide.columns]
+    return wide.reset_index()
+
+
+def load_data_from_db(start_date, end_date, transaction_types: list = None, cat_types: list = None, db_path=config.DB_PATH, conn=None):
     query = """
             SELECT 
             t.id, t.transaction_type, t.transaction_date, t.content, t.transaction_amount, t.description, t.type, 
@@ -16,10 +84,10 @@ def load_data_from_db(start_date, end_date, transaction_types: list = None, cat_
         FROM "transaction" t
         LEFT JOIN "category" c ON t.category_id = c.id
         LEFT JOIN "transaction_party" p ON t.transaction_party_id = p.id
-        WHERE DATE(t.transaction_date) BETWEEN ? AND ?        
+        WHERE t.transaction_date >= ? AND t.transaction_date < ?
             """
 
-    params = (start_date, end_date)
+    params = _date_range(start_date, end_date)
 
     if transaction_types:
         placeholders = ', '.join(['?'] * len(transaction_types))
@@ -34,18 +102,17 @@ def load_data_from_db(start_date, end_date, transaction_types: list = None, cat_
 
     query += " ORDER BY t.transaction_date DESC"
 
-    try:
-        df = pd.read_sql_query(query, conn, params=params)
-    except Exception as e:
-        print(f"데이터 로드 오류: {e}")
-        df = pd.DataFrame()
-    finally:
-        conn.close()
+    with read_connection(db_path, conn) as conn:
+        try:
+            df = pd.read_sql_query(query, conn, params=params)
+        except Exception as e:
+            print(f"데이터 로드 오류: {e}")
+            df = pd.DataFrame()
     return df
 
 
-def get_all_categories(category_type: str = None, include_top_level: bool = False, db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
+def get_all_categories(category_type: str = None, include_top_level: bool = False, db_path=config.DB_PATH, conn=None):
+    with read_connection(db_path, conn) as conn:
         base_query = "SELECT id, description FROM category"
         conditions = []
         params = []
@@ -67,80 +134,60 @@ def get_all_categories(category_type: str = None, include_top_level: bool = Fals
             return {}
 
 
-def load_data_for_sunburst(start_date, end_date, db_path=config.DB_PATH, transaction_type='EXPENSE'):
-    conn = sqlite3.connect(db_path)
-    try:
-        categories_df = pd.read_sql_query("SELECT * FROM category", conn)
-        query = "SELECT category_id, SUM(transaction_amount) as direct_amount FROM \"transaction\" WHERE type = ? AND DATE(transaction_date) BETWEEN ? AND ? GROUP BY category_id"
-        direct_spending = pd.read_sql_query(query, conn, params=(transaction_type, start_date, end_date))
-
-        df = pd.merge(categories_df, direct_spending, left_on='id', right_on='category_id', how='left', validate="one_to_one" )
-        df['direct_amount'] = df['direct_amount'].fillna(0)
+def load_data_for_sunburst(start_date, end_date, db_path=config.DB_PATH, transaction_type='EXPENSE', conn=None):
+    with read_connection(db_path, conn) as conn:
+        # 카테고리별 직접 금액과, 클로저 테이블로 모든 하위 카테고리 금액을 더한 합계
+        query = """
+            WITH direct AS (SELECT category_id, SUM(transaction_amount) as direct_amount
+                            FROM "transaction"
+                            WHERE type = ? AND transaction_date >= ? AND transaction_date < ?
+                            GROUP BY category_id)
+            SELECT c.*,
+                   d.category_id,
+                   COALESCE(d.direct_amount, 0) as direct_amount,
+                   total.total_amount
+            FROM category c
+                     LEFT JOIN direct d ON d.category_id = c.id
+                     JOIN (SELECT cc.ancestor_id, SUM(sub.direct_amount) as total_amount
+                           FROM category_closure cc
+                                    JOIN direct sub ON sub.category_id = cc.descendant_id
+                           GROUP BY cc.ancestor_id) total ON total.ancestor_id = c.id
+            WHERE total.total_amount > 0
+            ORDER BY c.id
+        """
+        df = pd.read_sql_query(query, conn, params=(transaction_type, *_date_range(start_date, end_date)))
         df['parent_id'] = pd.to_numeric(df['parent_id'], errors='coerce').fillna(0).astype(int)
+        return df
 
-        total_amounts = df.set_index('id')['direct_amount'].to_dict()
-        sorted_df = df.sort_values(by='depth', ascending=False)
-        for _, row in sorted_df.iterrows():
-            cat_id, parent_id = row['id'], row['parent_id']
-            if parent_id != 0 and parent_id in total_amounts:
-                total_amounts[parent_id] += total_amounts[cat_id]
-
-        df['total_amount'] = df['id'].map(total_amounts)
-
-        final_df = df[df['total_amount'] > 0].copy()
-        return final_df
-    finally:
-        conn.close()
-
-
-def load_data_for_pivot_grid(start_date, end_date, db_path=config.DB_PATH, transaction_type='EXPENSE'):
-    conn = sqlite3.connect(db_path)
-    try:
-        # 1. 카테고리 테이블 전체 로드
-        all_categories_df = pd.read_sql_query("SELECT id, parent_id, description FROM category", conn)
-
-        # 2. parent_id의 타입을 int로 강제 변환하여 타입 불일치 문제 해결
-        all_categories_df['parent_id'] = pd.to_numeric(all_categories_df['parent_id'], errors='coerce').fillna(
-            0).astype(int)
-
-        # 3. 이제 id와 parent_id의 타입이 동일하므로, 맵이 정확하게 생성됨
-        id_to_desc_map = all_categories_df.set_index('id')['description'].to_dict()
-        id_to_parent_map = all_categories_df.set_index('id')['parent_id'].to_dict()
-        # ------------------------------------
 
-        # 4. 거래 내역 로드
-        query = """
-                SELECT strftime('%Y-%m', t.transaction_date) as "연월",
-                       t.transaction_amount                  as "금액",
+def load_data_for_pivot_grid(start_date, end_date, db_path=config.DB_PATH, transaction_type='EXPENSE', conn=None):
+    with read_connection(db_path, conn) as conn:
+        # 거래 내역과 카테고리 경로 이름(L1..L4)을 함께 로드
+        query = f"""
+                SELECT t.year_month         as "연월",
+                       t.transaction_amount as "금액",
                        c.id, \
-                       c.depth
+                       c.depth, \
+                       {', '.join(f'c.{column}' for column in CATEGORY_LEVEL_COLUMNS)}
                 FROM "transaction" t
                          JOIN "category" c ON t.category_id = c.id
                 WHERE t.type = ? \
-                  AND DATE(t.transaction_date) BETWEEN ? AND ? \
+                  AND t.year_month BETWEEN ? AND ? AND t.date_key BETWEEN ? AND ? \
                 """
-        df = pd.read_sql_query(query, conn, params=(transaction_type, start_date, end_date))
+        df = pd.read_sql_query(query, conn, params=(transaction_type, *_month_key_range(start_date, end_date)))
         if df.empty: return pd.DataFrame()
 
-        # 5. 경로 생성
+        # 경로 컬럼은 가장 깊은 카테고리의 단계까지만 남기고, 4단계보다 깊으면 클로저 테이블에서 채움
         max_depth = int(df['depth'].max())
-        for i in range(1, max_depth + 1): df[f'L{i}'] = None
-
-        for index, row in df.iterrows():
-            path_names = []
-            temp_id = row['id']
-            while temp_id != 0 and temp_id in id_to_parent_map:
-                path_names.insert(0, id_to_desc_map.get(temp_id, ""))
-                temp_id = id_to_parent_map.get(temp_id, 0)
-            for i in range(len(path_names)):
-                df.loc[index, f'L{i + 1}'] = path_names[i]
-        return df
-    finally:
-        conn.close()
+        if max_depth > len(CATEGORY_LEVEL_COLUMNS):
+            df = df.merge(_category_level_names(conn, len(CATEGORY_LEVEL_COLUMNS) + 1, max_depth), on='id', how='left')
+        level_columns = [f'L{i}' for i in range(1, max_depth + 1)]
+        df[level_columns] = df[level_columns].astype(object).where(df[level_columns].notna(), None)
+        return df[['연월', '금액', 'id', 'depth', *level_columns]]
 
 
-def get_all_parties(db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
+def get_all_parties(db_path=config.DB_PATH, conn=None):
+    with read_connection(db_path, conn) as conn:
         try:
             df = pd.read_sql_query("SELECT id, description FROM transaction_party ORDER BY description", conn)
             df['description'] = df['description'].fillna(df['id'].astype(str))
@@ -150,104 +197,89 @@ def get_all_parties(db_path=config.DB_PATH):
             return {}
 
 
-def load_monthly_total_spending(start_date, end_date, db_path=config.DB_PATH, transaction_type='EXPENSE'):
-    conn = sqlite3.connect(db_path)
-    query = """
+def load_monthly_total_spending(start_date, end_date, db_path=config.DB_PATH, transaction_type='EXPENSE', conn=None):
+    source, params = _monthly_rollup_source(start_date, end_date, [transaction_type])
+    query = f"""
     SELECT
-        strftime('%Y-%m', transaction_date) AS year_month,
-        SUM(transaction_amount) AS total_spending
-    FROM "transaction"
-    WHERE type = ? AND DATE(transaction_date) BETWEEN ? AND ?
+        year_month,
+        SUM(total_amount) AS total_spending
+    FROM ({source})
     GROUP BY year_month
     ORDER BY year_month;
     """
-    df = pd.read_sql_query(query, conn, params=(transaction_type, start_date, end_date))
-    conn.close()
+    with read_connection(db_path, conn) as conn:
+        df = pd.read_sql_query(query, conn, params=params)
     return df
 
 
-def get_all_parties_df(db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
+def get_all_parties_df(db_path=config.DB_PATH, conn=None):
+    with read_connection(db_path, conn) as conn:
         return pd.read_sql_query("SELECT * FROM transaction_party ORDER BY id", conn)
 
 
-def get_all_categories_with_hierarchy(db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
-        df = pd.read_sql_query("SELECT * FROM category ORDER BY materialized_path_desc", conn)
+def get_all_categories_with_hierarchy(db_path=config.DB_PATH, conn=None):
+    with read_connection(db_path, conn) as conn:
+        # 조상 이름을 최상위부터 '/'로 이어 붙인 이름 경로 (클로저 테이블을 깊은 조상부터 읽음)
+        query = """
+            SELECT c.*,
+                   (SELECT group_concat(description, '/')
+                    FROM (SELECT a.description
+                          FROM category_closure cc
+                                   JOIN category a ON a.id = cc.ancestor_id
+                          WHERE cc.descendant_id = c.id
+                          ORDER BY cc.depth DESC)) as name_path
+            FROM category c
+            ORDER BY c.materialized_path_desc
+        """
+        df = pd.read_sql_query(query, conn)
         if df.empty: return pd.DataFrame()
-
-        id_to_desc_map = df.set_index('id')['description'].to_dict()
-        id_to_parent_map = pd.to_numeric(df.set_index('id')['parent_id'], errors='coerce').fillna(0).astype(
-            int).to_dict()
-
-        path_names_list = []
-        for index, row in df.iterrows():
-            path_names = []
-            temp_id = row['id']
-            while temp_id != 0 and temp_id in id_to_parent_map:
-                path_names.insert(0, id_to_desc_map.get(temp_id, ""))
-                temp_id = id_to_parent_map.get(temp_id, 0)
-            # --- 여기가 수정되었습니다 ---
-            # 각 행에 대한 이름 경로를 리스트에 저장
-            path_names_list.append("/".join(path_names))
-
-        # DataFrame에 새로운 'name_path' 컬럼을 한 번에 추가
-        df['name_path'] = path_names_list
-        # ----------------------------
         return df
 
 
-def load_income_expense_summary(start_date, end_date, db_path=config.DB_PATH):
-    conn = sqlite3.connect(db_path)
-    try:
-        query = """
+def load_income_expense_summary(start_date, end_date, db_path=config.DB_PATH, conn=None):
+    with read_connection(db_path, conn) as conn:
+        source, params = _monthly_rollup_source(start_date, end_date, ['INCOME', 'EXPENSE'])
+        query = f"""
             SELECT
-                strftime('%Y-%m', transaction_date) as "연월",
-                SUM(CASE WHEN type = 'INCOME' THEN transaction_amount ELSE 0 END) as "수입",
-                SUM(CASE WHEN type = 'EXPENSE' THEN transaction_amount ELSE 0 END) as "지출"
-            FROM "transaction"
-            WHERE DATE(transaction_date) BETWEEN ? AND ?
-              AND type IN ('INCOME', 'EXPENSE')
+                year_month as "연월",
+                SUM(CASE WHEN type = 'INCOME' THEN total_amount ELSE 0 END) as "수입",
+                SUM(CASE WHEN type = 'EXPENSE' THEN total_amount ELSE 0 END) as "지출"
+            FROM ({source})
             GROUP BY "연월"
             ORDER BY "연월"
         """
-        df = pd.read_sql_query(query, conn, params=(start_date, end_date))
+        df = pd.read_sql_query(query, conn, params=params)
         return df
-    finally:
-        conn.close()
 
 
-def load_monthly_category_summary(start_date, end_date, transaction_type, db_path=config.DB_PATH):
+def load_monthly_category_summary(start_date, end_date, transaction_type, db_path=config.DB_PATH, conn=None):
 
-    conn = sqlite3.connect(db_path)
-    try:
+    with read_connection(db_path, conn) as conn:
         # 최하위 카테고리(depth가 가장 높은)의 지출/수입만 집계
-        query = """
+        source, params = _monthly_rollup_source(start_date, end_date, [transaction_type])
+        query = f"""
             SELECT
-                strftime('%Y-%m', t.transaction_date) as "연월",
+                r.year_month as "연월",
                 c.description as "카테고리",
-                SUM(t.transaction_amount) as "금액"
-            FROM "transaction" t
-            JOIN "category" c ON t.category_id = c.id
-            WHERE t.type = ? AND DATE(t.transaction_date) BETWEEN ? AND ?
-              AND c.id NOT IN (SELECT DISTINCT parent_id FROM category WHERE parent_id IS NOT NULL)
+                SUM(r.total_amount) as "금액"
+            FROM ({source}) r
+            JOIN "category" c ON r.category_id = c.id
+            WHERE c.id NOT IN (SELECT DISTINCT parent_id FROM category WHERE parent_id IS NOT NULL)
             GROUP BY "연월", "카테고리"
         """
-        df = pd.read_sql_query(query, conn, params=(transaction_type, start_date, end_date))
+        df = pd.read_sql_query(query, conn, params=params)
         return df
-    finally:
-        conn.close()
 
 
-def get_account_id_by_name(account_name, db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
+def get_account_id_by_name(account_name, db_path=config.DB_PATH, conn=None):
+    with read_connection(db_path, conn) as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT id FROM accounts WHERE name = ?", (account_name,))
         result = cursor.fetchone()
         return result[0] if result else None
 
-def get_all_accounts(account_type: str = None, db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
+def get_all_accounts(account_type: str = None, db_path=config.DB_PATH, conn=None):
+    with read_connection(db_path, conn) as conn:
         query = "SELECT id, name FROM accounts"
         params = ()
         if account_type:
@@ -262,39 +294,39 @@ def get_all_accounts(account_type: str = None, db_path=config.DB_PATH):
             print(f"계좌 목록 로드 오류: {e}")
             return {}
 
-def get_bank_expense_transactions(start_date, end_date, db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
+def get_bank_expense_transactions(start_date, end_date, db_path=config.DB_PATH, conn=None):
+    with read_connection(db_path, conn) as conn:
         query = """
             SELECT id, transaction_date, content, transaction_amount
             FROM "transaction"
             WHERE type = 'EXPENSE' 
               AND transaction_type = 'BANK'
-              AND DATE(transaction_date) BETWEEN ? AND ?
+              AND transaction_date >= ? AND transaction_date < ?
             ORDER BY transaction_date DESC
         """
-        params = (start_date, end_date)
+        params = _date_range(start_date, end_date)
         return pd.read_sql_query(query, conn, params=params)
 
-def get_balance_history(account_id, db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
+def get_balance_history(account_id, db_path=config.DB_PATH, conn=None):
+    with read_connection(db_path, conn) as conn:
         query = "SELECT change_date, reason, previous_balance, change_amount, new_balance FROM account_balance_history WHERE account_id = ? ORDER BY change_date DESC"
         return pd.read_sql_query(query, conn, params=(account_id,))
 
-def get_init_balance(account_id, db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
+def get_init_balance(account_id, db_path=config.DB_PATH, conn=None):
+    with read_connection(db_path, conn) as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT balance, initial_balance FROM accounts WHERE id = ?",(account_id,))
         result = cursor.fetchone()
         return result if result else None
 
-def get_investment_accounts(db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
+def get_investment_accounts(db_path=config.DB_PATH, conn=None):
+    with read_connection(db_path, conn) as conn:
         # STOCK_ASSET, FUND, CRYPTO 등 투자와 관련된 타입만 선택
         query = "SELECT * FROM accounts WHERE is_investment = 1"
         return pd.read_sql_query(query, conn)
 
-def get_all_accounts_df(db_path=config.DB_PATH):
-    with sqlite3.connect(db_path) as conn:
+def get_all_accounts_df(db_path=config.DB_PATH, conn=None):
+    with read_connection(db_path, conn) as conn:
         try:
             # is_asset 컬럼을 '자산'/'부채' 텍스트로 변환하여 가독성 높임
             query = """
@@ -315,16 +347,16 @@ def get_all_accounts_df(db_path=config.DB_PATH):
             return pd.DataFrame()
 
 
-def get_monthly_summary_for_dashboard(db_path=config.DB_PATH):
+def get_monthly_summary_for_dashboard(db_path=config.DB_PATH, conn=None):
     """종합 대시보드를 위한 월별 수입, 지출, 기말 자산 데이터를 집계합니다."""
-    with sqlite3.connect(db_path) as conn:
-        # 1. 월별 수입, 지출, 투자액 집계
+    with read_connection(db_path, conn) as conn:
+        # 1. 월별 수입, 지출, 투자액 집계 (전체 기간이므로 월별 집계 테이블만 읽음)
         flow_query = """
-                     SELECT strftime('%Y-%m', transaction_date)                                as "연월", \
-                            SUM(CASE WHEN type = 'INCOME' THEN transaction_amount ELSE 0 END)  as "수입", \
-                            SUM(CASE WHEN type = 'EXPENSE' THEN transaction_amount ELSE 0 END) as "지출", \
-                            SUM(CASE WHEN type = 'INVEST' THEN transaction_amount ELSE 0 END)  as "투자"
-                     FROM "transaction"
+                     SELECT year_month                                                   as "연월", \
+                            SUM(CASE WHEN type = 'INCOME' THEN total_amount ELSE 0 END)  as "수입", \
+                            SUM(CASE WHEN type = 'EXPENSE' THEN total_amount ELSE 0 END) as "지출", \
+                            SUM(CASE WHEN type = 'INVEST' THEN total_amount ELSE 0 END)  as "투자"
+                     FROM "monthly_rollup"
                      GROUP BY "연월" \
                      """
         flow_df = pd.read_sql_query(flow_query, conn)
@@ -356,54 +388,28 @@ def get_monthly_summary_for_dashboard(db_path=config.DB_PATH):
         return summary_df
 
 
-def get_annual_summary_data(year: int, db_path=config.DB_PATH):
+def get_annual_summary_data(year: int, db_path=config.DB_PATH, conn=None):
     """
     연간 요약 대시보드를 위한 데이터를 반환합니다. (수정된 최종 버전)
     """
-    with sqlite3.connect(db_path) as conn:
+    with read_connection(db_path, conn) as conn:
         try:
-            # 1. 모든 카테고리 정보를 미리 로드 (경로 생성을 위한 지도)
-            all_categories_df = pd.read_sql_query("SELECT id, parent_id, description FROM category", conn)
-            all_categories_df['parent_id'] = pd.to_numeric(all_categories_df['parent_id'], errors='coerce').fillna(
-                0).astype(int)
-            id_to_desc_map = all_categories_df.set_index('id')['description'].to_dict()
-            id_to_parent_map = all_categories_df.set_index('id')['parent_id'].to_dict()
-
-            # 2. 지정된 연도의 거래 내역만 가져옴
+            # 지정된 연도의 거래 내역과 카테고리 경로의 '구분'(L1), '항목'(L2)을 함께 가져옴
             query = """
-                    SELECT strftime('%Y/%m', transaction_date) as "연월", \
-                           transaction_amount                  as "금액", \
-                           category_id
-                    FROM "transaction"
-                    WHERE type IN ('INCOME', 'EXPENSE', 'INVEST')
-                      AND strftime('%Y', transaction_date) = ? \
+                    SELECT COALESCE(c.L1, '미분류')             as "구분", \
+                           COALESCE(c.L2, c.L1, '미분류')       as "항목", \
+                           replace(t.year_month, '-', '/') as "연월", \
+                           t.transaction_amount            as "금액"
+                    FROM "transaction" t
+                             LEFT JOIN "category" c ON c.id = t.category_id
+                    WHERE t.type IN ('INCOME', 'EXPENSE', 'INVEST')
+                      AND t.year_month BETWEEN ? AND ? \
                     """
-            df = pd.read_sql_query(query, conn, params=(str(year),))
+            df = pd.read_sql_query(query, conn, params=(f"{int(year):04d}-01", f"{int(year):04d}-12"))
             if df.empty:
                 return pd.DataFrame()
 
-            # 3. Python에서 각 거래의 카테고리 경로(L1, L2)를 직접 생성
-            l1_list = []
-            l2_list = []
-            for cat_id in df['category_id']:
-                path_names = []
-                temp_id = cat_id
-                while temp_id != 0 and temp_id in id_to_parent_map:
-                    path_names.insert(0, id_to_desc_map.get(temp_id, ""))
-                    temp_id = id_to_parent_map.get(temp_id, 0)
-
-                # 경로 길이에 따라 L1, L2 할당
-                l1 = path_names[0] if len(path_names) > 0 else '미분류'
-                l2 = path_names[1] if len(path_names) > 1 else l1  # L2가 없으면 L1 이름 사용
-
-                l1_list.append(l1)
-                l2_list.append(l2)
-
-            # 4. 최종 DataFrame에 '구분'(L1)과 '항목'(L2) 컬럼 추가
-            df['구분'] = l1_list
-            df['항목'] = l2_list
-
-            return df[['구분', '항목', '연월', '금액']]
+            return df
 
         except Exception as e:
             print(f"연간 요약 데이터 로드 오류: {e}")
@@ -412,9 +418,9 @@ def get_annual_summary_data(year: int, db_path=config.DB_PATH):
 
 
 
-def get_annual_asset_summary(year: int, db_path=config.DB_PATH):
+def get_annual_asset_summary(year: int, db_path=config.DB_PATH, conn=None):
 
-    with sqlite3.connect(db_path) as conn:
+    with read_connection(db_path, conn) as conn:
         # 1. 모든 자산 계좌의 기본 정보(초기 잔액 포함)를 가져옴
         accounts_df = pd.read_sql_query(
             "SELECT id, name, initial_balance, DATETIME('1777-01-11 01:01:01') as initial_balance_date FROM accounts ",
@@ -481,4 +487,39 @@ def get_annual_asset_summary(year: int, db_path=config.DB_PATH):
         all_months_of_year = [f"{year}/{str(m).zfill(2)}" for m in range(1, 13)]
         report_df = report_df.reindex(columns=all_months_of_year).fillna(0)
 
-        return report_df.astype(np.int64)
\ No newline at end of file
+        return report_df.astype(np.int64)
+
+def get_rule_stats_summary(db_path=config.DB_PATH, conn=None):
+    """
+    rule_stats에 쌓인 규칙별 통계를 규칙마다 합산해 반환합니다. (규칙 설명/조건 포함)
+    상태: 일치 0건이면 '적용 없음', 그중 조건은 맞았으나 항상 상위 규칙에 가려졌으면 '항상 가려짐'
+    """
+    with read_connection(db_path, conn) as conn:
+        df = pd.read_sql_query("""
+            SELECT s.rule_kind, s.rule_id,
+                   COALESCE(r.description, tr.description) AS description,
+                   COALESCE(r.priority, tr.priority) AS priority,
+                   CASE WHEN s.rule_kind = 'rule' THEN (SELECT group_concat(column_to_check || ' ' || match_type || ' ' || value, ' & ')
+                                                        FROM rule_condition WHERE rule_id = s.rule_id)
+                        ELSE (SELECT group_concat(column_to_check || ' ' || match_type || ' ' || value, ' & ')
+                              FROM transfer_rule_condition WHERE rule_id = s.rule_id) END AS conditions,
+                   r.id IS NULL AND tr.id IS NULL AS deleted,
+                   COUNT(*) AS runs,
+                   SUM(s.evaluated_rows) AS evaluated_rows,
+                   SUM(s.matched_rows) AS matched_rows,
+                   SUM(s.shadowed_rows) AS shadowed_rows,
+                   SUM(s.seconds) AS seconds,
+                   MAX(s.recorded_at) AS last_recorded_at
+            FROM rule_stats s
+                     LEFT JOIN "rule" r ON s.rule_kind = 'rule' AND r.id = s.rule_id
+                     LEFT JOIN transfer_rule tr ON s.rule_kind = 'transfer_rule' AND tr.id = s.rule_id
+            WHERE s.rule_id IS NOT NULL
+            GROUP BY s.rule_kind, s.rule_id
+            ORDER BY s.rule_kind, priority, s.rule_id
+        """, conn)
+
+    df['us_per_row'] = (df['seconds'] / df['evaluated_rows'].where(df['evaluated_rows'] > 0) * 1e6).round(2)
+    df['status'] = np.select(
+        [df['deleted'] == 1, (df['matched_rows'] == 0) & (df['shadowed_rows'] > 0), df['matched_rows'] == 0],
+        ['삭제됨', '항상 가려짐', '적용 없음'], default='')
+    return df
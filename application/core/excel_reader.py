@@ -0,0 +1,112 @@
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# 한 번에 DataFrame으로 만드는 행 수 (메모리 사용량의 상한을 결정)
+CHUNK_SIZE = 5000
+
+XLSX_SIGNATURE = b'PK\x03\x04'
+
+
+def _is_xlsx(filepath):
+    """파일 앞부분의 zip 시그니처로 xlsx 여부를 판별합니다. (xls는 스트리밍 불가)"""
+    if hasattr(filepath, 'read'):
+        position = filepath.tell()
+        head = filepath.read(4)
+        filepath.seek(position)
+    else:
+        with open(filepath, 'rb') as f:
+            head = f.read(4)
+    return head == XLSX_SIGNATURE
+
+
+def _convert_value(value):
+    # pandas(openpyxl 엔진)와 같이 빈 셀은 "", 정수 값의 실수는 int로 변환
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _to_frame(rows, columns, dtype):
+    # pd.read_excel과 같은 파서를 사용해 결측값/숫자 타입 추론 결과를 맞춤
+    # (타입 추론은 청크마다 따로 하므로, 청크 경계에 따라 달라지면 안 되는 컬럼은 dtype으로 고정)
+    return TextParser(rows, header=None, names=columns, dtype=dtype).read()
+
+
+def _select_columns(header, usecols):
+    """usecols(위치 리스트 또는 헤더 이름을 받는 함수)에 해당하는 컬럼 위치를 반환합니다."""
+    if usecols is None:
+        return list(range(len(header)))
+    if callable(usecols):
+        return [i for i, name in enumerate(header) if name is not None and usecols(str(name))]
+    return list(usecols)
+
+
+def _stream_xlsx(filepath, skiprows, usecols, names, dtype, chunk_size):
+    from openpyxl import load_workbook
+
+    if hasattr(filepath, 'seek'):
+        filepath.seek(0)
+    workbook = load_workbook(filepath, read_only=True, data_only=True, keep_links=False)
+    sheet = workbook.worksheets[0]
+    sheet.reset_dimensions()
+    rows = sheet.iter_rows(min_row=skiprows + 1, values_only=True)
+
+    header = next(rows, None)
+    if header is None:
+        workbook.close()
+        return iter(())
+
+    positions = _select_columns(header, usecols)
+    columns = names if names is not None else [str(header[i]).strip() for i in positions]
+
+    def generate():
+        try:
+            buffer = []
+            for row in rows:
+                values = [_convert_value(row[i]) if i < len(row) else '' for i in positions]
+                if all(v == '' for v in values):
+                    continue
+                buffer.append(values)
+                if len(buffer) >= chunk_size:
+                    yield _to_frame(buffer, columns, dtype)
+                    buffer = []
+            if buffer:
+                yield _to_frame(buffer, columns, dtype)
+        finally:
+            workbook.close()
+
+    return generate()
+
+
+def _header_dtype(filepath, skiprows, dtype):
+    """앞뒤 공백을 제거한 컬럼 이름 기준의 dtype을 파일의 실제 헤더 이름 기준으로 바꿉니다."""
+    header = pd.read_excel(filepath, skiprows=skiprows, nrows=0).columns
+    if hasattr(filepath, 'seek'):
+        filepath.seek(0)
+    return {name: dtype[str(name).strip()] for name in header if str(name).strip() in dtype}
+
+
+def read_excel_chunks(filepath, skiprows=0, usecols=None, names=None, chunk_size=CHUNK_SIZE, dtype=None):
+    """
+    엑셀 파일의 첫 시트를 chunk_size 행 단위 DataFrame으로 나눠 반환하는 이터레이터입니다.
+    xlsx는 openpyxl read-only 모드로 행을 순차적으로 읽어 필요한 컬럼(usecols)만 보관하므로
+    파일 크기와 관계없이 메모리 사용량이 일정합니다.
+    chunk_size가 None이거나 xls 파일이면 pd.read_excel로 한 번에 읽어 하나의 DataFrame을 반환합니다.
+
+    dtype: {컬럼 이름: 타입} (names가 없으면 앞뒤 공백을 제거한 헤더 이름 기준)
+           승인번호처럼 문자열로 바꿔 키로 쓰는 컬럼은 object로 지정해야 빈 셀이 섞인 청크에서도
+           float('123.0')으로 추론되지 않아, 청크 경계나 파일 전체 읽기 여부와 관계없이 같은 값이 됩니다.
+
+    파일 열기/헤더 읽기 오류는 호출 시점에 바로 발생합니다.
+    """
+    if chunk_size is None or not _is_xlsx(filepath):
+        if dtype is not None and names is None:
+            dtype = _header_dtype(filepath, skiprows, dtype)
+        df = pd.read_excel(filepath, skiprows=skiprows, usecols=usecols, names=names, dtype=dtype)
+        if names is None:
+            df.columns = df.columns.astype(str).str.strip()
+        return iter([df])
+
+    return _stream_xlsx(filepath, skiprows, usecols, names, dtype, chunk_size)
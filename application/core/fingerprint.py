@@ -0,0 +1,71 @@
+import hashlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# 은행 거래 중복 판별용 64비트 지문 (거래일시, 부호 있는 금액(입금 +, 출금 -), 거래 후 잔액, '적요 / 내용' 원문)
+# 같은 시각 같은 금액의 입금과 출금, 잔액이 없는 파일의 같은 시각 같은 금액 거래가 서로 다른 지문을 갖도록
+# 방향과 원문을 함께 섞음
+# 엑셀에서 읽은 DataFrame은 bank_fingerprints()로 한 번에, 기존 DB 행은 bank_fingerprint()로 한 행씩 계산하며
+# 두 함수는 항상 같은 값을 반환해야 합니다. (splitmix64 섞기 함수 사용)
+
+_MASK = (1 << 64) - 1
+_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9)
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _mix(x):
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK
+    return x ^ (x >> 31)
+
+
+def _mix_array(x):
+    # uint64 배열 연산은 2^64로 나눈 나머지로 계산됨
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _to_int(value):
+    try:
+        return 0 if value is None or pd.isna(value) else int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _text_hash(text):
+    return int.from_bytes(hashlib.blake2b(str(text).encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def bank_fingerprint(transaction_date, transaction_amount, balance_amount, content=None):
+    """
+    거래 한 건의 지문을 계산합니다. SQLite 사용자 함수로도 등록되어 마이그레이션에서 기존 행을 채울 때 사용합니다.
+    transaction_date: 'YYYY-MM-DD HH:MM:SS' 문자열, transaction_amount: 입금은 양수, 출금은 음수
+    content가 없으면 원문을 섞지 않은 (v7에서 쓰던) 지문을 반환합니다.
+    """
+    seconds = int((datetime.strptime(transaction_date, '%Y-%m-%d %H:%M:%S') - _EPOCH).total_seconds())
+    h = _mix((seconds + _SEEDS[0]) & _MASK)
+    h = _mix(h ^ ((_to_int(transaction_amount) + _SEEDS[1]) & _MASK))
+    h = _mix(h ^ ((_to_int(balance_amount) + _SEEDS[2]) & _MASK))
+    if content is not None:
+        h = _mix(h ^ _text_hash(content))
+    # SQLite INTEGER(부호 있는 64비트) 범위로 변환
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+
+def bank_fingerprints(transaction_dates, transaction_amounts, balance_amounts, contents):
+    """bank_fingerprint를 Series 단위로 벡터 연산해 int64 배열로 반환합니다. (원문 해시만 행마다 계산)"""
+    seconds = ((pd.to_datetime(transaction_dates, format='%Y-%m-%d %H:%M:%S') - pd.Timestamp(_EPOCH))
+               // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+    amounts = pd.to_numeric(transaction_amounts, errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+    balances = pd.to_numeric(balance_amounts, errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+    texts = np.fromiter((_text_hash(text) for text in contents), dtype=np.uint64, count=len(contents))
+
+    with np.errstate(over='ignore'):
+        h = _mix_array(seconds.astype(np.uint64) + np.uint64(_SEEDS[0]))
+        h = _mix_array(h ^ (amounts.astype(np.uint64) + np.uint64(_SEEDS[1])))
+        h = _mix_array(h ^ (balances.astype(np.uint64) + np.uint64(_SEEDS[2])))
+        h = _mix_array(h ^ texts)
+    return h.view(np.int64)
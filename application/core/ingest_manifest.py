@@ -0,0 +1,55 @@
+import hashlib
+from datetime import datetime
+
+
+class IngestFileStats:
+    """파일 하나를 읽는 동안 유효 행 수와 파싱 오류를 누적합니다. (manifest 기록용)"""
+
+    def __init__(self):
+        self.row_count = 0
+        self.error = None
+
+    def observe(self, transaction_dates):
+        self.row_count += len(transaction_dates)
+
+
+def file_content_hash(filepath):
+    """업로드 파일 객체 또는 경로의 내용으로 SHA-256을 계산합니다."""
+    if hasattr(filepath, 'getvalue'):
+        data = filepath.getvalue()
+    elif hasattr(filepath, 'read'):
+        position = filepath.tell()
+        filepath.seek(0)
+        data = filepath.read()
+        filepath.seek(position)
+    else:
+        with open(filepath, 'rb') as f:
+            data = f.read()
+    return hashlib.sha256(data).hexdigest()
+
+
+def find_manifest_entry(conn, file_hash):
+    """
+    같은 내용의 파일이 이미 처리되었다면 처리 이력을 dict로 반환합니다. (없으면 None)
+    키: provider, row_count(파일의 유효 행 수), inserted_rows, skipped_rows
+    """
+    row = conn.execute(
+        "SELECT provider, row_count, inserted_rows, skipped_rows FROM ingest_manifest WHERE file_hash = ?",
+        (file_hash,)).fetchone()
+    if row is None:
+        return None
+    return dict(zip(['provider', 'row_count', 'inserted_rows', 'skipped_rows'], row))
+
+
+def record_manifest(conn, file_hash, file_name, provider, stats, inserted_rows, skipped_rows):
+    """
+    파일 처리 결과를 기록합니다. 커밋은 호출하는 쪽에서 하며, 마지막 청크의 삽입과 같은 트랜잭션에서
+    기록해야 저장에 실패한 파일이 처리된 것으로 남지 않습니다.
+    """
+    conn.execute("""
+                 INSERT INTO ingest_manifest (file_hash, file_name, provider, row_count, inserted_rows,
+                                              skipped_rows, ingested_at)
+                 VALUES (?, ?, ?, ?, ?, ?, ?)
+                 ON CONFLICT (file_hash) DO NOTHING
+                 """, (file_hash, file_name, provider, stats.row_count, inserted_rows, skipped_rows,
+                       datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
@@ -0,0 +1,100 @@
+import time
+from datetime import datetime
+
+import pandas as pd
+
+# 업로드 처리 단계 (표시 순서)
+PARSE = 'parse'
+NORMALIZE = 'normalize'
+DEDUP = 'dedup'
+IDENTIFY_TRANSFERS = 'identify_transfers'
+RULE_ENGINE = 'run_rule_engine'
+WRITE = 'write'
+TOTAL = 'total'
+
+STAGE_LABELS = {
+    PARSE: '엑셀 읽기',
+    NORMALIZE: '정규화',
+    DEDUP: '중복 제거',
+    IDENTIFY_TRANSFERS: '이체 판별',
+    RULE_ENGINE: '규칙 엔진',
+    WRITE: 'DB 저장',
+    TOTAL: '전체',
+}
+
+
+class StageTiming:
+    """한 단계의 누적 소요 시간과 입출력 행 수"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.rows_in = 0
+        self.rows_out = 0
+
+    @property
+    def rows_per_sec(self):
+        return self.rows_in / self.seconds if self.seconds > 0 else None
+
+
+class IngestReport:
+    """
+    파일 하나를 업로드하는 동안 단계별 소요 시간을 누적합니다.
+    각 단계는 started = time.perf_counter()로 시작 시각을 잡아 두었다가 add()로 기록하며, 청크마다 합산됩니다.
+    rule_stats(RuleStats)가 있으면 규칙 엔진/이체 판별의 규칙별 통계도 함께 누적합니다.
+    """
+
+    def __init__(self, file_name=None, provider=None, rule_stats=None):
+        self.file_name = file_name
+        self.provider = provider
+        self.rule_stats = rule_stats
+        self.stages = {}
+        self.inserted_rows = 0
+        self.skipped_rows = 0
+        self.started = time.perf_counter()
+        self.total_seconds = None
+
+    def add(self, stage, started, rows_in, rows_out):
+        timing = self.stages.setdefault(stage, StageTiming())
+        timing.seconds += time.perf_counter() - started
+        timing.rows_in += rows_in
+        timing.rows_out += rows_out
+
+    def merge(self, other):
+        """다른 IngestReport(다른 프로세스에서 누적한 단계 등)의 단계별 시간과 행 수를 합산합니다."""
+        for stage, timing in other.stages.items():
+            merged = self.stages.setdefault(stage, StageTiming())
+            merged.seconds += timing.seconds
+            merged.rows_in += timing.rows_in
+            merged.rows_out += timing.rows_out
+
+    def finish(self, inserted_rows, skipped_rows):
+        self.inserted_rows = inserted_rows
+        self.skipped_rows = skipped_rows
+        self.total_seconds = time.perf_counter() - self.started
+
+    def timings(self):
+        """(단계, StageTiming) 목록을 표시 순서대로 반환합니다. 마지막은 파일 전체(TOTAL)입니다."""
+        total = StageTiming()
+        total.seconds = self.total_seconds or 0.0
+        total.rows_in = self.stages[PARSE].rows_out if PARSE in self.stages else 0
+        total.rows_out = self.inserted_rows
+        return [(stage, self.stages[stage]) for stage in STAGE_LABELS if stage in self.stages] + [(TOTAL, total)]
+
+    def to_frame(self):
+        return pd.DataFrame([{
+            '단계': STAGE_LABELS[stage],
+            '소요 시간(초)': round(timing.seconds, 4),
+            '입력 행': timing.rows_in,
+            '출력 행': timing.rows_out,
+            '초당 처리 행': round(timing.rows_per_sec) if timing.rows_per_sec else None,
+        } for stage, timing in self.timings()])
+
+
+def save_ingest_report(conn, report):
+    """단계별 결과를 ingest_metrics 테이블에 추가합니다. 커밋은 호출하는 쪽에서 합니다."""
+    recorded_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    conn.executemany("""
+                     INSERT INTO ingest_metrics (file_name, provider, stage, seconds, rows_in, rows_out, recorded_at)
+                     VALUES (?, ?, ?, ?, ?, ?, ?)
+                     """, [(report.file_name, report.provider, stage, timing.seconds, timing.rows_in, timing.rows_out,
+                            recorded_at) for stage, timing in report.timings()])
@@ -0,0 +1,215 @@
+import argparse
+import io
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import config
+from core.data_processor import iter_categorized_card_chunks, write_card_chunk, load_bank_context, \
+    iter_categorized_bank_chunks, write_bank_chunk, CARD_PROVIDERS, BANK_PROVIDER, \
+    detect_card_company, mark_last
+from core.db_connection import get_connection, read_connection
+from core.excel_reader import CHUNK_SIZE
+from core.ingest_metrics import IngestReport, WRITE
+from core.ingest_manifest import IngestFileStats, file_content_hash, find_manifest_entry, record_manifest
+from core.rule_stats import RuleStats
+
+CARD = 'card'
+BANK = 'bank'
+
+# 파일마다 writer가 가져가기 전까지 쌓아 둘 수 있는 청크 수 (워커 하나의 메모리 사용량 상한을 결정)
+MAX_QUEUED_CHUNKS = 2
+# writer가 청크를 기다리면서 워커 프로세스가 끝났는지 확인하는 간격 (초)
+QUEUE_POLL_SECONDS = 0.5
+
+
+class PreparedFile:
+    """워커가 파일 하나를 다 보낸 뒤 writer에게 넘기는 처리 결과 (청크는 큐로 따로 보냄)"""
+
+    def __init__(self, file_hash, provider, report):
+        self.file_hash = file_hash
+        self.provider = provider
+        self.report = report
+        self.stats = IngestFileStats()
+        self.already_ingested = False
+        self.error = None
+
+
+def _prepare_file(kind, name, data, db_path, chunk_size, chunk_queue, record_rule_stats=False):
+    """
+    워커 프로세스에서 실행: 파일 하나를 파싱하고 규칙 엔진까지 적용한 (DataFrame, 중복 건수)를 청크마다
+    chunk_queue에 넣고, 마지막에 None을 넣은 뒤 PreparedFile을 반환합니다.
+    큐가 가득 차면 writer가 가져갈 때까지 기다리므로 파일 전체를 메모리에 모으지 않습니다.
+    DB는 읽기만 합니다. 이미 처리된 파일이면 파싱하지 않습니다.
+    """
+    filepath = io.BytesIO(data)
+    filepath.name = name
+    provider = CARD_PROVIDERS[detect_card_company(name)] if kind == CARD else BANK_PROVIDER
+    rule_stats = RuleStats(name) if record_rule_stats else None
+    prepared = PreparedFile(file_content_hash(filepath), provider, IngestReport(name, provider, rule_stats))
+    try:
+        with read_connection(db_path) as conn:
+            if find_manifest_entry(conn, prepared.file_hash):
+                prepared.already_ingested = True
+                return prepared
+
+        if kind == CARD:
+            chunks = iter_categorized_card_chunks(filepath, db_path, chunk_size, prepared.stats, prepared.report)
+        else:
+            context = load_bank_context(db_path)
+            if context is None:
+                prepared.error = "필수 계좌 또는 카테고리 ID를 DB에서 찾을 수 없습니다."
+                return prepared
+            chunks = iter_categorized_bank_chunks(filepath, context, db_path, chunk_size, prepared.stats,
+                                                  prepared.report)
+
+        for df, skipped in chunks:
+            chunk_queue.put((df, skipped))
+        prepared.error = prepared.stats.error
+    except Exception as e:
+        prepared.error = str(e)
+    finally:
+        chunk_queue.put(None)
+    return prepared
+
+
+def _receive_chunks(future, chunk_queue):
+    """
+    워커가 큐에 넣은 (DataFrame, 중복 건수)를 종료 표시(None)가 올 때까지 차례로 반환합니다.
+    워커 프로세스가 종료 표시 없이 끝나면(비정상 종료 등) 그 예외를 발생시킵니다.
+    """
+    worker_done = False
+    while True:
+        try:
+            message = chunk_queue.get(timeout=QUEUE_POLL_SECONDS)
+        except queue.Empty:
+            if worker_done:
+                future.result()
+                return
+            # 끝났다면 그 전에 넣은 청크는 이미 큐에 있으므로 한 번 더 확인
+            worker_done = future.done()
+            continue
+        if message is None:
+            return
+        yield message
+
+
+def run_ingest_pipeline(files, kind, db_path=config.DB_PATH, max_workers=None, chunk_size=CHUNK_SIZE,
+                        record_rule_stats=False):
+    """
+    여러 엑셀 파일을 프로세스 풀에서 동시에 파싱/분류하고, 결과는 현재 프로세스의 단일 writer가
+    업로드 순서대로 커밋합니다. 파일마다 (파일명, 삽입 건수, 중복 건수, 오류 메시지, IngestReport)를
+    처리 즉시 반환하는 제너레이터입니다.
+
+    워커는 분류가 끝난 청크를 파일별 큐(최대 MAX_QUEUED_CHUNKS개)로 writer에게 보내므로,
+    메모리에는 파일 전체가 아니라 파일마다 몇 개의 청크만 올라갑니다.
+    청크마다 커밋하고 처리 이력은 파일의 마지막 청크와 같은 트랜잭션에 기록합니다. (순차 처리와 같음)
+
+    files: name 속성과 getvalue()를 가진 업로드 파일 객체 (streamlit UploadedFile 등)
+    kind: CARD 또는 BANK
+    record_rule_stats: True면 파일마다 IngestReport.rule_stats에 규칙별 통계를 누적
+
+    워커는 config.MP_START_METHOD(spawn)로 시작하므로 호출하는 스크립트의 모듈 최상위에서 바로 실행하지 말고
+    함수 안에서 호출해야 합니다. (streamlit 페이지는 __main__이 아니므로 그대로 호출해도 됩니다)
+    """
+    if not files:
+        return
+
+    max_workers = max_workers or min(len(files), os.cpu_count() or 1)
+    context = multiprocessing.get_context(config.MP_START_METHOD)
+
+    with context.Manager() as manager, ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+        queues = [manager.Queue(MAX_QUEUED_CHUNKS) for _ in files]
+        futures = [pool.submit(_prepare_file, kind, f.name, f.getvalue(), db_path, chunk_size, chunk_queue,
+                               record_rule_stats) for f, chunk_queue in zip(files, queues)]
+
+        bank_account_id = None
+        if kind == BANK:
+            context = load_bank_context(db_path)
+            bank_account_id = context['bank_account_id'] if context else None
+
+        conn = get_connection(db_path)
+        try:
+            for f, future, chunk_queue in zip(files, futures, queues):
+                chunks = _receive_chunks(future, chunk_queue)
+                inserted_rows, skipped_rows, error = 0, 0, None
+                write_report = IngestReport()
+
+                # 이미 처리된 파일 (같은 배치의 앞 파일이 방금 기록했을 수도 있음): 워커가 보낸 청크는 버림
+                entry = find_manifest_entry(conn, file_content_hash(f))
+                if entry:
+                    for _ in chunks:
+                        pass
+                    report = future.result().report
+                    report.finish(0, entry['row_count'])
+                    yield f.name, 0, entry['row_count'], None, report
+                    continue
+
+                try:
+                    # 처리 이력은 마지막 청크와 같은 트랜잭션으로 커밋 (저장에 실패한 파일은 기록하지 않음)
+                    for (df, skipped), is_last in mark_last(chunks):
+                        skipped_rows += skipped
+                        if not df.empty:
+                            started = time.perf_counter()
+                            if kind == CARD:
+                                chunk_inserted, chunk_skipped = write_card_chunk(df, conn)
+                            else:
+                                chunk_inserted, chunk_skipped = write_bank_chunk(df, conn, bank_account_id)
+                            write_report.add(WRITE, started, len(df), chunk_inserted)
+                            inserted_rows += chunk_inserted
+                            skipped_rows += chunk_skipped
+                        if not is_last:
+                            conn.commit()
+                    prepared = future.result()
+                    error = prepared.error
+                    if error is None:
+                        record_manifest(conn, prepared.file_hash, f.name, prepared.provider, prepared.stats,
+                                        inserted_rows, skipped_rows)
+                    conn.commit()
+                    report = prepared.report
+                except Exception as e:
+                    conn.rollback()
+                    error = f"데이터 처리 중 오류 발생: {e}"
+                    # 워커가 끝날 수 있도록 남은 청크를 버리고, 워커가 결과를 돌려주지 못했으면 writer 쪽 기록만 남김
+                    for _ in chunks:
+                        pass
+                    report = IngestReport(f.name) if future.exception() else future.result().report
+                report.merge(write_report)
+                report.finish(inserted_rows, skipped_rows)
+                yield f.name, inserted_rows, skipped_rows, error, report
+        finally:
+            conn.close()
+
+
+def _open_upload(path):
+    """업로드 파일 객체처럼 name과 getvalue()를 가진 파일 객체"""
+    with open(path, 'rb') as f:
+        uploaded = io.BytesIO(f.read())
+    uploaded.name = os.path.basename(path)
+    return uploaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="여러 명세서 파일을 병렬로 업로드")
+    parser.add_argument('kind', choices=[CARD, BANK], help="명세서 종류")
+    parser.add_argument('files', nargs='+', help="엑셀 파일 경로 (업로드 순서대로 저장)")
+    parser.add_argument('--db', default=config.DB_PATH, help="DB 경로")
+    parser.add_argument('--workers', type=int, default=None, help="워커 프로세스 수")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name, inserted_count, skipped_count, error, _ in run_ingest_pipeline(
+            [_open_upload(path) for path in args.files], args.kind, db_path=args.db, max_workers=args.workers):
+        if error:
+            failed = True
+            print(f"{name}: {error}")
+        else:
+            print(f"{name}: {inserted_count}건 저장, {skipped_count}건 스킵")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import config
+from core.db_connection import get_connection, read_connection
+from core.db_manager import ENGINE_OWNED_FILTER, ENGINE_COLUMNS, get_default_expense_category_id, \
+    recategorize_frame, apply_recategorized_rows
+
+# 워커 하나가 한 번에 읽고 분류하는 거래 수
+RECATEGORIZE_CHUNK_SIZE = 20_000
+
+
+class RecategorizeProgress:
+    """재분류 작업의 진행 상황 (청크 하나가 저장될 때마다 갱신)"""
+
+    def __init__(self, total_rows, total_chunks):
+        self.total_rows = total_rows
+        self.total_chunks = total_chunks
+        self.done_rows = 0
+        self.done_chunks = 0
+        self.changed_rows = 0
+        self.category_changed = 0
+
+    @property
+    def fraction(self):
+        return self.done_rows / self.total_rows if self.total_rows else 1.0
+
+
+class ChunkResult:
+    """워커가 writer에게 넘기는 id 구간 하나의 분류 결과 (바뀐 행만 포함)"""
+
+    def __init__(self, first_id, last_id, evaluated_rows, changes, category_changed, rule_version):
+        self.first_id = first_id
+        self.last_id = last_id
+        self.evaluated_rows = evaluated_rows
+        self.changes = changes
+        self.category_changed = category_changed
+        self.rule_version = rule_version
+
+
+def _id_ranges(conn, default_cat_id, chunk_size):
+    """재분류 대상 거래를 chunk_size건씩 나눈 (첫 id, 마지막 id, 건수) 목록을 반환합니다. (id만 읽음)"""
+    ids = np.array([row[0] for row in conn.execute(
+        f"SELECT id FROM \"transaction\" WHERE {ENGINE_OWNED_FILTER} ORDER BY id", (default_cat_id,))], dtype='int64')
+    return [(int(chunk[0]), int(chunk[-1]), len(chunk)) for chunk in
+            (ids[start:start + chunk_size] for start in range(0, len(ids), chunk_size))]
+
+
+def _categorize_range(db_path, first_id, last_id, default_cat_id):
+    """
+    워커 프로세스에서 실행: id 구간의 대상 거래를 읽어 규칙 엔진을 다시 적용하고 바뀐 행만 반환합니다.
+    규칙 집합은 프로세스마다 한 번 컴파일되어 캐시되며, DB는 읽기만 합니다.
+    """
+    with read_connection(db_path) as conn:
+        df = pd.read_sql_query(
+            f"SELECT {ENGINE_COLUMNS} FROM \"transaction\" WHERE id BETWEEN ? AND ? AND {ENGINE_OWNED_FILTER}", conn,
+            params=(first_id, last_id, default_cat_id))
+    if df.empty:
+        return ChunkResult(first_id, last_id, 0, df, 0, None)
+
+    categorized_df, changed, category_changed = recategorize_frame(df, default_cat_id, db_path)
+    changes = categorized_df.loc[changed, ['id', 'category_id', 'rule_id', 'rule_version']]
+    return ChunkResult(first_id, last_id, len(df), changes, category_changed,
+                       categorized_df['rule_version'].iloc[0])
+
+
+def _apply_chunk(conn, result, default_cat_id):
+    """청크 하나의 결과를 쓰기 트랜잭션 하나로 저장합니다."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        # 결과가 같은 거래도 다시 평가할 필요가 없도록 규칙 버전을 먼저 구간 단위로 갱신
+        if result.rule_version is not None and pd.notna(result.rule_version):
+            cursor.execute(
+                f"UPDATE \"transaction\" SET rule_version = ? WHERE id BETWEEN ? AND ? AND {ENGINE_OWNED_FILTER}",
+                (int(result.rule_version), result.first_id, result.last_id, default_cat_id))
+        apply_recategorized_rows(conn, result.changes)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def run_recategorize_job(db_path=config.DB_PATH, max_workers=None, chunk_size=RECATEGORIZE_CHUNK_SIZE):
+    """
+    규칙 엔진이 카테고리를 정하는 모든 거래를 처음부터 다시 분류하는 제너레이터입니다.
+    1. 대상 거래를 id 구간 청크로 나누고
+    2. 프로세스 풀의 워커가 청크마다 거래를 직접 읽어(스트리밍) 캐시된 규칙 집합으로 분류한 뒤
+    3. 카테고리나 분류 규칙이 바뀐 행(id, category_id, ...)만 돌려주면
+    4. 현재 프로세스의 단일 writer가 청크마다 쓰기 트랜잭션 하나로 저장하고
+    5. 저장할 때마다 RecategorizeProgress를 반환합니다.
+
+    전체 테이블을 메모리에 올리지 않도록 동시에 처리 중인 청크는 워커 수의 두 배로 제한합니다.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+
+    with read_connection(db_path) as conn:
+        default_cat_id = get_default_expense_category_id(conn)
+        ranges = _id_ranges(conn, default_cat_id, chunk_size)
+
+    progress = RecategorizeProgress(sum(rows for _, _, rows in ranges), len(ranges))
+    if not ranges:
+        yield progress
+        return
+
+    pending_ranges = deque(ranges)
+    context = multiprocessing.get_context(config.MP_START_METHOD)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+        in_flight = deque()
+
+        def submit_next():
+            while pending_ranges and len(in_flight) < max_workers * 2:
+                first_id, last_id, _ = pending_ranges.popleft()
+                in_flight.append(pool.submit(_categorize_range, db_path, first_id, last_id, default_cat_id))
+
+        conn = get_connection(db_path)
+        try:
+            submit_next()
+            while in_flight:
+                result = in_flight.popleft().result()
+                submit_next()
+                _apply_chunk(conn, result, default_cat_id)
+
+                progress.done_rows += result.evaluated_rows
+                progress.done_chunks += 1
+                progress.changed_rows += len(result.changes)
+                progress.category_changed += result.category_changed
+                yield progress
+        finally:
+            conn.close()
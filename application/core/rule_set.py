@@ -0,0 +1,183 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+import config
+from core.aho_corasick import AhoCorasick
+from core.db_connection import read_connection
+
+# 규칙 종류 (rule_version.name 값과 같음)
+RULE = 'rule'
+TRANSFER_RULE = 'transfer_rule'
+
+# 조건 값을 한 번만 변환해 두는 함수 (없는 match_type은 문자열 그대로 사용)
+VALUE_PARSERS = {
+    'REGEX': lambda value: re.compile(value, re.IGNORECASE),
+    'GREATER_THAN': int,
+    'LESS_THAN': int,
+    'EQUALS': int,
+}
+
+# 규칙과 조건을 한 번의 조인으로 읽음 (우선순위, 규칙 ID, 조건 ID 순)
+_RULE_QUERIES = {
+    RULE: """
+          SELECT r.id, r.priority, r.category_id, c.column_to_check, c.match_type, c.value
+          FROM "rule" r
+                   LEFT JOIN rule_condition c ON c.rule_id = r.id
+          ORDER BY r.priority, r.id, c.id
+          """,
+    TRANSFER_RULE: """
+                   SELECT r.id, r.priority, r.linked_account_id, c.column_to_check, c.match_type, c.value
+                   FROM transfer_rule r
+                            LEFT JOIN transfer_rule_condition c ON c.rule_id = r.id
+                   ORDER BY r.priority, r.id, c.id
+                   """,
+}
+
+# 해시 조회로 평가할 수 있는 match_type (값이 같은지만 보는 조건)
+INDEXABLE_MATCH_TYPES = ('EXACT', 'EQUALS')
+# 숫자로 변환해 비교하는 match_type
+NUMERIC_MATCH_TYPES = ('GREATER_THAN', 'LESS_THAN', 'EQUALS')
+
+# (db_path, 규칙 종류) -> CompiledRuleSet
+_cache = {}
+
+
+class CompiledCondition:
+    def __init__(self, column, match_type, value):
+        self.column = column
+        self.match_type = match_type
+        self.value = value
+
+
+class CompiledRule:
+    """
+    target은 분류 규칙이면 category_id, 이체 규칙이면 linked_account_id입니다.
+    조건 값 변환에 실패한 규칙은 valid=False이며 어떤 거래에도 적용되지 않습니다.
+    """
+
+    def __init__(self, rule_id, priority, target):
+        self.id = rule_id
+        self.priority = priority
+        self.target = target
+        self.conditions = []
+        self.valid = True
+
+    @property
+    def index_signature(self):
+        """
+        모든 조건이 EXACT/EQUALS이고 컬럼이 겹치지 않으면 ((컬럼, match_type), ...)를, 아니면 None을 반환합니다.
+        같은 signature의 규칙들은 값 조합을 키로 한 번에 조회할 수 있습니다.
+        """
+        if not self.valid or not self.conditions:
+            return None
+        if any(cond.match_type not in INDEXABLE_MATCH_TYPES for cond in self.conditions):
+            return None
+        columns = [cond.column for cond in self.conditions]
+        if len(set(columns)) != len(columns):
+            return None
+        return tuple(sorted((cond.column, cond.match_type) for cond in self.conditions))
+
+
+class CompiledRuleSet:
+    """
+    우선순위 순으로 정렬된 규칙 목록과, 이 목록을 만들 때의 규칙 테이블 버전
+    contains_matchers: 컬럼별로 모든 CONTAINS 값을 모은 Aho-Corasick 오토마톤
+    exact_indexes: EXACT/EQUALS 조건만으로 된 규칙을 signature별로 모은 (조건 값..., rule_id) 키 테이블
+    condition_columns: 조건에 쓰이는 모든 컬럼
+    numeric_boundaries: 숫자 비교 조건이 있는 컬럼별 비교 값(중복 없이 정렬된 배열)
+    numeric_conditions: 숫자 비교 조건이 있는 컬럼별 (match_type, 값) 목록
+    numeric_thresholds: numeric_boundaries 중 숫자 비교 조건만 걸린 컬럼
+    """
+
+    def __init__(self, kind, version, rules):
+        self.kind = kind
+        self.version = version
+        self.rules = rules
+
+        contains_values = {}
+        for rule in rules:
+            for cond in rule.conditions:
+                if cond.match_type == 'CONTAINS':
+                    values = contains_values.setdefault(cond.column, [])
+                    if cond.value not in values:
+                        values.append(cond.value)
+        self.contains_matchers = {column: AhoCorasick(values) for column, values in contains_values.items()}
+
+        index_keys = {}
+        for rule in rules:
+            signature = rule.index_signature
+            if signature is None:
+                continue
+            values = {cond.column: cond.value for cond in rule.conditions}
+            index_keys.setdefault(signature, []).append(
+                {**{column: values[column] for column, _ in signature}, 'rule_id': rule.id})
+        self.exact_indexes = {signature: pd.DataFrame(keys) for signature, keys in index_keys.items()}
+
+        conditions = [cond for rule in rules for cond in rule.conditions]
+        self.condition_columns = sorted({cond.column for cond in conditions})
+        self.numeric_conditions = {}
+        for cond in conditions:
+            if cond.match_type in NUMERIC_MATCH_TYPES:
+                column_conditions = self.numeric_conditions.setdefault(cond.column, [])
+                if (cond.match_type, cond.value) not in column_conditions:
+                    column_conditions.append((cond.match_type, cond.value))
+        self.numeric_boundaries = {column: np.unique([value for _, value in column_conditions])
+                                   for column, column_conditions in self.numeric_conditions.items()}
+        self.numeric_thresholds = {
+            column: boundaries for column, boundaries in self.numeric_boundaries.items()
+            if all(cond.match_type in NUMERIC_MATCH_TYPES for cond in conditions if cond.column == column)}
+
+
+def get_rule_version(conn, kind):
+    """규칙/조건 테이블이 바뀔 때마다 트리거가 올리는 버전 값을 반환합니다."""
+    row = conn.execute("SELECT version FROM rule_version WHERE name = ?", (kind,)).fetchone()
+    return row[0] if row else None
+
+
+def compile_rule_set(conn, kind, version=None):
+    """규칙과 조건을 한 번에 읽어 match_type 정리, 값 변환, 정규식 컴파일까지 마친 CompiledRuleSet을 만듭니다."""
+    rules = []
+    for rule_id, priority, target, column, match_type, value in conn.execute(_RULE_QUERIES[kind]):
+        if not rules or rules[-1].id != rule_id:
+            rules.append(CompiledRule(rule_id, priority, target))
+        rule = rules[-1]
+        if column is None:
+            continue  # 조건이 없는 규칙
+
+        match_type = match_type.strip()  # 양 끝 공백을 제거하여 비교 안정성 확보
+        parser = VALUE_PARSERS.get(match_type)
+        try:
+            parsed_value = parser(value) if parser else value
+        except (ValueError, re.error) as e:
+            print(f"규칙 {rule_id}의 조건 값을 해석할 수 없어 규칙을 건너뜁니다: {match_type} {value!r} ({e})")
+            rule.valid = False
+            continue
+        rule.conditions.append(CompiledCondition(column, match_type, parsed_value))
+
+    return CompiledRuleSet(kind, version, rules)
+
+
+def get_rule_set(kind, db_path=config.DB_PATH, conn=None):
+    """
+    프로세스 안에 캐시된 CompiledRuleSet을 반환합니다.
+    규칙 테이블 버전이 캐시를 만들 때와 다르면 다시 읽어 캐시를 교체합니다.
+    conn을 넘기면 그 연결에서 읽으며, 커밋하지 않은 규칙 변경이 있을 수 있는 트랜잭션 도중에는 캐시에 넣지 않습니다.
+    """
+    with read_connection(db_path, conn) as read_conn:
+        version = get_rule_version(read_conn, kind)
+        cached = _cache.get((db_path, kind))
+        if cached is not None and version is not None and cached.version == version:
+            return cached
+
+        rule_set = compile_rule_set(read_conn, kind, version)
+        cacheable = version is not None and not (conn is not None and conn.in_transaction)
+
+    if cacheable:
+        _cache[(db_path, kind)] = rule_set
+    return rule_set
+
+
+def clear_rule_set_cache():
+    _cache.clear()
@@ -0,0 +1,102 @@
+import re
+from functools import lru_cache
+
+import pandas as pd
+
+# str.strip()이 제거하는 공백 문자 (SQLite trim()에 넘겨 EXACT 비교를 pandas와 맞춤)
+_WHITESPACE = ''.join(ch for ch in map(chr, range(0x3001)) if ch.isspace())
+
+
+@lru_cache(maxsize=256)
+def _compile_regex(pattern):
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def _regexp(pattern, value):
+    """SQLite의 'X REGEXP Y' 구문이 호출하는 함수 (규칙 엔진과 같이 대소문자 무시, 부분 일치)"""
+    if pattern is None or value is None:
+        return 0
+    return 1 if _compile_regex(pattern).search(str(value)) else 0
+
+
+def _rule_number(value):
+    """문자열로 저장된 값을 규칙 엔진의 pd.to_numeric(errors='coerce')와 같은 기준으로 숫자로 바꿉니다. (실패하면 NULL)"""
+    number = pd.to_numeric(value, errors='coerce')
+    return None if pd.isna(number) else number.item() if hasattr(number, 'item') else number
+
+
+def register_rule_functions(conn):
+    """규칙 조건을 SQL로 평가할 때 필요한 사용자 함수를 연결에 등록합니다."""
+    conn.create_function('REGEXP', 2, _regexp, deterministic=True)
+    conn.create_function('RULE_NUMBER', 1, _rule_number, deterministic=True)
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+# 조건 평가 전에 컬럼을 한 번만 변환해 두는 식 (종류 -> (SQL 식, 파라미터))
+# exact는 astype(str).str.strip(), number는 pd.to_numeric(errors='coerce')와 같은 기준
+_NORMALIZERS = {
+    'text': lambda column: (f"CAST({column} AS TEXT)", []),
+    'exact': lambda column: (f"trim(CAST({column} AS TEXT), ?)", [_WHITESPACE]),
+    'number': lambda column: (f"CASE WHEN typeof({column}) IN ('integer', 'real') THEN {column} "
+                              f"WHEN typeof({column}) = 'text' THEN RULE_NUMBER({column}) END", []),
+}
+
+# match_type -> (필요한 변환 종류, (변환된 컬럼, 조건 값) -> (SQL 조건식, 파라미터))
+SQL_CONDITION_BUILDERS = {
+    'CONTAINS': ('text', lambda column, value: (f"instr({column}, ?) > 0", [value])),
+    'EXACT': ('exact', lambda column, value: (f"{column} = ?", [value])),
+    'REGEX': ('text', lambda column, value: (
+        f"{column} REGEXP ?", [value.pattern if isinstance(value, re.Pattern) else value])),
+    'GREATER_THAN': ('number', lambda column, value: (f"{column} > ?", [value])),
+    'LESS_THAN': ('number', lambda column, value: (f"{column} < ?", [value])),
+    'EQUALS': ('number', lambda column, value: (f"{column} = ?", [value])),
+}
+
+
+def compile_rule_match_query(rule_set, columns, where='1', where_params=(), source='"transaction" t'):
+    """
+    CompiledRuleSet을 where 조건에 맞는 거래마다 (id, rule_id)를 돌려주는 SELECT 하나로 컴파일해 (SQL, 파라미터)를 반환합니다.
+    rule_id는 우선순위 순 'CASE WHEN 조건 THEN 규칙 ID ... END'로 구하며, 일치하는 규칙이 없으면 NULL입니다.
+    조건에 쓰이는 컬럼 변환(strip, 숫자 변환 등)은 MATERIALIZED CTE에서 행마다 한 번만 계산합니다.
+    columns는 source(별칭 t, 기본은 "transaction" 테이블)의 컬럼 목록입니다. 규칙 엔진이 DataFrame에 없는 컬럼을
+    조회할 때처럼 없는 컬럼을 쓰는 규칙이 있으면 KeyError를 발생시키고, 알 수 없는 match_type을 쓰는 규칙과
+    값 변환에 실패한 규칙은 일치하지 않으므로 제외합니다.
+    """
+    for rule in rule_set.rules:
+        missing = [cond.column for cond in rule.conditions if cond.column not in columns]
+        if missing:
+            raise KeyError(f"규칙 {rule.id}의 조건 컬럼이 대상에 없습니다: {', '.join(missing)}")
+
+    derived = {}  # (컬럼, 변환 종류) -> 별칭
+    branches, case_params = [], []
+    for rule in rule_set.rules:
+        if not rule.valid:
+            continue
+        predicates, rule_params = [], []
+        for cond in rule.conditions:
+            if cond.match_type not in SQL_CONDITION_BUILDERS:
+                break
+            kind, builder = SQL_CONDITION_BUILDERS[cond.match_type]
+            alias = derived.setdefault((cond.column, kind), f"c{len(derived)}")
+            predicate, values = builder(f"n.{alias}", cond.value)
+            predicates.append(f"({predicate})")
+            rule_params.extend(values)
+        else:
+            branches.append(f"WHEN {' AND '.join(predicates) or '1'} THEN ?")
+            case_params.extend(rule_params + [rule.id])
+
+    select_list, derived_params = ["t.id"], []
+    for (column, kind), alias in derived.items():
+        expression, values = _NORMALIZERS[kind](f"t.{_quote(column)}")
+        select_list.append(f"{expression} AS {alias}")
+        derived_params.extend(values)
+
+    case_sql = "CASE " + " ".join(branches) + " END" if branches else "NULL"
+    sql = f"""
+        WITH n AS MATERIALIZED (SELECT {', '.join(select_list)} FROM {source} WHERE {where})
+        SELECT n.id, {case_sql} AS rule_id FROM n
+    """
+    return sql, [*derived_params, *where_params, *case_params]
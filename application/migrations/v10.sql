@@ -0,0 +1,62 @@
+-- 거래를 분류한 규칙 기록 (증분 재분류용)
+-- rule_id: 카테고리를 정한 규칙 ID (일치한 규칙이 없으면 NULL, 삭제된 규칙도 그대로 남음)
+-- rule_version: 분류할 때의 규칙 테이블 버전 (rule_version.version), NULL이면 기록 이전 거래
+ALTER TABLE "transaction" ADD COLUMN rule_id INTEGER;
+ALTER TABLE "transaction" ADD COLUMN rule_version INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_transaction_rule_id ON "transaction" (rule_id);
+CREATE INDEX IF NOT EXISTS idx_transaction_rule_version ON "transaction" (rule_version);
+
+-- 규칙이 추가/수정/삭제될 때마다 (규칙 ID, 변경 후 버전)을 남김
+-- 거래의 rule_version보다 큰 version의 규칙만 다시 평가하면 됨
+CREATE TABLE IF NOT EXISTS "rule_change" (
+    id INTEGER PRIMARY KEY,
+    rule_id INTEGER NOT NULL,
+    version INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_rule_change_version ON "rule_change" (version);
+
+-- v9의 분류 규칙 트리거를 버전 증가와 변경 기록을 함께 하는 트리거로 교체
+DROP TRIGGER IF EXISTS trg_rule_insert;
+DROP TRIGGER IF EXISTS trg_rule_update;
+DROP TRIGGER IF EXISTS trg_rule_delete;
+DROP TRIGGER IF EXISTS trg_rule_condition_insert;
+DROP TRIGGER IF EXISTS trg_rule_condition_update;
+DROP TRIGGER IF EXISTS trg_rule_condition_delete;
+
+CREATE TRIGGER IF NOT EXISTS trg_rule_insert AFTER INSERT ON "rule"
+BEGIN
+    UPDATE "rule_version" SET version = version + 1 WHERE name = 'rule';
+    INSERT INTO "rule_change" (rule_id, version) SELECT NEW.id, version FROM "rule_version" WHERE name = 'rule';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rule_update AFTER UPDATE ON "rule"
+BEGIN
+    UPDATE "rule_version" SET version = version + 1 WHERE name = 'rule';
+    INSERT INTO "rule_change" (rule_id, version) SELECT OLD.id, version FROM "rule_version" WHERE name = 'rule';
+    INSERT INTO "rule_change" (rule_id, version)
+    SELECT NEW.id, version FROM "rule_version" WHERE name = 'rule' AND NEW.id <> OLD.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rule_delete AFTER DELETE ON "rule"
+BEGIN
+    UPDATE "rule_version" SET version = version + 1 WHERE name = 'rule';
+    INSERT INTO "rule_change" (rule_id, version) SELECT OLD.id, version FROM "rule_version" WHERE name = 'rule';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rule_condition_insert AFTER INSERT ON "rule_condition"
+BEGIN
+    UPDATE "rule_version" SET version = version + 1 WHERE name = 'rule';
+    INSERT INTO "rule_change" (rule_id, version) SELECT NEW.rule_id, version FROM "rule_version" WHERE name = 'rule';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rule_condition_update AFTER UPDATE ON "rule_condition"
+BEGIN
+    UPDATE "rule_version" SET version = version + 1 WHERE name = 'rule';
+    INSERT INTO "rule_change" (rule_id, version) SELECT OLD.rule_id, version FROM "rule_version" WHERE name = 'rule';
+    INSERT INTO "rule_change" (rule_id, version)
+    SELECT NEW.rule_id, version FROM "rule_version" WHERE name = 'rule' AND NEW.rule_id <> OLD.rule_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rule_condition_delete AFTER DELETE ON "rule_condition"
+BEGIN
+    UPDATE "rule_version" SET version = version + 1 WHERE name = 'rule';
+    INSERT INTO "rule_change" (rule_id, version) SELECT OLD.rule_id, version FROM "rule_version" WHERE name = 'rule';
+END;
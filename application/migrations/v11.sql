@@ -0,0 +1,16 @@
+-- 규칙별 평가 통계 (규칙 엔진을 통계 기록 모드로 실행했을 때 실행마다 추가)
+-- 죽은 규칙(일치 0건), 중복 규칙(항상 상위 규칙에 가려짐), 느린 규칙(REGEX 등)을 찾기 위한 근거
+CREATE TABLE IF NOT EXISTS "rule_stats" (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT,                    -- 실행 구분 (업로드 파일명, 'history' 등)
+    rule_kind TEXT NOT NULL,        -- 'rule' 또는 'transfer_rule'
+    rule_id INTEGER,                -- NULL이면 여러 규칙이 함께 쓰는 사전 평가(CONTAINS/숫자 조건/키 조회)
+    rule_version INTEGER,           -- 실행 당시 규칙 테이블 버전
+    evaluated_rows INTEGER NOT NULL,
+    matched_rows INTEGER NOT NULL,  -- 이 규칙이 적용된 행
+    shadowed_rows INTEGER NOT NULL, -- 조건은 맞았지만 우선순위가 더 높은 규칙이 먼저 적용된 행
+    seconds REAL NOT NULL,
+    recorded_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_rule_stats_rule ON "rule_stats" (rule_kind, rule_id, recorded_at);
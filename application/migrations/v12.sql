@@ -0,0 +1,16 @@
+-- 은행 거래의 '적요', '내용' 원문을 컬럼으로 저장 (이체 규칙이 보는 값)
+-- 지금까지는 transaction.content에 '적요 / 내용'으로 합쳐 저장했으므로 첫 ' / '를 기준으로 나눠 채움
+-- (' / '가 없으면 전체를 적요로, 내용은 빈 문자열로 봄)
+ALTER TABLE "bank_transaction" ADD COLUMN raw_summary TEXT; -- '적요' 컬럼
+ALTER TABLE "bank_transaction" ADD COLUMN raw_content TEXT; -- '내용' 컬럼
+
+UPDATE "bank_transaction"
+SET raw_summary = CASE WHEN instr(t.content, ' / ') > 0 THEN substr(t.content, 1, instr(t.content, ' / ') - 1)
+                       ELSE t.content END,
+    raw_content = CASE WHEN instr(t.content, ' / ') > 0 THEN substr(t.content, instr(t.content, ' / ') + 3)
+                       ELSE '' END
+FROM "transaction" t
+WHERE t.id = "bank_transaction".id;
+
+-- 이체 재판별 등 거래 종류(BANK/카드)와 유형으로 거래를 고르는 쿼리용
+CREATE INDEX IF NOT EXISTS idx_transaction_type ON "transaction" (transaction_type, type);
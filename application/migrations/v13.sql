@@ -0,0 +1,14 @@
+-- 대시보드 조회용 인덱스
+-- 조회 함수는 transaction_date를 반열린 구간(>= 시작일 AND < 종료일 다음 날)으로 비교하므로
+-- 아래 인덱스의 (동등 조건 컬럼, transaction_date) 범위 검색으로 처리됨
+CREATE INDEX IF NOT EXISTS idx_transaction_date ON "transaction" (transaction_date);
+CREATE INDEX IF NOT EXISTS idx_transaction_type_date ON "transaction" (type, transaction_date);
+CREATE INDEX IF NOT EXISTS idx_transaction_category_date ON "transaction" (category_id, transaction_date);
+CREATE INDEX IF NOT EXISTS idx_transaction_account_date ON "transaction" (account_id, transaction_date);
+CREATE INDEX IF NOT EXISTS idx_transaction_linked_account_date ON "transaction" (linked_account_id, transaction_date)
+    WHERE linked_account_id IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_balance_history_account_date ON "account_balance_history" (account_id, change_date);
+
+-- 새 인덱스의 통계를 만들어 쿼리 플래너가 사용하도록 함
+ANALYZE;
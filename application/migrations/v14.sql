@@ -0,0 +1,19 @@
+-- 거래일에서 파생한 연/연월/일 컬럼 (월별 집계 쿼리가 행마다 strftime을 계산하지 않도록)
+-- ALTER TABLE로는 STORED 생성 컬럼을 추가할 수 없으므로 VIRTUAL로 추가하고,
+-- 값은 아래 인덱스에 저장되어 집계 쿼리는 인덱스만 순서대로 읽음
+ALTER TABLE "transaction" ADD COLUMN year INTEGER
+    GENERATED ALWAYS AS (CAST(strftime('%Y', transaction_date) AS INTEGER)) VIRTUAL;
+ALTER TABLE "transaction" ADD COLUMN year_month TEXT
+    GENERATED ALWAYS AS (strftime('%Y-%m', transaction_date)) VIRTUAL;
+-- YYYYMMDD 정수 (DATE(transaction_date) BETWEEN 과 같은 기간 조건을 정수 비교로)
+ALTER TABLE "transaction" ADD COLUMN date_key INTEGER
+    GENERATED ALWAYS AS (CAST(strftime('%Y%m%d', transaction_date) AS INTEGER)) VIRTUAL;
+
+-- 기간 + 유형별 월 집계 (월별 지출, 월별 손익, 카테고리 히트맵, 피벗, 연간 요약)
+CREATE INDEX IF NOT EXISTS idx_transaction_type_month
+    ON "transaction" (type, year_month, date_key, category_id, transaction_amount);
+-- 전체 기간 월 집계 (종합 대시보드)
+CREATE INDEX IF NOT EXISTS idx_transaction_month ON "transaction" (year_month, type, transaction_amount);
+-- year는 연도가 몇 개뿐이라 따로 인덱스를 두면 플래너가 쓰지 않음 (연간 요약은 year_month 범위로 조회)
+
+ANALYZE "transaction";
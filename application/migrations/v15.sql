@@ -0,0 +1,66 @@
+-- 월별 집계 테이블 (대시보드의 월별 합계를 거래 원본 대신 여기서 읽음)
+-- 거래가 추가/수정/삭제될 때 아래 트리거가 해당 (연월, 유형, 카테고리, 계좌, 거래수단) 행만 증감함
+CREATE TABLE IF NOT EXISTS "monthly_rollup" (
+    year_month TEXT NOT NULL,
+    "type" TEXT NOT NULL,
+    category_id INTEGER NOT NULL,
+    account_id INTEGER NOT NULL,
+    transaction_type TEXT NOT NULL,
+    total_amount INTEGER NOT NULL DEFAULT 0,
+    tx_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (year_month, "type", category_id, account_id, transaction_type)
+) WITHOUT ROWID;
+-- 유형별 기간 조회 (월별 지출, 월별 손익, 카테고리 히트맵)
+CREATE INDEX IF NOT EXISTS idx_monthly_rollup_type ON "monthly_rollup" ("type", year_month, category_id, total_amount);
+
+CREATE TRIGGER IF NOT EXISTS trg_monthly_rollup_insert AFTER INSERT ON "transaction"
+BEGIN
+    INSERT INTO "monthly_rollup" (year_month, "type", category_id, account_id, transaction_type, total_amount, tx_count)
+    VALUES (NEW.year_month, NEW.type, NEW.category_id, NEW.account_id, NEW.transaction_type,
+            COALESCE(NEW.transaction_amount, 0), 1)
+    ON CONFLICT (year_month, "type", category_id, account_id, transaction_type) DO UPDATE
+        SET total_amount = total_amount + excluded.total_amount, tx_count = tx_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_monthly_rollup_delete AFTER DELETE ON "transaction"
+BEGIN
+    UPDATE "monthly_rollup"
+    SET total_amount = total_amount - COALESCE(OLD.transaction_amount, 0), tx_count = tx_count - 1
+    WHERE year_month = OLD.year_month AND "type" = OLD.type AND category_id = OLD.category_id
+      AND account_id = OLD.account_id AND transaction_type = OLD.transaction_type;
+    DELETE FROM "monthly_rollup"
+    WHERE year_month = OLD.year_month AND "type" = OLD.type AND category_id = OLD.category_id
+      AND account_id = OLD.account_id AND transaction_type = OLD.transaction_type AND tx_count <= 0;
+END;
+
+-- 재분류처럼 값이 그대로인 UPDATE는 WHEN 조건에서 걸러 집계 테이블을 건드리지 않음
+CREATE TRIGGER IF NOT EXISTS trg_monthly_rollup_update
+    AFTER UPDATE OF transaction_date, "type", category_id, account_id, transaction_type, transaction_amount
+    ON "transaction"
+    WHEN OLD.transaction_date IS NOT NEW.transaction_date OR OLD.type IS NOT NEW.type
+        OR OLD.category_id IS NOT NEW.category_id OR OLD.account_id IS NOT NEW.account_id
+        OR OLD.transaction_type IS NOT NEW.transaction_type
+        OR OLD.transaction_amount IS NOT NEW.transaction_amount
+BEGIN
+    UPDATE "monthly_rollup"
+    SET total_amount = total_amount - COALESCE(OLD.transaction_amount, 0), tx_count = tx_count - 1
+    WHERE year_month = OLD.year_month AND "type" = OLD.type AND category_id = OLD.category_id
+      AND account_id = OLD.account_id AND transaction_type = OLD.transaction_type;
+    DELETE FROM "monthly_rollup"
+    WHERE year_month = OLD.year_month AND "type" = OLD.type AND category_id = OLD.category_id
+      AND account_id = OLD.account_id AND transaction_type = OLD.transaction_type AND tx_count <= 0;
+    INSERT INTO "monthly_rollup" (year_month, "type", category_id, account_id, transaction_type, total_amount, tx_count)
+    VALUES (NEW.year_month, NEW.type, NEW.category_id, NEW.account_id, NEW.transaction_type,
+            COALESCE(NEW.transaction_amount, 0), 1)
+    ON CONFLICT (year_month, "type", category_id, account_id, transaction_type) DO UPDATE
+        SET total_amount = total_amount + excluded.total_amount, tx_count = tx_count + 1;
+END;
+
+-- 기존 거래로 채움 (db_manager.rebuild_monthly_rollup과 같은 집계)
+INSERT INTO "monthly_rollup" (year_month, "type", category_id, account_id, transaction_type, total_amount, tx_count)
+SELECT year_month, type, category_id, account_id, transaction_type, COALESCE(SUM(transaction_amount), 0), COUNT(*)
+FROM "transaction"
+WHERE year_month IS NOT NULL
+GROUP BY year_month, type, category_id, account_id, transaction_type;
+
+ANALYZE "monthly_rollup";
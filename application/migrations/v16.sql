@@ -0,0 +1,43 @@
+-- 카테고리 계층 클로저 테이블: 모든 (조상, 자손) 쌍과 그 사이 단계 수 (자기 자신은 depth 0)
+-- 하위 카테고리 합산이나 경로 조회를 parent_id를 따라 올라가는 파이썬 루프 대신 조인 한 번으로 처리
+CREATE TABLE IF NOT EXISTS "category_closure" (
+    ancestor_id INTEGER NOT NULL,
+    descendant_id INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    PRIMARY KEY (ancestor_id, descendant_id),
+    FOREIGN KEY (ancestor_id) REFERENCES "category" (id),
+    FOREIGN KEY (descendant_id) REFERENCES "category" (id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_category_closure_descendant ON "category_closure" (descendant_id, depth);
+
+-- 최상위부터 4단계까지의 카테고리 이름 (경로가 짧으면 NULL)
+ALTER TABLE "category" ADD COLUMN L1 TEXT;
+ALTER TABLE "category" ADD COLUMN L2 TEXT;
+ALTER TABLE "category" ADD COLUMN L3 TEXT;
+ALTER TABLE "category" ADD COLUMN L4 TEXT;
+
+-- 기존 카테고리로 채움 (db_manager.rebuild_category_paths와 같은 계산)
+INSERT INTO "category_closure" (ancestor_id, descendant_id, depth)
+WITH RECURSIVE walk(ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM "category"
+    UNION ALL
+    SELECT p.id, w.descendant_id, w.depth + 1
+    FROM walk w
+             JOIN "category" c ON c.id = w.ancestor_id
+             JOIN "category" p ON p.id = c.parent_id
+)
+SELECT ancestor_id, descendant_id, depth FROM walk;
+
+UPDATE "category"
+SET L1 = (SELECT a.description FROM "category_closure" cc JOIN "category" a ON a.id = cc.ancestor_id
+          WHERE cc.descendant_id = "category".id
+            AND cc.depth = (SELECT MAX(depth) FROM "category_closure" WHERE descendant_id = "category".id)),
+    L2 = (SELECT a.description FROM "category_closure" cc JOIN "category" a ON a.id = cc.ancestor_id
+          WHERE cc.descendant_id = "category".id
+            AND cc.depth = (SELECT MAX(depth) FROM "category_closure" WHERE descendant_id = "category".id) - 1),
+    L3 = (SELECT a.description FROM "category_closure" cc JOIN "category" a ON a.id = cc.ancestor_id
+          WHERE cc.descendant_id = "category".id
+            AND cc.depth = (SELECT MAX(depth) FROM "category_closure" WHERE descendant_id = "category".id) - 2),
+    L4 = (SELECT a.description FROM "category_closure" cc JOIN "category" a ON a.id = cc.ancestor_id
+          WHERE cc.descendant_id = "category".id
+            AND cc.depth = (SELECT MAX(depth) FROM "category_closure" WHERE descendant_id = "category".id) - 3);
@@ -0,0 +1,5 @@
+-- 파일 재업로드는 파일 내용 해시로만 건너뛰고 겹치는 행은 키(승인번호/지문)로 판별하므로
+-- 기록만 하고 읽지 않는 거래일 범위 컬럼과 그 인덱스를 제거
+DROP INDEX IF EXISTS idx_ingest_manifest_provider;
+ALTER TABLE "ingest_manifest" DROP COLUMN date_from;
+ALTER TABLE "ingest_manifest" DROP COLUMN date_to;
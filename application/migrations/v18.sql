@@ -0,0 +1,9 @@
+-- 은행 거래 지문에 입출금 방향과 '적요 / 내용' 원문을 포함 (core/fingerprint.py)
+-- 같은 시각 같은 금액의 입금과 출금, 잔액이 없는 같은 금액 거래가 중복으로 버려지지 않도록 기존 행도 다시 계산
+-- 저장된 거래는 금액을 양수로 두고 입금만 INCOME이므로 그 외 유형(지출/이체/투자 재분류)은 출금으로 봄
+UPDATE "bank_transaction"
+SET fingerprint = bank_fingerprint(t.transaction_date,
+                                   CASE WHEN t.type = 'INCOME' THEN t.transaction_amount ELSE -t.transaction_amount END,
+                                   "bank_transaction".balance_amount, t.content)
+FROM "transaction" t
+WHERE t.id = "bank_transaction".id;
@@ -0,0 +1,37 @@
+-- 거래일시를 날짜로 해석할 수 없는 거래(year_month가 NULL)는 월별 집계에서 제외
+-- 집계 테이블의 year_month는 NOT NULL이므로, 이런 거래의 INSERT/UPDATE가 트리거 때문에 실패하지 않도록 함
+-- (삭제/감소는 year_month = NULL 비교가 일치하지 않으므로 그대로 둠)
+DROP TRIGGER IF EXISTS trg_monthly_rollup_insert;
+CREATE TRIGGER trg_monthly_rollup_insert AFTER INSERT ON "transaction"
+    WHEN NEW.year_month IS NOT NULL
+BEGIN
+    INSERT INTO "monthly_rollup" (year_month, "type", category_id, account_id, transaction_type, total_amount, tx_count)
+    VALUES (NEW.year_month, NEW.type, NEW.category_id, NEW.account_id, NEW.transaction_type,
+            COALESCE(NEW.transaction_amount, 0), 1)
+    ON CONFLICT (year_month, "type", category_id, account_id, transaction_type) DO UPDATE
+        SET total_amount = total_amount + excluded.total_amount, tx_count = tx_count + 1;
+END;
+
+DROP TRIGGER IF EXISTS trg_monthly_rollup_update;
+CREATE TRIGGER trg_monthly_rollup_update
+    AFTER UPDATE OF transaction_date, "type", category_id, account_id, transaction_type, transaction_amount
+    ON "transaction"
+    WHEN OLD.transaction_date IS NOT NEW.transaction_date OR OLD.type IS NOT NEW.type
+        OR OLD.category_id IS NOT NEW.category_id OR OLD.account_id IS NOT NEW.account_id
+        OR OLD.transaction_type IS NOT NEW.transaction_type
+        OR OLD.transaction_amount IS NOT NEW.transaction_amount
+BEGIN
+    UPDATE "monthly_rollup"
+    SET total_amount = total_amount - COALESCE(OLD.transaction_amount, 0), tx_count = tx_count - 1
+    WHERE year_month = OLD.year_month AND "type" = OLD.type AND category_id = OLD.category_id
+      AND account_id = OLD.account_id AND transaction_type = OLD.transaction_type;
+    DELETE FROM "monthly_rollup"
+    WHERE year_month = OLD.year_month AND "type" = OLD.type AND category_id = OLD.category_id
+      AND account_id = OLD.account_id AND transaction_type = OLD.transaction_type AND tx_count <= 0;
+    INSERT INTO "monthly_rollup" (year_month, "type", category_id, account_id, transaction_type, total_amount, tx_count)
+    SELECT NEW.year_month, NEW.type, NEW.category_id, NEW.account_id, NEW.transaction_type,
+           COALESCE(NEW.transaction_amount, 0), 1
+    WHERE NEW.year_month IS NOT NULL
+    ON CONFLICT (year_month, "type", category_id, account_id, transaction_type) DO UPDATE
+        SET total_amount = total_amount + excluded.total_amount, tx_count = tx_count + 1;
+END;
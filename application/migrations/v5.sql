@@ -0,0 +1,33 @@
+-- 카드 승인번호 중복 판별을 DB 제약으로 처리하기 위해 카드사 구분을 card_transaction에도 저장
+ALTER TABLE "card_transaction" ADD COLUMN transaction_provider TEXT;
+
+UPDATE "card_transaction"
+SET transaction_provider = (SELECT t.transaction_provider FROM "transaction" t WHERE t.id = "card_transaction".id);
+
+-- 이미 같은 (카드사, 승인번호)가 여러 건 저장된 DB (취소/재승인 쌍, 다른 경로로 넣은 데이터 등)
+-- 거래는 지우지 않고, 가장 작은 id만 중복 판별 키로 남긴 뒤 나머지는 이 테이블에 기록하고
+-- transaction_provider를 NULL로 비워 키에서 제외함 (UNIQUE 인덱스에서 NULL은 서로 다른 값으로 취급)
+CREATE TABLE IF NOT EXISTS "card_approval_duplicate" (
+    id INTEGER PRIMARY KEY,
+    transaction_provider TEXT NOT NULL,
+    card_approval_number TEXT NOT NULL,
+    kept_id INTEGER NOT NULL
+);
+
+INSERT INTO "card_approval_duplicate" (id, transaction_provider, card_approval_number, kept_id)
+SELECT ct.id, ct.transaction_provider, ct.card_approval_number, k.kept_id
+FROM "card_transaction" ct
+         JOIN (SELECT transaction_provider, card_approval_number, MIN(id) AS kept_id
+               FROM "card_transaction"
+               WHERE transaction_provider IS NOT NULL
+               GROUP BY transaction_provider, card_approval_number
+               HAVING COUNT(*) > 1) k
+              ON k.transaction_provider = ct.transaction_provider AND k.card_approval_number = ct.card_approval_number
+WHERE ct.id <> k.kept_id;
+
+UPDATE "card_transaction"
+SET transaction_provider = NULL
+WHERE id IN (SELECT id FROM "card_approval_duplicate");
+
+-- 이후로는 같은 (카드사, 승인번호)의 행은 기존과 같이 중복으로 보고 건너뜀 (INSERT ... ON CONFLICT DO NOTHING)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_card_provider_approval ON "card_transaction" (transaction_provider, card_approval_number);
@@ -0,0 +1,15 @@
+-- 업로드된 파일 단위 처리 이력 (같은 파일 재업로드 시 파싱 없이 건너뛰기 위함)
+CREATE TABLE IF NOT EXISTS "ingest_manifest" (
+    id INTEGER PRIMARY KEY,
+    file_hash TEXT NOT NULL UNIQUE,        -- 파일 내용의 SHA-256
+    file_name TEXT,
+    provider TEXT NOT NULL,                -- 'SHINHAN_CARD', 'KUKMIN_CARD', 'SHINHAN_BANK'
+    row_count INTEGER NOT NULL,            -- 파일의 유효 거래 행 수
+    date_from TEXT,                        -- 파일에 포함된 거래일 범위
+    date_to TEXT,
+    inserted_rows INTEGER NOT NULL DEFAULT 0,
+    skipped_rows INTEGER NOT NULL DEFAULT 0,
+    ingested_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingest_manifest_provider ON "ingest_manifest" (provider, date_from, date_to);
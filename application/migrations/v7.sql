@@ -0,0 +1,22 @@
+-- 은행 거래 중복 판별 키를 64자리 SHA-256 문자열(unique_hash)에서 64비트 정수 지문(fingerprint)으로 교체
+-- bank_fingerprint()는 run_migrations에서 등록하는 사용자 함수 (core/fingerprint.py)
+-- UNIQUE 제약이 걸린 컬럼은 DROP COLUMN이 불가능하므로 테이블을 다시 만듦
+BEGIN;
+
+CREATE TABLE "bank_transaction_new" (
+    id INTEGER PRIMARY KEY,
+    fingerprint INTEGER NOT NULL UNIQUE, -- 거래일시/금액/잔액으로 만든 중복 판별 키
+    branch TEXT,                         -- '거래점' 컬럼
+    balance_amount INTEGER,
+    FOREIGN KEY (id) REFERENCES "transaction" (id) ON DELETE CASCADE
+);
+
+INSERT INTO "bank_transaction_new" (id, fingerprint, branch, balance_amount)
+SELECT b.id, bank_fingerprint(t.transaction_date, t.transaction_amount, b.balance_amount), b.branch, b.balance_amount
+FROM "bank_transaction" b
+JOIN "transaction" t ON t.id = b.id;
+
+DROP TABLE "bank_transaction";
+ALTER TABLE "bank_transaction_new" RENAME TO "bank_transaction";
+
+COMMIT;
@@ -0,0 +1,13 @@
+-- 업로드 단계별 처리 시간 기록 (추이 확인용, 업로드 화면에서 선택적으로 저장)
+CREATE TABLE IF NOT EXISTS "ingest_metrics" (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_name TEXT,
+    provider TEXT,
+    stage TEXT NOT NULL,      -- parse, normalize, dedup, identify_transfers, run_rule_engine, write, total
+    seconds REAL NOT NULL,
+    rows_in INTEGER NOT NULL,
+    rows_out INTEGER NOT NULL,
+    recorded_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingest_metrics_stage ON "ingest_metrics" (stage, recorded_at);
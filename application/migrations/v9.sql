@@ -0,0 +1,38 @@
+-- 분류/이체 규칙이 바뀐 것을 감지하기 위한 버전 카운터 (규칙 엔진의 프로세스 내 캐시 무효화용)
+-- 규칙 또는 조건 테이블에 INSERT/UPDATE/DELETE가 일어나면 트리거가 해당 version을 1 올림
+-- 시작 값을 무작위로 두어, DB 파일을 새로 만들었을 때 이전 DB의 캐시 버전과 우연히 같아지지 않게 함
+CREATE TABLE IF NOT EXISTS "rule_version" (
+    name TEXT PRIMARY KEY,    -- 'rule' 또는 'transfer_rule'
+    version INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO "rule_version" (name, version) VALUES ('rule', abs(random() % 1000000000000));
+INSERT OR IGNORE INTO "rule_version" (name, version) VALUES ('transfer_rule', abs(random() % 1000000000000));
+
+CREATE TRIGGER IF NOT EXISTS trg_rule_insert AFTER INSERT ON "rule"
+BEGIN UPDATE "rule_version" SET version = version + 1 WHERE name = 'rule'; END;
+CREATE TRIGGER IF NOT EXISTS trg_rule_update AFTER UPDATE ON "rule"
+BEGIN UPDATE "rule_version" SET version = version + 1 WHERE name = 'rule'; END;
+CREATE TRIGGER IF NOT EXISTS trg_rule_delete AFTER DELETE ON "rule"
+BEGIN UPDATE "rule_version" SET version = version + 1 WHERE name = 'rule'; END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rule_condition_insert AFTER INSERT ON "rule_condition"
+BEGIN UPDATE "rule_version" SET version = version + 1 WHERE name = 'rule'; END;
+CREATE TRIGGER IF NOT EXISTS trg_rule_condition_update AFTER UPDATE ON "rule_condition"
+BEGIN UPDATE "rule_version" SET version = version + 1 WHERE name = 'rule'; END;
+CREATE TRIGGER IF NOT EXISTS trg_rule_condition_delete AFTER DELETE ON "rule_condition"
+BEGIN UPDATE "rule_version" SET version = version + 1 WHERE name = 'rule'; END;
+
+CREATE TRIGGER IF NOT EXISTS trg_transfer_rule_insert AFTER INSERT ON "transfer_rule"
+BEGIN UPDATE "rule_version" SET version = version + 1 WHERE name = 'transfer_rule'; END;
+CREATE TRIGGER IF NOT EXISTS trg_transfer_rule_update AFTER UPDATE ON "transfer_rule"
+BEGIN UPDATE "rule_version" SET version = version + 1 WHERE name = 'transfer_rule'; END;
+CREATE TRIGGER IF NOT EXISTS trg_transfer_rule_delete AFTER DELETE ON "transfer_rule"
+BEGIN UPDATE "rule_version" SET version = version + 1 WHERE name = 'transfer_rule'; END;
+
+CREATE TRIGGER IF NOT EXISTS trg_transfer_rule_condition_insert AFTER INSERT ON "transfer_rule_condition"
+BEGIN UPDATE "rule_version" SET version = version + 1 WHERE name = 'transfer_rule'; END;
+CREATE TRIGGER IF NOT EXISTS trg_transfer_rule_condition_update AFTER UPDATE ON "transfer_rule_condition"
+BEGIN UPDATE "rule_version" SET version = version + 1 WHERE name = 'transfer_rule'; END;
+CREATE TRIGGER IF NOT EXISTS trg_transfer_rule_condition_delete AFTER DELETE ON "transfer_rule_condition"
+BEGIN UPDATE "rule_version" SET version = version + 1 WHERE name = 'transfer_rule'; END;
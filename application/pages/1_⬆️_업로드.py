@@ -2,6 +2,10 @@ import streamlit as st
 
 import config
 from core.data_processor import insert_card_transactions_from_excel, insert_bank_transactions_from_excel
+from core.db_connection import write_connection
+from core.ingest_metrics import IngestReport, save_ingest_report
+from core.ingest_pipeline import run_ingest_pipeline, CARD, BANK
+from core.rule_stats import RuleStats, save_rule_stats
 from core.ui_utils import apply_common_styles, authenticate_user
 
 apply_common_styles()
@@ -11,6 +15,48 @@ if not authenticate_user():
 
 st.set_page_config(layout="wide", page_title="📈 신규 거래내역 업로드")
 
+
+def process_in_pipeline(files, kind, reports):
+    """여러 파일을 병렬로 파싱/분류하고, 파일별 저장 결과를 커밋되는 즉시 표시합니다."""
+    total_inserted, total_skipped = 0, 0
+    for name, inserted_count, skipped_count, error, report in run_ingest_pipeline(
+            files, kind, db_path=config.DB_PATH, record_rule_stats=save_rule_stats_enabled):
+        if error:
+            st.error(f"{name}: {error}")
+        else:
+            st.write(f"✅ {name}: {inserted_count}건 저장, {skipped_count}건 스킵")
+        total_inserted += inserted_count
+        total_skipped += skipped_count
+        reports.append(report)
+    return total_inserted, total_skipped
+
+
+def show_reports(reports):
+    """파일별 단계 처리 시간을 표시하고, 선택한 경우 ingest_metrics 테이블에 기록합니다."""
+    with st.expander("⏱️ 단계별 처리 시간"):
+        for report in reports:
+            st.caption(f"{report.file_name}: {report.total_seconds:.2f}초")
+            st.dataframe(report.to_frame(), hide_index=True, use_container_width=True)
+    if save_metrics:
+        with write_connection(config.DB_PATH) as conn:
+            for report in reports:
+                save_ingest_report(conn, report)
+    if save_rule_stats_enabled:
+        with write_connection(config.DB_PATH) as conn:
+            for report in reports:
+                if report.rule_stats is not None:
+                    save_rule_stats(conn, report.rule_stats)
+
+
+def new_report(file):
+    return IngestReport(rule_stats=RuleStats(file.name) if save_rule_stats_enabled else None)
+
+
+use_pipeline = st.toggle("여러 파일 병렬 처리", value=False, help="파일 파싱과 규칙 적용을 여러 프로세스에서 동시에 실행합니다.")
+save_metrics = st.toggle("처리 시간 기록", value=False, help="단계별 처리 시간을 DB(ingest_metrics)에 저장해 추이를 확인할 수 있게 합니다.")
+save_rule_stats_enabled = st.toggle("규칙별 통계 기록", value=False,
+                                    help="규칙마다 일치/가려짐 건수와 평가 시간을 DB(rule_stats)에 저장합니다. 모든 규칙을 평가하므로 업로드가 느려집니다.")
+
 st.subheader("💳 카드 거래내역 업로드")
 
 uploaded_files = st.file_uploader(
@@ -22,11 +68,19 @@ uploaded_files = st.file_uploader(
 if uploaded_files:
     total_inserted = 0
     total_skipped = 0
+    reports = []
     with st.spinner('파일을 처리하고 있습니다...'):
-        for file in uploaded_files:
-            inserted_count, skipped_count = insert_card_transactions_from_excel(file, db_path=config.DB_PATH)
-            total_inserted += inserted_count
-            total_skipped += skipped_count
+        if use_pipeline and len(uploaded_files) > 1:
+            total_inserted, total_skipped = process_in_pipeline(uploaded_files, CARD, reports)
+        else:
+            for file in uploaded_files:
+                report = new_report(file)
+                inserted_count, skipped_count = insert_card_transactions_from_excel(file, db_path=config.DB_PATH,
+                                                                                    report=report)
+                total_inserted += inserted_count
+                total_skipped += skipped_count
+                reports.append(report)
+    show_reports(reports)
     if total_inserted > 0 or total_skipped > 0:
         st.success(f"총 {total_inserted}개의 신규 거래 내역을 성공적으로 저장했습니다!")
         st.success(f"총 {total_skipped}개의 신규 거래 내역을 스킵하였습니다.!")
@@ -43,11 +97,18 @@ uploaded_bank_files = st.file_uploader(
 if uploaded_bank_files:
     total_inserted = 0
     total_skipped = 0
+    reports = []
     with st.spinner('은행 파일을 처리하고 있습니다...'):
-        for file in uploaded_bank_files:
-            inserted_count, skipped_count = insert_bank_transactions_from_excel(file)
-            total_inserted += inserted_count
-            total_skipped += skipped_count
+        if use_pipeline and len(uploaded_bank_files) > 1:
+            total_inserted, total_skipped = process_in_pipeline(uploaded_bank_files, BANK, reports)
+        else:
+            for file in uploaded_bank_files:
+                report = new_report(file)
+                inserted_count, skipped_count = insert_bank_transactions_from_excel(file, report=report)
+                total_inserted += inserted_count
+                total_skipped += skipped_count
+                reports.append(report)
+    show_reports(reports)
     if total_inserted > 0 or total_skipped > 0:
         st.success(f"총 {total_inserted}개의 신규 은행 거래 내역을 성공적으로 저장했습니다!")
         st.success(f"총 {total_skipped}개의 신규 거래 내역을 스킵하였습니다.!")
\ No newline at end of file
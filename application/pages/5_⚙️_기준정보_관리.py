@@ -1,13 +1,16 @@
-import sqlite3
+import os
 
 import streamlit as st
 from st_aggrid import AgGrid, JsCode
 
 import config
+from core.db_connection import write_connection
 from core.db_manager import add_new_party, add_new_category, rebuild_category_paths, update_balance_and_log, \
-    add_new_account, reclassify_all_transfers, recategorize_uncategorized, update_init_balance_and_log
+    add_new_account, reclassify_all_transfers, recategorize_uncategorized, recategorize_changed_rules, \
+    update_init_balance_and_log, collect_rule_stats, rebuild_monthly_rollup
 from core.db_queries import get_all_parties_df, get_all_categories, get_all_categories_with_hierarchy, get_all_accounts, \
-    get_balance_history, get_all_accounts_df, get_init_balance
+    get_balance_history, get_all_accounts_df, get_init_balance, get_rule_stats_summary
+from core.recategorize_job import run_recategorize_job
 from core.ui_utils import apply_common_styles, authenticate_user
 
 apply_common_styles()
@@ -156,7 +159,7 @@ if account_names:
             if submitted:
                 account_id = accounts_map[selected_account_name]
                 # DB 연결 및 함수 호출
-                with sqlite3.connect(config.DB_PATH) as conn:
+                with write_connection(config.DB_PATH) as conn:
                     try:
                         update_init_balance_and_log(account_id, adjustment_amount, conn)
                         st.success(f"'{selected_account_name}' 계좌의 잔액 조정이 완료되었습니다.")
@@ -209,6 +212,11 @@ with st.expander("🧰 데이터 보정 도구"):
             updated_count, message = rebuild_category_paths()
         st.success(f"작업 완료: {message} ({updated_count}개 행 업데이트)")
 
+    if st.button("월별 집계 다시 만들기"):
+        with st.spinner("월별 집계를 다시 만드는 중입니다..."):
+            row_count, message = rebuild_monthly_rollup()
+        st.success(f"작업 완료: {message} ({row_count}개 집계 행)")
+
 st.markdown("---")
 st.subheader("⚙️ 데이터 일괄 처리 도구")
 
@@ -223,4 +231,36 @@ with st.expander("규칙 엔진 전체 재적용"):
     if st.button("'미분류' 거래 카테고리 재적용"):
         with st.spinner("미분류 거래에 대해 카테고리 규칙을 실행 중입니다..."):
             message = recategorize_uncategorized()
-            st.success(message)
\ No newline at end of file
+            st.success(message)
+
+    if st.button("바뀐 규칙만 재적용"):
+        with st.spinner("추가/수정/삭제된 규칙의 영향을 받는 거래를 다시 분류하는 중입니다..."):
+            message = recategorize_changed_rules()
+            st.success(message)
+
+    workers = st.number_input("병렬 작업 프로세스 수", min_value=1, max_value=os.cpu_count() or 1,
+                              value=os.cpu_count() or 1, help="전체 재분류 시 거래를 나눠 분류할 프로세스 수")
+    if st.button("전체 거래 카테고리 다시 분류"):
+        progress_bar = st.progress(0.0, text="재분류 대상 거래를 나누는 중입니다...")
+        progress = None
+        for progress in run_recategorize_job(config.DB_PATH, max_workers=int(workers)):
+            progress_bar.progress(progress.fraction,
+                                  text=f"{progress.done_rows:,} / {progress.total_rows:,}건 처리 "
+                                       f"({progress.done_chunks}/{progress.total_chunks} 청크)")
+        st.success(f"총 {progress.done_rows:,}건을 다시 분류해 {progress.category_changed:,}건의 카테고리를 변경했습니다.")
+
+with st.expander("📊 규칙별 통계"):
+    st.info("업로드 시 '규칙별 통계 기록'을 켜거나 아래 버튼으로 저장된 거래를 평가하면 규칙별 일치/가려짐 건수와 평가 시간이 쌓입니다.")
+
+    if st.button("저장된 거래로 규칙 통계 기록"):
+        with st.spinner("모든 규칙을 저장된 거래에 평가하는 중입니다... (거래는 변경하지 않음)"):
+            message = collect_rule_stats()
+            st.success(message)
+
+    rule_stats_df = get_rule_stats_summary()
+    if rule_stats_df.empty:
+        st.caption("기록된 규칙 통계가 없습니다.")
+    else:
+        st.dataframe(rule_stats_df.drop(columns=['deleted']), use_container_width=True, hide_index=True,
+                     column_config={'us_per_row': st.column_config.NumberColumn("µs/행"),
+                                    'status': st.column_config.TextColumn("상태")})
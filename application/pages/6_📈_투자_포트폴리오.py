@@ -2,8 +2,8 @@
 import streamlit as st
 import pandas as pd
 import config
-import sqlite3
 import plotly.express as px
+from core.db_connection import write_connection
 from core.db_manager import update_init_balance_and_log
 from core.db_queries import get_investment_accounts, get_balance_history, get_init_balance
 from core.ui_utils import apply_common_styles, authenticate_user
@@ -47,7 +47,7 @@ else:
 
             submitted = st.form_submit_button("가치 업데이트 실행")
             if submitted:
-                with sqlite3.connect(config.DB_PATH) as conn:
+                with write_connection(config.DB_PATH) as conn:
                     update_init_balance_and_log(int(selected_asset_id), new_balance, conn)
                 st.success("자산 가치가 성공적으로 업데이트되었습니다.")
                 st.rerun()
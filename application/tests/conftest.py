@@ -0,0 +1,65 @@
+"""
+테스트 공용 fixture
+
+application 폴더를 import 경로에 넣고, 테스트마다 임시 폴더에 마이그레이션과 초기 데이터만 들어 있는 DB를 만듭니다.
+저장소 루트에서 실행합니다.
+    python -m pytest application/tests
+"""
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from core import seeder  # noqa: E402
+from core.db_connection import close_all_connections  # noqa: E402
+from core.db_manager import run_migrations  # noqa: E402
+
+MIGRATIONS_PATH = os.path.join(APP_DIR, 'migrations')
+
+
+def create_database(db_path):
+    """마이그레이션을 실행하고 초기 계좌/거래처/카테고리/규칙을 넣은 DB를 만듭니다."""
+    run_migrations(db_path, migrations_path=MIGRATIONS_PATH)
+    seeder.seed_initial_accounts(db_path)
+    seeder.seed_initial_parties(db_path)
+    seeder.seed_initial_categories(db_path)
+    seeder.seed_initial_rules(db_path)
+    seeder.seed_initial_transfer_rules(db_path)
+    return db_path
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """초기 계좌/거래처/카테고리/규칙만 들어 있는 새 DB 경로"""
+    path = create_database(str(tmp_path / 'asset_data.db'))
+    yield path
+    close_all_connections()
+
+
+def read_tables(db_path):
+    """
+    거래/카드/은행 거래와 계좌 잔액, 잔액 이력을 id 순서로 읽습니다. (두 DB의 저장 결과 비교용)
+    규칙 버전은 DB마다 시작값이 달라 비교에서 뺍니다.
+    """
+    close_all_connections()
+    with sqlite3.connect(db_path) as conn:
+        return {
+            'transaction': pd.read_sql_query('SELECT * FROM "transaction" ORDER BY id', conn).drop(columns='rule_version'),
+            'card_transaction': pd.read_sql_query('SELECT * FROM card_transaction ORDER BY id', conn),
+            'bank_transaction': pd.read_sql_query('SELECT * FROM bank_transaction ORDER BY id', conn),
+            'accounts': pd.read_sql_query('SELECT id, balance FROM accounts ORDER BY id', conn),
+            'account_balance_history': pd.read_sql_query(
+                'SELECT account_id, change_amount, previous_balance, new_balance FROM account_balance_history ORDER BY id',
+                conn),
+        }
+
+
+def assert_same_tables(left, right):
+    for name in left:
+        pd.testing.assert_frame_equal(left[name], right[name], obj=name)
@@ -0,0 +1,43 @@
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.statement_generator import GENERATORS
+from conftest import MIGRATIONS_PATH
+from core.data_processor import _fingerprint_bank_chunk, insert_bank_transactions_from_excel
+from core.db_connection import close_all_connections
+from core.fingerprint import bank_fingerprint
+
+
+def test_fingerprint_keeps_direction_and_content_without_balance():
+    # 잔액 컬럼이 없는 파일: 같은 시각 같은 금액의 입금/출금, 내용만 다른 출금, 완전히 같은 행
+    df = pd.DataFrame({
+        '거래일자': ['2024-01-01'] * 4,
+        '거래시간': ['10:00:00'] * 4,
+        '적요': ['이체', '이체', '이체', '이체'],
+        '입금': [5000, None, None, None],
+        '출금': [None, 5000, 5000, 5000],
+        '내용': ['홍길동', '홍길동', '김철수', '김철수'],
+    })
+    fingerprints = _fingerprint_bank_chunk(df)['fingerprint'].tolist()
+
+    assert len(set(fingerprints[:3])) == 3
+    assert fingerprints[2] == fingerprints[3]
+
+
+def test_stored_rows_match_ingest_fingerprints(tmp_path, db_path):
+    statement = GENERATORS['shinhan_bank'](str(tmp_path / 'shinhan_bank.xlsx'), 300, seed=3, start=datetime(2024, 1, 1))
+    assert insert_bank_transactions_from_excel(statement, db_path=db_path) == (300, 0)
+    close_all_connections()
+
+    # v18과 같은 계산으로 저장된 행에서 다시 만든 지문이 업로드할 때의 지문과 같아야 기존 DB의 중복 판별이 유지됨
+    with sqlite3.connect(db_path) as conn:
+        conn.create_function('bank_fingerprint', -1, bank_fingerprint, deterministic=True)
+        before = conn.execute("SELECT id, fingerprint FROM bank_transaction ORDER BY id").fetchall()
+        with open(os.path.join(MIGRATIONS_PATH, 'v18.sql'), encoding='utf-8') as f:
+            conn.executescript(f.read())
+        assert conn.execute("SELECT id, fingerprint FROM bank_transaction ORDER BY id").fetchall() == before
+
+    assert insert_bank_transactions_from_excel(statement, db_path=db_path, force=True) == (0, 300)
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from conftest import assert_same_tables, create_database, read_tables
+from core.data_processor import write_card_chunk
+from core.db_connection import write_connection
+
+
+def _card_frame(rows):
+    """(카드사, 승인번호, 거래일시, 금액) 목록으로 분류가 끝난 카드 거래 DataFrame을 만듭니다."""
+    df = pd.DataFrame(rows, columns=['transaction_provider', 'card_approval_number', 'transaction_date',
+                                     'transaction_amount'])
+    return df.assign(type='EXPENSE', transaction_type='CARD', category_id=4, transaction_party_id=1,
+                     content='가맹점', account_id=2, rule_id=pd.array([pd.NA] * len(df), dtype='Int64'),
+                     rule_version=pd.array([pd.NA] * len(df), dtype='Int64'), card_type='신용', card_name='카드')
+
+
+FIRST_CHUNK = _card_frame([
+    ('SHINHAN_CARD', '0001', '2024-01-01 10:00:00', 1000),
+    ('SHINHAN_CARD', '0002', '2024-01-02 10:00:00', 2000),
+])
+# 이미 저장된 승인번호(기간 밖 날짜), 청크 안의 중복, 다른 카드사의 같은 승인번호
+SECOND_CHUNK = _card_frame([
+    ('SHINHAN_CARD', '0001', '2024-03-01 10:00:00', 1000),
+    ('SHINHAN_CARD', '0003', '2024-03-02 10:00:00', 3000),
+    ('SHINHAN_CARD', '0003', '2024-03-02 10:00:00', 3000),
+    ('KUKMIN_CARD', '0002', '2024-03-03 10:00:00', 4000),
+])
+
+
+@pytest.mark.parametrize('bulk', [True, False])
+def test_card_chunk_skips_stored_and_repeated_approvals(db_path, bulk):
+    with write_connection(db_path) as conn:
+        assert write_card_chunk(FIRST_CHUNK, conn, bulk) == (2, 0)
+    with write_connection(db_path) as conn:
+        assert write_card_chunk(SECOND_CHUNK, conn, bulk) == (2, 2)
+
+    tables = read_tables(db_path)
+    assert tables['transaction']['id'].tolist() == [1, 2, 3, 4]
+    assert tables['card_transaction'][['id', 'transaction_provider', 'card_approval_number']].values.tolist() == [
+        [1, 'SHINHAN_CARD', '0001'], [2, 'SHINHAN_CARD', '0002'], [3, 'SHINHAN_CARD', '0003'],
+        [4, 'KUKMIN_CARD', '0002']]
+
+
+def test_bulk_and_rowwise_card_inserts_store_the_same_rows(tmp_path, db_path):
+    rowwise_db = create_database(str(tmp_path / 'rowwise.db'))
+    for path, bulk in ((db_path, True), (rowwise_db, False)):
+        for chunk in (FIRST_CHUNK, SECOND_CHUNK):
+            with write_connection(path) as conn:
+                write_card_chunk(chunk, conn, bulk)
+
+    assert_same_tables(read_tables(rowwise_db), read_tables(db_path))
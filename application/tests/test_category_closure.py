@@ -0,0 +1,80 @@
+import os
+import sqlite3
+
+import pandas as pd
+
+from conftest import MIGRATIONS_PATH
+from core.db_connection import close_all_connections
+from core.db_manager import add_new_category, rebuild_category_paths, CATEGORY_LEVELS
+from core.db_queries import get_all_categories_with_hierarchy
+
+
+def _walk_parents(db_path):
+    """parent_id를 따라 올라가 카테고리마다 최상위부터 자기 자신까지의 ID 목록을 만듭니다."""
+    close_all_connections()
+    with sqlite3.connect(db_path) as conn:
+        parents = dict(conn.execute("SELECT id, parent_id FROM category"))
+    chains = {}
+    for category_id in parents:
+        chain = [category_id]
+        while parents[chain[0]] is not None:
+            chain.insert(0, parents[chain[0]])
+        chains[category_id] = chain
+    return chains
+
+
+def _category_id(db_path, category_code):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT id FROM category WHERE category_code = ?", (category_code,)).fetchone()[0]
+
+
+def assert_paths_match_parent_walk(db_path):
+    chains = _walk_parents(db_path)
+    with sqlite3.connect(db_path) as conn:
+        names = dict(conn.execute("SELECT id, description FROM category"))
+        closure = set(conn.execute("SELECT ancestor_id, descendant_id, depth FROM category_closure"))
+        levels = {row[0]: list(row[1:]) for row in conn.execute(
+            f"SELECT id, {', '.join(f'L{i + 1}' for i in range(CATEGORY_LEVELS))} FROM category")}
+
+    assert closure == {(ancestor, category_id, len(chain) - 1 - i)
+                       for category_id, chain in chains.items() for i, ancestor in enumerate(chain)}
+    for category_id, chain in chains.items():
+        path_names = [names[i] for i in chain][:CATEGORY_LEVELS]
+        assert levels[category_id] == path_names + [None] * (CATEGORY_LEVELS - len(path_names)), category_id
+
+    hierarchy = get_all_categories_with_hierarchy(db_path).set_index('id')['name_path']
+    expected = pd.Series({category_id: '/'.join(names[i] for i in chain) for category_id, chain in chains.items()})
+    pd.testing.assert_series_equal(hierarchy.sort_index(), expected.sort_index(), check_names=False,
+                                   check_index_type=False)
+
+
+def test_closure_and_level_columns_follow_parent_ids(db_path):
+    assert_paths_match_parent_walk(db_path)
+
+    # 4단계보다 깊게 추가
+    parent_id = _category_id(db_path, 'MONTHLY_RENT')
+    for level in range(3):
+        assert add_new_category(parent_id, f'DEEP_{level}', f'깊은 카테고리 {level}', 'EXPENSE', db_path)[0]
+        parent_id = _category_id(db_path, f'DEEP_{level}')
+    assert max(len(chain) for chain in _walk_parents(db_path).values()) > CATEGORY_LEVELS
+    assert_paths_match_parent_walk(db_path)
+
+    # parent_id를 직접 바꾼 뒤(하위 카테고리째 다른 부모로 이동) 경로를 다시 계산
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE category SET parent_id = (SELECT id FROM category WHERE category_code = 'SHOPPING') "
+                     "WHERE category_code = 'HOUSING_EXPENSE'")
+    assert rebuild_category_paths(db_path)[0] > 0
+    assert_paths_match_parent_walk(db_path)
+
+
+def test_v16_backfills_existing_categories(db_path):
+    # v16 이전 상태로 되돌린 뒤 v16 스크립트를 다시 실행해 기존 카테고리로 채우는 부분을 확인
+    close_all_connections()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP TABLE category_closure")
+        for i in range(CATEGORY_LEVELS):
+            conn.execute(f"ALTER TABLE category DROP COLUMN L{i + 1}")
+        with open(os.path.join(MIGRATIONS_PATH, 'v16.sql'), encoding='utf-8') as f:
+            conn.executescript(f.read())
+
+    assert_paths_match_parent_walk(db_path)
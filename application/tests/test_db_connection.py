@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+from analysis import run_engine_and_update_db, SQL
+import core.db_connection as db_connection
+from core.db_connection import get_connection, read_connection, write_connection
+from core.db_manager import add_new_account, add_new_party, update_transaction_category
+from core.db_queries import get_account_id_by_name, get_all_accounts
+
+
+def test_pooled_connections_leave_foreign_keys_off(db_path):
+    # 마이그레이션(v1은 PRAGMA foreign_keys = ON으로 시작)을 실행한 뒤에도 풀의 연결은 기본값 그대로
+    for read_only in (False, True):
+        conn = get_connection(db_path, read_only=read_only)
+        try:
+            assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 0
+        finally:
+            conn.close()
+
+
+def test_queries_use_the_given_connection(db_path):
+    with write_connection(db_path) as conn:
+        conn.execute("INSERT INTO accounts (name, account_type, is_asset, initial_balance, balance) "
+                     "VALUES ('테스트계좌', 'BANK_ACCOUNT', 1, 0, 0)")
+        # 아직 커밋하지 않은 계좌는 넘긴 연결로만 보임
+        assert get_account_id_by_name('테스트계좌', db_path) is None
+        account_id = get_account_id_by_name('테스트계좌', db_path, conn=conn)
+        assert account_id is not None
+        assert get_all_accounts(db_path=db_path, conn=conn)['테스트계좌'] == account_id
+        # 넘긴 연결은 조회 함수가 커밋하거나 풀에 돌려주지 않음
+        assert conn.in_transaction
+
+    with read_connection(db_path) as conn:
+        assert get_account_id_by_name('테스트계좌', db_path, conn=conn) == account_id
+
+
+def test_writers_share_the_callers_transaction(db_path):
+    with write_connection(db_path) as conn:
+        assert add_new_account('테스트계좌', 'BANK_ACCOUNT', True, 0, db_path, conn=conn)[0]
+        assert add_new_party('테스트거래처', '테스트', db_path, conn=conn)[0]
+        # 실패한 쓰기는 자기 변경만 되돌리고 앞선 쓰기와 트랜잭션은 그대로 둠
+        assert not add_new_party('테스트거래처', '중복', db_path, conn=conn)[0]
+        assert conn.in_transaction
+        assert get_account_id_by_name('테스트계좌', db_path) is None
+
+    with read_connection(db_path) as conn:
+        assert get_account_id_by_name('테스트계좌', db_path, conn=conn) is not None
+        assert conn.execute("SELECT description FROM transaction_party WHERE party_code = '테스트거래처'"
+                            ).fetchall() == [('테스트',)]
+
+
+def test_rule_engine_reads_rules_from_the_given_connection(db_path):
+    with write_connection(db_path) as conn:
+        conn.execute("INSERT INTO \"transaction\" (type, transaction_type, transaction_provider, category_id, "
+                     "account_id, transaction_party_id, transaction_date, transaction_amount, content) "
+                     "VALUES ('EXPENSE', 'CARD', 'SHINHAN_CARD', 4, 1, 1, '2024-01-01 00:00:00', 1000, '테스트상점')")
+        rule_id = conn.execute("INSERT INTO rule (priority, category_id) VALUES (-1, 29)").lastrowid
+        conn.execute("INSERT INTO rule_condition (rule_id, column_to_check, match_type, value) "
+                     "VALUES (?, 'content', 'EXACT', '테스트상점')", (rule_id,))
+
+        assert run_engine_and_update_db(db_path, mode=SQL, conn=conn) == 1
+        assert conn.execute("SELECT category_id, rule_id FROM \"transaction\" WHERE content = '테스트상점'"
+                            ).fetchone() == (29, rule_id)
+        conn.rollback()
+
+
+def test_failed_write_returns_its_connection(db_path):
+    db_connection.close_all_connections()
+    with pytest.raises(sqlite3.Error):
+        update_transaction_category(1, object(), db_path)
+    idle = db_connection._pool[(db_path, False)]
+    assert len(idle) == 1 and not idle[0].in_transaction
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook
+
+from benchmarks.statement_generator import GENERATORS
+from conftest import assert_same_tables, create_database, read_tables
+from core.data_processor import insert_bank_transactions_from_excel, insert_card_transactions_from_excel
+from core.excel_reader import read_excel_chunks
+
+INGEST = {
+    'shinhan_card': insert_card_transactions_from_excel,
+    'kookmin_card': insert_card_transactions_from_excel,
+    'shinhan_bank': insert_bank_transactions_from_excel,
+}
+
+
+@pytest.mark.parametrize('kind', list(GENERATORS))
+def test_chunked_ingest_matches_whole_file_read(tmp_path, db_path, kind):
+    statement = GENERATORS[kind](str(tmp_path / f"{kind}.xlsx"), 250, seed=3, start=datetime(2024, 1, 1))
+    whole_db = create_database(str(tmp_path / 'whole.db'))
+
+    assert INGEST[kind](statement, db_path=whole_db, chunk_size=None)[0] == 250
+    assert INGEST[kind](statement, db_path=db_path, chunk_size=40)[0] == 250
+
+    assert_same_tables(read_tables(whole_db), read_tables(db_path))
+
+
+def _shinhan_card_with_blank_approval(path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['카드구분', '거래일', '가맹점명', '금액', '이용카드', '승인번호'])
+    for i in range(7):
+        # 5번째 행만 승인번호가 비어 있음 (그 행이 든 청크만 숫자 컬럼이 float으로 추론될 수 있음)
+        sheet.append(['신용', f"2024.01.0{i + 1} 10:00", f"가맹점{i}", '1,000', '본인123', None if i == 4 else 10000001 + i])
+    workbook.save(path)
+    return path
+
+
+@pytest.mark.parametrize('chunk_size', [None, 3])
+def test_approval_numbers_do_not_depend_on_chunk_boundaries(tmp_path, db_path, chunk_size):
+    path = _shinhan_card_with_blank_approval(str(tmp_path / 'shinhan_card.xlsx'))
+    chunks = list(read_excel_chunks(path, chunk_size=chunk_size, dtype={'승인번호': object}))
+    assert [str(value) for df in chunks for value in df['승인번호']] == [
+        '10000001', '10000002', '10000003', '10000004', 'nan', '10000006', '10000007']
+
+    assert insert_card_transactions_from_excel(path, db_path=db_path, chunk_size=chunk_size) == (7, 0)
+    stored = read_tables(db_path)['card_transaction']['card_approval_number'].tolist()
+    assert stored == ['10000001', '10000002', '10000003', '10000004', 'nan', '10000006', '10000007']
@@ -0,0 +1,37 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+import analysis
+from analysis import run_rule_engine, ROWWISE, FACTORIZED
+from core.rule_set import RULE
+
+
+def _frame(db_path, rows, seed):
+    """규칙 조건 값과 규칙에 없는 가맹점명, 여러 금액을 섞은 미분류 거래"""
+    with sqlite3.connect(db_path) as conn:
+        values = [row[0] for row in conn.execute(
+            "SELECT value FROM rule_condition WHERE column_to_check = 'content'")]
+    rng = np.random.default_rng(seed)
+    contents = values + [f"가맹점{i}" for i in range(40)]
+    return pd.DataFrame({
+        'content': rng.choice(contents, rows),
+        'content2': '',
+        'transaction_amount': rng.choice([1000, 3000, 4500, 12000, 30000, 99000], rows),
+        'category_id': 4,
+    })
+
+
+def test_factorized_memo_stays_within_limit(db_path, monkeypatch):
+    monkeypatch.setattr(analysis, 'FACTORIZED_MEMO_LIMIT', 20)
+    monkeypatch.setattr(analysis, '_factorized_memo', {})
+
+    for seed in range(3):
+        df = _frame(db_path, 500, seed)
+        expected = run_rule_engine(df.copy(), 4, db_path, mode=ROWWISE)
+        actual = run_rule_engine(df.copy(), 4, db_path, mode=FACTORIZED)
+
+        pd.testing.assert_frame_equal(expected, actual)
+        _, memo = analysis._factorized_memo[(db_path, RULE)]
+        assert len(memo) == 20
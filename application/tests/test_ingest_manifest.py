@@ -0,0 +1,75 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+import core.data_processor as data_processor
+from benchmarks.statement_generator import GENERATORS
+from conftest import assert_same_tables, create_database, read_tables
+from core.data_processor import insert_bank_transactions_from_excel, insert_card_transactions_from_excel
+
+INGEST = {
+    'shinhan_card': insert_card_transactions_from_excel,
+    'kookmin_card': insert_card_transactions_from_excel,
+    'shinhan_bank': insert_bank_transactions_from_excel,
+}
+WRITERS = {
+    'shinhan_card': 'write_card_chunk',
+    'kookmin_card': 'write_card_chunk',
+    'shinhan_bank': 'write_bank_chunk',
+}
+
+
+def _manifest_rows(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT file_name, row_count, inserted_rows, skipped_rows FROM ingest_manifest").fetchall()
+
+
+@pytest.mark.parametrize('kind', list(GENERATORS))
+def test_reupload_is_skipped_by_manifest(tmp_path, db_path, kind):
+    statement = GENERATORS[kind](str(tmp_path / f"{kind}.xlsx"), 100, seed=1, start=datetime(2024, 1, 1))
+
+    assert INGEST[kind](statement, db_path=db_path, chunk_size=40) == (100, 0)
+    before = read_tables(db_path)
+    assert INGEST[kind](statement, db_path=db_path, chunk_size=40) == (0, 100)
+
+    assert_same_tables(before, read_tables(db_path))
+    assert _manifest_rows(db_path) == [(f"{kind}.xlsx", 100, 100, 0)]
+
+
+@pytest.mark.parametrize('kind', list(GENERATORS))
+def test_overlapping_file_with_new_rows_is_inserted(tmp_path, db_path, kind):
+    # 같은 기간의 다른 거래: 이전 파일의 기간 안쪽이라도 저장되지 않은 행은 모두 저장되어야 함
+    first = GENERATORS[kind](str(tmp_path / f"{kind}_1.xlsx"), 100, seed=1, start=datetime(2024, 1, 1))
+    second = GENERATORS[kind](str(tmp_path / f"{kind}_2.xlsx"), 100, seed=2, start=datetime(2024, 1, 1))
+
+    assert INGEST[kind](first, db_path=db_path, chunk_size=40) == (100, 0)
+    assert INGEST[kind](second, db_path=db_path, chunk_size=40) == (100, 0)
+    assert len(read_tables(db_path)['transaction']) == 200
+
+
+@pytest.mark.parametrize('kind', list(GENERATORS))
+def test_failed_write_is_not_recorded_and_retry_completes(tmp_path, db_path, monkeypatch, kind):
+    statement = GENERATORS[kind](str(tmp_path / f"{kind}.xlsx"), 100, seed=1, start=datetime(2024, 1, 1))
+    expected_db = create_database(str(tmp_path / 'expected.db'))
+    INGEST[kind](statement, db_path=expected_db, chunk_size=40)
+
+    # 마지막 청크(처리 이력을 함께 커밋하는 청크) 저장 중 오류
+    write_chunk = getattr(data_processor, WRITERS[kind])
+    calls = []
+
+    def failing_write(df, conn, *args, **kwargs):
+        calls.append(len(df))
+        if len(calls) == 3:
+            raise sqlite3.OperationalError("disk I/O error")
+        return write_chunk(df, conn, *args, **kwargs)
+
+    monkeypatch.setattr(data_processor, WRITERS[kind], failing_write)
+    assert INGEST[kind](statement, db_path=db_path, chunk_size=40) == (80, 0)
+    assert _manifest_rows(db_path) == []
+
+    # 앞 청크는 커밋되어 있으므로 다시 올리면 나머지만 저장하고 처리 이력을 남김
+    monkeypatch.setattr(data_processor, WRITERS[kind], write_chunk)
+    assert INGEST[kind](statement, db_path=db_path, chunk_size=40) == (20, 80)
+    assert _manifest_rows(db_path) == [(f"{kind}.xlsx", 100, 20, 80)]
+    assert_same_tables(read_tables(expected_db), read_tables(db_path))
@@ -0,0 +1,91 @@
+import io
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+
+import config
+import core.ingest_pipeline as ingest_pipeline
+from benchmarks.statement_generator import GENERATORS
+from conftest import assert_same_tables, create_database, read_tables
+from core.data_processor import insert_bank_transactions_from_excel, insert_card_transactions_from_excel
+from core.ingest_pipeline import run_ingest_pipeline, CARD, BANK
+
+
+def _uploaded(path):
+    """streamlit UploadedFile처럼 name과 getvalue()를 가진 파일 객체"""
+    with open(path, 'rb') as f:
+        uploaded = io.BytesIO(f.read())
+    uploaded.name = path.rsplit('/', 1)[-1]
+    return uploaded
+
+
+def _manifest_rows(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT file_name, row_count, inserted_rows, skipped_rows FROM ingest_manifest "
+                            "ORDER BY id").fetchall()
+
+
+def _statements(tmp_path, kind):
+    if kind == CARD:
+        # 같은 파일을 두 번 올린 경우와 기간이 겹치는 파일을 함께 포함
+        paths = [GENERATORS['shinhan_card'](str(tmp_path / 'shinhan_1.xlsx'), 120, seed=1, start=datetime(2024, 1, 1)),
+                 GENERATORS['kookmin_card'](str(tmp_path / 'kookmin_2.xlsx'), 120, seed=2, start=datetime(2024, 1, 1)),
+                 GENERATORS['shinhan_card'](str(tmp_path / 'shinhan_3.xlsx'), 120, seed=3, start=datetime(2024, 1, 1))]
+        return paths + [paths[0]]
+    return [GENERATORS['shinhan_bank'](str(tmp_path / f'shinhan_bank_{i}.xlsx'), 120, seed=i,
+                                       start=datetime(2024, i, 1)) for i in (1, 2, 3)]
+
+
+@pytest.mark.parametrize('kind', [CARD, BANK])
+def test_pipeline_matches_sequential_ingest(tmp_path, db_path, kind):
+    paths = _statements(tmp_path, kind)
+    sequential_db = create_database(str(tmp_path / 'sequential.db'))
+    ingest = insert_card_transactions_from_excel if kind == CARD else insert_bank_transactions_from_excel
+    expected = [ingest(path, db_path=sequential_db, chunk_size=25) for path in paths]
+
+    results = list(run_ingest_pipeline([_uploaded(path) for path in paths], kind, db_path=db_path, max_workers=2,
+                                       chunk_size=25))
+
+    assert [error for _, _, _, error, _ in results] == [None] * len(paths)
+    assert [(inserted, skipped) for _, inserted, skipped, _, _ in results] == expected
+    assert_same_tables(read_tables(sequential_db), read_tables(db_path))
+    assert _manifest_rows(sequential_db) == _manifest_rows(db_path)
+
+
+def test_pipeline_write_error_is_reported_and_not_recorded(tmp_path, db_path, monkeypatch):
+    paths = _statements(tmp_path, CARD)[:3]
+    write_card_chunk = ingest_pipeline.write_card_chunk
+
+    def failing_write(df, conn, *args, **kwargs):
+        if (df['transaction_provider'] == 'KUKMIN_CARD').any():
+            raise sqlite3.OperationalError("disk I/O error")
+        return write_card_chunk(df, conn, *args, **kwargs)
+
+    monkeypatch.setattr(ingest_pipeline, 'write_card_chunk', failing_write)
+    results = list(run_ingest_pipeline([_uploaded(path) for path in paths], CARD, db_path=db_path, max_workers=2,
+                                       chunk_size=25))
+
+    assert [(name, inserted, error is None) for name, inserted, _, error, _ in results] == [
+        ('shinhan_1.xlsx', 120, True), ('kookmin_2.xlsx', 0, False), ('shinhan_3.xlsx', 120, True)]
+    assert [row[0] for row in _manifest_rows(db_path)] == ['shinhan_1.xlsx', 'shinhan_3.xlsx']
+
+
+def test_pipeline_entry_point_runs_under_spawn(tmp_path, db_path):
+    # 배포 환경(Windows)과 같은 spawn 방식으로 새 인터프리터에서 실행
+    assert config.MP_START_METHOD == 'spawn'
+    paths = _statements(tmp_path, BANK)
+    sequential_db = create_database(str(tmp_path / 'sequential.db'))
+    for path in paths:
+        insert_bank_transactions_from_excel(path, db_path=sequential_db)
+
+    result = subprocess.run([sys.executable, '-m', 'core.ingest_pipeline', BANK, *paths, '--db', db_path,
+                             '--workers', '2'], cwd=os.path.dirname(config.__file__), capture_output=True,
+                            text=True, timeout=120)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == [f"shinhan_bank_{i}.xlsx: 120건 저장, 0건 스킵" for i in (1, 2, 3)]
+    assert_same_tables(read_tables(sequential_db), read_tables(db_path))
@@ -0,0 +1,68 @@
+import os
+import sqlite3
+
+from conftest import MIGRATIONS_PATH
+from core.db_connection import close_all_connections
+from core.db_manager import LATEST_DB_VERSION, run_migrations
+from core.fingerprint import bank_fingerprint
+
+
+def _migrate_to(db_path, version):
+    with sqlite3.connect(db_path) as conn:
+        conn.create_function('bank_fingerprint', -1, bank_fingerprint, deterministic=True)
+        for v in range(1, version + 1):
+            with open(os.path.join(MIGRATIONS_PATH, f"v{v}.sql"), encoding='utf-8') as f:
+                conn.executescript(f.read())
+        conn.execute(f"PRAGMA user_version = {version}")
+
+
+def _insert_card(conn, provider, approval_number):
+    cursor = conn.execute("""
+        INSERT INTO "transaction" (type, account_id, transaction_type, transaction_provider, category_id,
+                                   transaction_party_id, transaction_date, transaction_amount, content)
+        VALUES ('EXPENSE', 1, 'CARD', ?, 1, 1, '2024-01-01 10:00:00', 1000, '가맹점')
+    """, (provider,))
+    conn.execute("INSERT INTO card_transaction (id, card_approval_number, card_type, card_name) VALUES (?, ?, '신용', '카드')",
+                 (cursor.lastrowid, approval_number))
+    return cursor.lastrowid
+
+
+def test_v5_keeps_rows_with_repeated_approval_numbers(tmp_path):
+    db_path = str(tmp_path / 'old.db')
+    _migrate_to(db_path, 4)
+    with sqlite3.connect(db_path) as conn:
+        kept = _insert_card(conn, 'SHINHAN_CARD', '0001')
+        duplicate = _insert_card(conn, 'SHINHAN_CARD', '0001')  # 취소/재승인 쌍
+        other_provider = _insert_card(conn, 'KUKMIN_CARD', '0001')
+
+    run_migrations(db_path, migrations_path=MIGRATIONS_PATH)
+    close_all_connections()
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == LATEST_DB_VERSION
+        assert conn.execute('SELECT COUNT(*) FROM "transaction"').fetchone()[0] == 3
+        assert dict(conn.execute("SELECT id, transaction_provider FROM card_transaction")) == {
+            kept: 'SHINHAN_CARD', duplicate: None, other_provider: 'KUKMIN_CARD'}
+        assert conn.execute("SELECT id, kept_id FROM card_approval_duplicate").fetchall() == [(duplicate, kept)]
+
+
+def test_v17_drops_unused_manifest_date_range(tmp_path):
+    db_path = str(tmp_path / 'old.db')
+    _migrate_to(db_path, 16)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            INSERT INTO ingest_manifest (file_hash, file_name, provider, row_count, date_from, date_to, inserted_rows,
+                                         skipped_rows, ingested_at)
+            VALUES ('hash', 'card.xlsx', 'SHINHAN_CARD', 10, '2024-01-01', '2024-01-31', 8, 2, '2024-02-01 00:00:00')
+        """)
+
+    run_migrations(db_path, migrations_path=MIGRATIONS_PATH)
+    close_all_connections()
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == LATEST_DB_VERSION
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(ingest_manifest)")}
+        assert not {'date_from', 'date_to'} & columns
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'idx_ingest_manifest_provider'").fetchone() is None
+        assert conn.execute("SELECT file_hash, row_count, inserted_rows, skipped_rows FROM ingest_manifest"
+                            ).fetchall() == [('hash', 10, 8, 2)]
@@ -0,0 +1,101 @@
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.statement_generator import GENERATORS
+from core.data_processor import insert_bank_transactions_from_excel, insert_card_transactions_from_excel
+from core.db_connection import close_all_connections
+from core.db_manager import update_transaction_category, reclassify_expense, rebuild_monthly_rollup
+
+ROLLUP_KEY = ['year_month', 'type', 'category_id', 'account_id', 'transaction_type']
+
+
+def _rollup(conn):
+    return pd.read_sql_query(f'SELECT * FROM monthly_rollup ORDER BY {", ".join(ROLLUP_KEY)}', conn)
+
+
+def _grouped(conn):
+    return pd.read_sql_query(f"""
+        SELECT {", ".join(ROLLUP_KEY)}, COALESCE(SUM(transaction_amount), 0) AS total_amount, COUNT(*) AS tx_count
+        FROM "transaction"
+        WHERE year_month IS NOT NULL
+        GROUP BY {", ".join(ROLLUP_KEY)}
+        ORDER BY {", ".join(ROLLUP_KEY)}
+    """, conn)
+
+
+def assert_rollup_matches_transactions(db_path):
+    close_all_connections()
+    with sqlite3.connect(db_path) as conn:
+        pd.testing.assert_frame_equal(_rollup(conn), _grouped(conn))
+
+
+def test_rollup_triggers_match_group_by(tmp_path, db_path):
+    # 월말에 시작해 다음 달로 넘어가는 명세서
+    start = datetime(2024, 1, 25)
+    insert_card_transactions_from_excel(GENERATORS['shinhan_card'](str(tmp_path / 'shinhan_card.xlsx'), 300, seed=1,
+                                                                   start=start), db_path=db_path)
+    insert_card_transactions_from_excel(GENERATORS['kookmin_card'](str(tmp_path / 'kookmin_card.xlsx'), 300, seed=2,
+                                                                   start=start), db_path=db_path)
+    insert_bank_transactions_from_excel(GENERATORS['shinhan_bank'](str(tmp_path / 'shinhan_bank.xlsx'), 300, seed=3,
+                                                                   start=start), db_path=db_path)
+    assert_rollup_matches_transactions(db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        months = conn.execute('SELECT COUNT(DISTINCT year_month) FROM "transaction"').fetchone()[0]
+        card_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM \"transaction\" WHERE transaction_type = 'CARD' ORDER BY id LIMIT 5")]
+        bank_expense_id = conn.execute(
+            "SELECT id FROM \"transaction\" WHERE transaction_type = 'BANK' AND type = 'EXPENSE' LIMIT 1").fetchone()[0]
+    assert months > 1
+
+    # 앱의 수정 함수: 카테고리 변경, 은행 지출을 이체로 재분류
+    update_transaction_category(card_ids[0], 29, db_path)
+    update_transaction_category(card_ids[1], 29, db_path)
+    assert reclassify_expense(bank_expense_id, 2, db_path)[0]
+    assert_rollup_matches_transactions(db_path)
+
+    # 직접 수정: 다른 달로 이동, 금액 변경/삭제, 값이 같은 UPDATE, 행 삭제
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE \"transaction\" SET transaction_date = '2023-12-31 23:59:00' WHERE id = ?", (card_ids[2],))
+        conn.execute("UPDATE \"transaction\" SET transaction_amount = transaction_amount * 2 WHERE id = ?",
+                     (card_ids[3],))
+        conn.execute("UPDATE \"transaction\" SET transaction_amount = NULL WHERE id = ?", (card_ids[4],))
+        conn.execute("UPDATE \"transaction\" SET category_id = category_id WHERE transaction_type = 'CARD'")
+        conn.execute("DELETE FROM \"transaction\" WHERE id % 7 = 0")
+    assert_rollup_matches_transactions(db_path)
+
+    # 트리거를 거치지 않고 어긋난 집계는 다시 만들면 맞춰짐
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM monthly_rollup WHERE type = 'EXPENSE'")
+        conn.execute("UPDATE monthly_rollup SET total_amount = total_amount + 1")
+    assert rebuild_monthly_rollup(db_path)[0] > 0
+    assert_rollup_matches_transactions(db_path)
+
+
+def test_rollup_skips_unparseable_dates(tmp_path, db_path):
+    insert_bank_transactions_from_excel(GENERATORS['shinhan_bank'](str(tmp_path / 'shinhan_bank.xlsx'), 50, seed=4,
+                                                                   start=datetime(2024, 1, 1)), db_path=db_path)
+    with sqlite3.connect(db_path) as conn:
+        ids = [row[0] for row in conn.execute('SELECT id FROM "transaction" ORDER BY id LIMIT 2')]
+        # 날짜로 해석할 수 없는 거래일시도 거래 저장/수정은 트리거 때문에 실패하지 않음
+        conn.execute("""
+            INSERT INTO "transaction" (transaction_date, transaction_type, transaction_provider, transaction_amount,
+                                       type, category_id, transaction_party_id, account_id, content)
+            SELECT '날짜없음', transaction_type, transaction_provider, transaction_amount,
+                   type, category_id, transaction_party_id, account_id, content
+            FROM "transaction" WHERE id = ?
+        """, (ids[0],))
+        conn.execute("UPDATE \"transaction\" SET transaction_date = '날짜없음' WHERE id = ?", (ids[1],))
+        assert conn.execute('SELECT COUNT(*) FROM "transaction" WHERE year_month IS NULL').fetchone()[0] == 2
+    assert_rollup_matches_transactions(db_path)
+
+    # 날짜를 고치면 다시 집계되고, 해석할 수 없는 거래의 금액 변경/삭제는 집계에 영향 없음
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE \"transaction\" SET transaction_date = '2024-03-01 00:00:00' WHERE id = ?", (ids[1],))
+        conn.execute("UPDATE \"transaction\" SET transaction_amount = 1 WHERE year_month IS NULL")
+        conn.execute("DELETE FROM \"transaction\" WHERE year_month IS NULL")
+    assert_rollup_matches_transactions(db_path)
+    assert rebuild_monthly_rollup(db_path)[0] > 0
+    assert_rollup_matches_transactions(db_path)
@@ -0,0 +1,76 @@
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.statement_generator import GENERATORS
+from core.data_processor import insert_bank_transactions_from_excel
+from core.db_connection import close_all_connections
+from core.db_manager import reclassify_expense, recategorize_changed_rules, collect_rule_stats
+from core.recategorize_job import run_recategorize_job
+
+STOCK_ACCOUNT_ID = 9  # 영준해외주식 (투자 계좌)
+NEW_CATEGORY_ID = 29
+
+
+def _rows(db_path, ids):
+    close_all_connections()
+    with sqlite3.connect(db_path) as conn:
+        return pd.read_sql_query(
+            'SELECT id, type, category_id, rule_id, rule_version FROM "transaction" '
+            'WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id', conn, params=(str(list(ids)),))
+
+
+def _ingest_and_reclassify(tmp_path, db_path):
+    insert_bank_transactions_from_excel(GENERATORS['shinhan_bank'](str(tmp_path / 'shinhan_bank.xlsx'), 300, seed=3,
+                                                                   start=datetime(2024, 1, 1)), db_path=db_path)
+    with sqlite3.connect(db_path) as conn:
+        invest_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM \"transaction\" WHERE type = 'EXPENSE' AND rule_id IS NOT NULL ORDER BY id LIMIT 2")]
+    assert len(invest_ids) == 2
+
+    # 앱에서 투자로 재분류한 거래와, 분류 근거가 남은 채 투자로 바뀐 (예전에 재분류한) 거래
+    assert reclassify_expense(invest_ids[0], STOCK_ACCOUNT_ID, db_path)[0]
+    close_all_connections()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE \"transaction\" SET type = 'INVEST', category_id = "
+                     "(SELECT id FROM category WHERE category_code = 'STOCKS') WHERE id = ?", (invest_ids[1],))
+
+        # 모든 거래와 일치하는 규칙을 가장 앞에 추가
+        rule_id = conn.execute("INSERT INTO rule (priority, category_id) VALUES (-1, ?)", (NEW_CATEGORY_ID,)).lastrowid
+        conn.execute("INSERT INTO rule_condition (rule_id, column_to_check, match_type, value) "
+                     "VALUES (?, 'content', 'REGEX', '.')", (rule_id,))
+    return invest_ids, _rows(db_path, invest_ids)
+
+
+def _assert_only_expense_and_income_changed(db_path, invest_ids, invest_before):
+    pd.testing.assert_frame_equal(invest_before, _rows(db_path, invest_ids))
+    with sqlite3.connect(db_path) as conn:
+        categories = dict(conn.execute(
+            "SELECT type, GROUP_CONCAT(DISTINCT category_id) FROM \"transaction\" "
+            "WHERE type IN ('EXPENSE', 'INCOME') AND COALESCE(is_manual_category, 0) = 0 GROUP BY type"))
+    assert categories['EXPENSE'] == str(NEW_CATEGORY_ID)
+
+
+def test_incremental_recategorization_skips_reclassified_rows(tmp_path, db_path):
+    invest_ids, invest_before = _ingest_and_reclassify(tmp_path, db_path)
+    assert invest_before['type'].tolist() == ['INVEST', 'INVEST']
+    assert invest_before['rule_id'].isna().tolist() == [True, False]
+
+    recategorize_changed_rules(db_path)
+    _assert_only_expense_and_income_changed(db_path, invest_ids, invest_before)
+
+    # 규칙 통계도 투자 거래를 분류 대상으로 세지 않음
+    with sqlite3.connect(db_path) as conn:
+        owned = conn.execute("SELECT COUNT(*) FROM \"transaction\" WHERE type IN ('EXPENSE', 'INCOME') "
+                             "AND COALESCE(is_manual_category, 0) = 0 AND (rule_id IS NOT NULL OR category_id = 4)"
+                             ).fetchone()[0]
+    assert collect_rule_stats(db_path).startswith(f"분류 대상 {owned}건")
+
+
+def test_recategorize_job_skips_reclassified_rows(tmp_path, db_path):
+    invest_ids, invest_before = _ingest_and_reclassify(tmp_path, db_path)
+
+    for _ in run_recategorize_job(db_path, max_workers=2, chunk_size=50):
+        pass
+    _assert_only_expense_and_income_changed(db_path, invest_ids, invest_before)
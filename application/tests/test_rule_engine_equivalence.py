@@ -0,0 +1,145 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import run_rule_engine, identify_transfers, run_engine_and_update_db, ROWWISE, FACTORIZED, MATRIX, SQL
+from core.db_connection import close_all_connections
+from core.rule_set import get_rule_set, TRANSFER_RULE
+from core.rule_sql import compile_rule_match_query, register_rule_functions
+
+# 초기 규칙(EXACT/CONTAINS/EQUALS)에 더해 정규식과 숫자 구간 조건을 쓰는 규칙
+# (우선순위, 대상, [(컬럼, match_type, 값)]) - 대상은 분류 규칙이면 category_id, 이체 규칙이면 linked_account_id
+EXTRA_RULES = [
+    (0, 34, [('content', 'REGEX', '^gs'), ('transaction_amount', 'GREATER_THAN', '50000')]),
+    (1, 27, [('content', 'REGEX', r'coupang|스타벅스\s*\S+점$')]),
+    (1, 29, [('content', 'CONTAINS', '편의점'), ('transaction_amount', 'GREATER_THAN', '10000'),
+             ('transaction_amount', 'LESS_THAN', '30000')]),
+    (2, 32, [('transaction_amount', 'LESS_THAN', '1500')]),
+]
+EXTRA_TRANSFER_RULES = [
+    (0, 2, [('내용', 'REGEX', r'카드\s*대금')]),
+    (1, 3, [('적요', 'CONTAINS', '자동이체'), ('transaction_amount', 'GREATER_THAN', '100000')]),
+    (2, 4, [('적요', 'EXACT', 'FB카드'), ('transaction_amount', 'EQUALS', '7890')]),
+]
+
+CONTENTS = ['GS25', ' GS25 ', 'gs칼텍스', '현대', '현대카드(주)', '한화손해보험(주)', '쿠팡(쿠페이)', 'COUPANG 판교',
+            '스타벅스 강남점', '스타벅스 강남점 2층', '24시 편의점', '이마트 하남점', '고속도로　통행료', '새마을금고',
+            '처음 보는 가맹점']
+AMOUNTS = [1000, 1499, 1500, 7890, 10000, 10001, 17980, 29999, 30000, 36500, 50000, 50001, 61530, 100000, 100001]
+SUMMARIES = ['카드결', 'FB카드', ' FB카드', '자동이체', 'CMS자동이체', '체크카드']
+BANK_CONTENTS = ['신한카드', 'ＫＢ카드출금', '현대카드(주)', '신한 카드대금', '카드 대금', '월세']
+
+DEFAULT_CATEGORY_ID = 4  # run_engine_and_update_db가 미분류로 보는 값
+
+
+def _add_rules(conn, rule_table, condition_table, target_column, rules):
+    for priority, target, conditions in rules:
+        rule_id = conn.execute(f'INSERT INTO "{rule_table}" (priority, {target_column}) VALUES (?, ?)',
+                               (priority, target)).lastrowid
+        conn.executemany(f'INSERT INTO "{condition_table}" (rule_id, column_to_check, match_type, value) '
+                         f'VALUES (?, ?, ?, ?)', [(rule_id, *condition) for condition in conditions])
+
+
+@pytest.fixture
+def rules_db(db_path):
+    with sqlite3.connect(db_path) as conn:
+        _add_rules(conn, 'rule', 'rule_condition', 'category_id', EXTRA_RULES)
+        _add_rules(conn, 'transfer_rule', 'transfer_rule_condition', 'linked_account_id', EXTRA_TRANSFER_RULES)
+    return db_path
+
+
+def _frame(rows=600, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'content': rng.choice(CONTENTS, rows),
+        'content2': '',
+        'transaction_amount': rng.choice(AMOUNTS, rows),
+        '적요': rng.choice(SUMMARIES, rows),
+        '내용': rng.choice(BANK_CONTENTS, rows),
+        'category_id': DEFAULT_CATEGORY_ID,
+    })
+
+
+def _categorize(df, db_path, mode):
+    return run_rule_engine(df.copy(), DEFAULT_CATEGORY_ID, db_path, mode=mode)[['category_id', 'rule_id']]
+
+
+def _store_uncategorized(df, db_path):
+    stored = df[['content', 'transaction_amount']].assign(
+        type='EXPENSE', account_id=1, transaction_type='CARD', transaction_provider='SHINHAN_CARD',
+        category_id=DEFAULT_CATEGORY_ID, transaction_party_id=1, transaction_date='2024-01-01 00:00:00')
+    with sqlite3.connect(db_path) as conn:
+        stored.to_sql('transaction', conn, if_exists='append', index=False)
+
+
+def _stored_categories(db_path):
+    close_all_connections()
+    with sqlite3.connect(db_path) as conn:
+        result = pd.read_sql_query('SELECT category_id, rule_id, rule_version FROM "transaction" ORDER BY id', conn)
+    return result.astype({'rule_id': 'Int64'})
+
+
+def _categorize_in_db(df, db_path):
+    """프레임을 미분류 거래로 저장한 뒤 SQL 모드로 DB 안에서 재분류한 결과"""
+    _store_uncategorized(df, db_path)
+    run_engine_and_update_db(db_path, mode=SQL)
+    return _stored_categories(db_path)[['category_id', 'rule_id']]
+
+
+def _transfers_in_db(df, db_path):
+    """이체 규칙을 reclassify_all_transfers와 같은 SQL로 컴파일해 프레임을 담은 임시 테이블에서 평가한 결과"""
+    rule_set = get_rule_set(TRANSFER_RULE, db_path)
+    targets = {rule.id: rule.target for rule in rule_set.rules}
+    with sqlite3.connect(db_path) as conn:
+        register_rule_functions(conn)
+        df.drop(columns='category_id').rename_axis('id').reset_index().to_sql('transfer_frame', conn, index=False)
+        match_sql, params = compile_rule_match_query(rule_set, set(df.columns), source='transfer_frame t')
+        matches = pd.read_sql_query(f"SELECT id, rule_id FROM ({match_sql}) ORDER BY id", conn, params=params)
+    return matches['rule_id'].map(targets).fillna(0).astype(int)
+
+
+def test_rule_modes_assign_the_same_categories(rules_db):
+    df = _frame()
+    expected = _categorize(df, rules_db, ROWWISE)
+
+    # 추가한 정규식/숫자 구간 규칙이 모두 한 번 이상 일치하는 데이터인지 확인
+    assert expected['rule_id'].notna().sum() > len(df) // 2
+    for _, category_id, _ in EXTRA_RULES:
+        assert (expected['category_id'] == category_id).any()
+
+    for mode in (FACTORIZED, MATRIX):
+        pd.testing.assert_frame_equal(expected, _categorize(df, rules_db, mode), obj=mode)
+    # FACTORIZED는 두 번째 호출에서 기억해 둔 결과를 사용
+    pd.testing.assert_frame_equal(expected, _categorize(df, rules_db, FACTORIZED), obj='factorized (memo)')
+
+    pd.testing.assert_frame_equal(expected.reset_index(drop=True), _categorize_in_db(df, rules_db), obj=SQL)
+
+
+def test_rule_modes_detect_the_same_transfers(rules_db):
+    df = _frame(seed=1)
+    expected = identify_transfers(df, rules_db, mode=ROWWISE)
+
+    for _, linked_account_id, _ in EXTRA_TRANSFER_RULES:
+        assert (expected == linked_account_id).any()
+    assert (expected == 0).any()
+
+    for mode in (FACTORIZED, MATRIX):
+        pd.testing.assert_series_equal(expected, identify_transfers(df, rules_db, mode=mode), obj=mode)
+
+    pd.testing.assert_series_equal(expected, _transfers_in_db(df, rules_db), check_names=False, obj=SQL)
+
+
+def test_default_modes_match_rowwise_updates(rules_db, tmp_path):
+    _store_uncategorized(_frame(seed=2), rules_db)
+    rowwise_db = str(tmp_path / 'rowwise.db')
+    source, target = sqlite3.connect(rules_db), sqlite3.connect(rowwise_db)
+    source.backup(target)
+    source.close()
+    target.close()
+
+    # 기본값(SQL)으로 DB 안에서 재분류한 결과가 거래를 불러와 ROWWISE로 재분류한 결과와 같음
+    assert run_engine_and_update_db(rules_db) > 0
+    run_engine_and_update_db(rowwise_db, mode=ROWWISE)
+    pd.testing.assert_frame_equal(_stored_categories(rowwise_db), _stored_categories(rules_db))
@@ -0,0 +1,55 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from analysis import run_rule_engine, ROWWISE, FACTORIZED, MATRIX
+from core.rule_set import get_rule_set, RULE
+from core.rule_sql import compile_rule_match_query, register_rule_functions
+
+# 금액이 문자열로 저장된 거래 (숫자로 바뀌는 값, 공백이 붙은 값, 지수 표기, 숫자가 아닌 값)
+AMOUNTS = ['50001', ' 50001 ', '5e4', '1,000', '', 'abc', 1000, 50001.0]
+
+
+def _add_rule(db_path, priority, category_id, conditions):
+    with sqlite3.connect(db_path) as conn:
+        rule_id = conn.execute("INSERT INTO rule (priority, category_id) VALUES (?, ?)",
+                               (priority, category_id)).lastrowid
+        conn.executemany("INSERT INTO rule_condition (rule_id, column_to_check, match_type, value) VALUES (?, ?, ?, ?)",
+                         [(rule_id, *condition) for condition in conditions])
+    return rule_id
+
+
+def _match_in_db(df, db_path):
+    """프레임을 담은 임시 테이블(금액은 TEXT 컬럼)에서 분류 규칙을 SQL로 평가한 일치 규칙 ID"""
+    rule_set = get_rule_set(RULE, db_path)
+    with sqlite3.connect(db_path) as conn:
+        register_rule_functions(conn)
+        df.drop(columns='category_id').rename_axis('id').reset_index().to_sql(
+            'rule_frame', conn, index=False, dtype={'transaction_amount': 'TEXT'})
+        match_sql, params = compile_rule_match_query(rule_set, set(df.columns), source='rule_frame t')
+        matches = pd.read_sql_query(f"SELECT id, rule_id FROM ({match_sql}) ORDER BY id", conn, params=params)
+    return matches['rule_id'].astype('Int64')
+
+
+def test_sql_numeric_conditions_coerce_text_like_pandas(db_path):
+    rule_ids = [_add_rule(db_path, -3, 34, [('transaction_amount', 'GREATER_THAN', '50000')]),
+                _add_rule(db_path, -2, 29, [('transaction_amount', 'EQUALS', '50000')]),
+                _add_rule(db_path, -1, 27, [('transaction_amount', 'LESS_THAN', '2000')])]
+    df = pd.DataFrame({'content': '처음 보는 가맹점', 'content2': '',
+                       'transaction_amount': pd.Series(AMOUNTS, dtype=object), 'category_id': 4})
+
+    expected = run_rule_engine(df.copy(), 4, db_path, mode=ROWWISE)['rule_id']
+    assert expected.tolist() == [rule_ids[0], rule_ids[0], rule_ids[1], pd.NA, pd.NA, pd.NA, rule_ids[2], rule_ids[0]]
+    pd.testing.assert_series_equal(expected.reset_index(drop=True), _match_in_db(df, db_path), check_names=False)
+
+
+def test_rules_on_missing_columns_fail_in_every_mode(db_path):
+    _add_rule(db_path, -1, 29, [('없는_컬럼', 'EXACT', '값')])
+    df = pd.DataFrame({'content': ['GS25'], 'content2': [''], 'transaction_amount': [1000], 'category_id': [4]})
+
+    for mode in (ROWWISE, FACTORIZED, MATRIX):
+        with pytest.raises(KeyError):
+            run_rule_engine(df.copy(), 4, db_path, mode=mode)
+    with pytest.raises(KeyError, match='없는_컬럼'):
+        compile_rule_match_query(get_rule_set(RULE, db_path), set(df.columns))